@@ -0,0 +1,108 @@
+import bisect
+import threading
+from array import array
+
+
+class AccountIndex:
+    def __init__(self):
+        """
+        Secondary index from every account to the chain positions of its transactions,
+        with the balance of the account after each of them. History pages and balances at
+        a height are looked up by bisection, so their cost depends on the number of
+        transactions of the account, not on the length of the chain.
+        """
+        self.positions = {}
+        self.balances = {}
+        self.height = 0
+        # Bumped by every truncation, a chunk read from the chain before it is not applied
+        self.generation = 0
+        # Appends on the event loop and syncs in worker threads update the index, queries catch it up in worker threads
+        self.lock = threading.Lock()
+
+    def apply(self, transaction):
+        """
+        Adds the transaction at the next chain position to the index.
+        A deposit (sender equals recipient) is recorded once for its account.
+        """
+        index = self.height
+        if transaction.sender == transaction.recipient:
+            self._record(transaction.sender, index, transaction.amount)
+        else:
+            self._record(transaction.sender, index, -transaction.amount)
+            self._record(transaction.recipient, index, transaction.amount)
+        self.height += 1
+
+    def _record(self, account: str, index: int, delta: float):
+        positions = self.positions.get(account)
+        if positions is None:
+            positions = self.positions[account] = array("q")
+            self.balances[account] = array("d")
+        balances = self.balances[account]
+        positions.append(index)
+        balances.append((balances[-1] if balances else 0) + delta)
+
+    def extend(self, transactions):
+        for transaction in transactions:
+            self.apply(transaction)
+
+    def truncate(self, height: int):
+        """
+        Removes the transactions from the given chain index onward.
+        """
+        self.generation += 1
+        if height >= self.height:
+            return
+        if height == 0:
+            self.positions, self.balances = {}, {}
+        else:
+            for account in list(self.positions):
+                positions = self.positions[account]
+                if positions[-1] < height:
+                    continue
+                keep = bisect.bisect_left(positions, height)
+                if keep == 0:
+                    del self.positions[account]
+                    del self.balances[account]
+                else:
+                    del positions[keep:]
+                    del self.balances[account][keep:]
+        self.height = height
+
+    def count(self, account: str) -> int:
+        positions = self.positions.get(account)
+        return len(positions) if positions is not None else 0
+
+    def history(self, account: str, from_index: int = 0, limit: int = 100, before: int = None) -> list:
+        """
+        Returns a page of the chain positions of an account.
+
+        Args:
+            account (str): The account.
+            from_index (int): Oldest chain index of the page, used if before is omitted.
+            limit (int): Maximum number of positions.
+            before (int): Returns the newest positions below this chain index instead, newest first.
+
+        Returns:
+            list: (chain index, balance after the transaction) pairs.
+        """
+        positions = self.positions.get(account)
+        if positions is None or limit <= 0:
+            return []
+        balances = self.balances[account]
+        if before is not None:
+            end = bisect.bisect_left(positions, before)
+            start = max(0, end - limit)
+            return [(positions[i], balances[i]) for i in range(end - 1, start - 1, -1)]
+        start = bisect.bisect_left(positions, from_index)
+        end = min(len(positions), start + limit)
+        return [(positions[i], balances[i]) for i in range(start, end)]
+
+    def balance_at(self, account: str, height: int) -> float:
+        """
+        Returns the balance of an account after the first height transactions of the chain.
+        """
+        positions = self.positions.get(account)
+        if positions is None:
+            return 0
+        count = bisect.bisect_left(positions, height)
+        return self.balances[account][count - 1] if count else 0
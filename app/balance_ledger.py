@@ -0,0 +1,60 @@
+class BalanceLedger:
+    def __init__(self):
+        """
+        Initialize an empty per-account balance index.
+        """
+        self.balances = {}
+        self.height = 0
+
+    def apply(self, transaction):
+        """
+        Applies a single transaction to the balance index.
+        Deposits (sender equals recipient) credit the account once.
+
+        Args:
+            transaction (Transaction): The transaction appended to the chain.
+        """
+        if transaction.sender == transaction.recipient:
+            self.balances[transaction.sender] = self.balances.get(transaction.sender, 0) + transaction.amount
+        else:
+            self.balances[transaction.sender] = self.balances.get(transaction.sender, 0) - transaction.amount
+            self.balances[transaction.recipient] = self.balances.get(transaction.recipient, 0) + transaction.amount
+        self.height += 1
+
+    def rebuild(self, transactions):
+        """
+        Rebuilds the balance index from a full list of transactions.
+
+        Args:
+            transactions (list): The transactions of the chain in order.
+        """
+        self.balances = {}
+        self.height = 0
+        for transaction in transactions:
+            self.apply(transaction)
+
+    def load(self, balances: dict, height: int):
+        """
+        Restores the balance index from a snapshot.
+
+        Args:
+            balances (dict): The balance of every account at the snapshot.
+            height (int): The number of transactions covered by the snapshot.
+        """
+        self.balances = dict(balances)
+        self.height = height
+
+    def balance(self, node_name: str):
+        """
+        Returns the current balance of an account without scanning the chain.
+
+        Args:
+            node_name (str): The account to look up.
+
+        Returns:
+            float: The balance of the account, 0 if it never appeared on the chain.
+        """
+        return self.balances.get(node_name, 0)
+
+    def __str__(self):
+        return str(self.balances)
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionBatcher:
+    def __init__(self, transchain, commit_batch, max_size: int = 100, max_wait: float = 0.05):
+        """
+        Collects verified transactions and commits them in one consensus round per batch.
+
+        Args:
+            transchain (Transchain): The local chain the batches build on.
+            commit_batch (callable): Coroutine function committing a list of transaction dicts, returns True on success.
+            max_size (int): Number of transactions after which a batch is committed.
+            max_wait (float): Seconds after the first pending transaction after which a batch is committed.
+        """
+        self.transchain = transchain
+        self.commit_batch = commit_batch
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.pending = []
+        self.futures = []
+        self.deltas = {}
+        # The batch that is currently being committed, new transactions build on top of it
+        self.in_flight = []
+        self.in_flight_deltas = {}
+        self.timer = None
+        self.flush_lock = asyncio.Lock()
+        self.committed_batches = 0
+        self.failed_batches = 0
+
+    def pending_tip(self):
+        """
+        Returns the index and hash the next transaction has to build on, including uncommitted transactions.
+
+        Returns:
+            tuple: The next chain index and the hash of the last pending or committed transaction.
+        """
+        uncommitted = self.pending or self.in_flight
+        if uncommitted:
+            return uncommitted[-1]["index"] + 1, uncommitted[-1]["current_hash"]
+        return self.transchain.chain_tip()
+
+    def pending_balance_delta(self, node_name: str) -> float:
+        """
+        Returns how much the uncommitted transactions change the balance of an account.
+        """
+        return self.deltas.get(node_name, 0) + self.in_flight_deltas.get(node_name, 0)
+
+    @staticmethod
+    def _apply_delta(deltas: dict, transaction_data: dict):
+        sender = transaction_data["sender"]
+        recipient = transaction_data["recipient"]
+        amount = transaction_data["amount"]
+        if sender == recipient:
+            deltas[sender] = deltas.get(sender, 0) + amount
+        else:
+            deltas[sender] = deltas.get(sender, 0) - amount
+            deltas[recipient] = deltas.get(recipient, 0) + amount
+
+    def _deltas(self, transactions: list) -> dict:
+        deltas = {}
+        for transaction_data in transactions:
+            self._apply_delta(deltas, transaction_data)
+        return deltas
+
+    async def submit(self, transaction_data: dict) -> bool:
+        """
+        Adds a verified, authority-signed transaction to the pending batch and waits for its commit.
+
+        Args:
+            transaction_data (dict): The transaction, building on pending_tip().
+
+        Returns:
+            bool: True if the batch containing the transaction was committed.
+        """
+        return await self.enqueue(transaction_data)
+
+    def enqueue(self, transaction_data: dict) -> asyncio.Future:
+        """
+        Adds a verified, authority-signed transaction to the pending batch without waiting.
+        The pending tip includes the transaction as soon as this returns.
+
+        Returns:
+            asyncio.Future: Resolves to True if the batch containing the transaction was committed.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append(transaction_data)
+        self.futures.append(future)
+        self._apply_delta(self.deltas, transaction_data)
+        if len(self.pending) >= self.max_size:
+            asyncio.create_task(self.flush())
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_wait, lambda: asyncio.create_task(self.flush()))
+        return future
+
+    def _resolve(self, futures: list, committed: bool):
+        for future in futures:
+            if not future.done():
+                future.set_result(committed)
+
+    async def flush(self):
+        """
+        Commits up to max_size pending transactions as one batch.
+        If the commit fails, the transactions queued behind the batch are dropped as well,
+        since they build on its hashes.
+        """
+        async with self.flush_lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending:
+                return
+            batch, futures = self.pending[:self.max_size], self.futures[:self.max_size]
+            self.pending, self.futures = self.pending[self.max_size:], self.futures[self.max_size:]
+            if self.pending:
+                self.in_flight, self.in_flight_deltas = batch, self._deltas(batch)
+                self.deltas = self._deltas(self.pending)
+            else:
+                self.in_flight, self.in_flight_deltas = batch, self.deltas
+                self.deltas = {}
+            try:
+                committed = await self.commit_batch(batch)
+            except Exception as e:
+                logger.error(f"Error committing batch: {e}")
+                committed = False
+            self.in_flight, self.in_flight_deltas = [], {}
+            if committed:
+                self.committed_batches += 1
+            else:
+                self.failed_batches += 1
+                futures += self.futures
+                self.pending, self.futures, self.deltas = [], [], {}
+            self._resolve(futures, committed)
+            # Transactions that arrived during the commit may already fill a batch
+            if len(self.pending) >= self.max_size:
+                asyncio.create_task(self.flush())
+            elif self.pending and self.timer is None:
+                self.timer = asyncio.get_running_loop().call_later(self.max_wait, lambda: asyncio.create_task(self.flush()))
+
+    def stats(self) -> dict:
+        return {
+            "max_size": self.max_size,
+            "max_wait": self.max_wait,
+            "pending": len(self.pending),
+            "in_flight": len(self.in_flight),
+            "committed_batches": self.committed_batches,
+            "failed_batches": self.failed_batches,
+        }
@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+import threading
+from collections import deque
+
+
+class FeedEntry:
+    __slots__ = ("index", "transaction", "_event")
+
+    def __init__(self, index: int, transaction):
+        self.index = index
+        self.transaction = transaction
+        self._event = None
+
+    def involves(self, account: str) -> bool:
+        return account == self.transaction.sender or account == self.transaction.recipient
+
+    @property
+    def event(self) -> str:
+        """
+        The transaction as a server-sent event, encoded once for all subscribers.
+        """
+        if self._event is None:
+            self._event = format_event(self.index, self.transaction)
+        return self._event
+
+
+def format_event(index: int, transaction) -> str:
+    return f"id: {index}\nevent: transaction\ndata: {transaction.model_dump_json()}\n\n"
+
+
+class FeedRead:
+    __slots__ = ("entries", "generation", "rewind", "first")
+
+    def __init__(self, entries, generation: int, rewind, first: int):
+        """
+        Result of reading the feed from a chain index.
+
+        Args:
+            entries (list): The buffered entries from the index onward, None if the index is older than the buffer.
+            generation (int): The generation of the feed that was read.
+            rewind (int): Index the reader has to continue from because the chain was rewritten, None if it was not.
+            first (int): Chain index of the oldest buffered entry.
+        """
+        self.entries = entries
+        self.generation = generation
+        self.rewind = rewind
+        self.first = first
+
+
+class ChainFeed:
+    def __init__(self, capacity: int = 1024, height: int = 0):
+        """
+        Ring buffer of the most recently appended transactions that subscribers read from.
+        Every subscriber keeps its own position, so appending never waits for a subscriber,
+        and a subscriber that falls behind the buffer reads the older transactions from the chain.
+        Appends may come from worker threads, subscribers are woken on their event loop.
+
+        Args:
+            capacity (int): Number of transactions kept in the buffer.
+            height (int): Length of the chain, the buffer starts after it.
+        """
+        self.entries = deque(maxlen=capacity)
+        self.height = height
+        # Bumped whenever transactions are removed from the chain, with the index they were removed from
+        self.generation = 0
+        self.rewinds = deque(maxlen=64)
+        self.lock = threading.Lock()
+        self.loop = None
+        self.loop_thread = None
+        self.event = None
+        self.wake_pending = False
+        self.subscribers = 0
+
+    @property
+    def first(self) -> int:
+        return self.entries[0].index if self.entries else self.height
+
+    def append(self, transaction):
+        with self.lock:
+            self.entries.append(FeedEntry(self.height, transaction))
+            self.height += 1
+        self._notify()
+
+    def reset(self, fork: int, height: int):
+        """
+        Records that the transactions from fork onward were removed and the chain now holds height transactions.
+        Buffered entries from fork onward are dropped. If the chain grew past fork, the buffer restarts at height.
+        """
+        with self.lock:
+            while self.entries and self.entries[-1].index >= fork:
+                self.entries.pop()
+            if height > fork:
+                self.entries.clear()
+            self.height = height
+            self.generation += 1
+            self.rewinds.append((self.generation, fork))
+        self._notify()
+
+    def read(self, position: int, generation: int) -> FeedRead:
+        """
+        Returns the buffered entries from a chain index onward.
+
+        Args:
+            position (int): The next chain index the reader expects.
+            generation (int): The generation of the feed at the previous read.
+
+        Returns:
+            FeedRead: The entries, or None as entries if the reader has to read from the chain first.
+        """
+        with self.lock:
+            rewind = None
+            if generation != self.generation:
+                forks = [fork for rewind_generation, fork in self.rewinds if rewind_generation > generation]
+                # Rewinds older than the kept ones are unknown, the reader starts over
+                rewind = min(forks) if len(forks) == self.generation - generation else 0
+                position = min(position, rewind)
+            first = self.first
+            if position < first:
+                entries = None
+            else:
+                entries = list(itertools.islice(self.entries, position - first, None))
+            return FeedRead(entries, self.generation, rewind, first)
+
+    def changed(self) -> asyncio.Event:
+        """
+        Returns an event that is set by the next append or reset. Get it before reading,
+        so a change between the read and the wait is not missed.
+        """
+        if self.event is None:
+            self.loop = asyncio.get_running_loop()
+            self.loop_thread = threading.get_ident()
+            self.event = asyncio.Event()
+        return self.event
+
+    def _notify(self):
+        if self.loop is None or self.wake_pending:
+            return
+        self.wake_pending = True
+        if threading.get_ident() == self.loop_thread:
+            self.loop.call_soon(self._wake)
+            return
+        # Appends from worker threads must not touch the event directly
+        try:
+            self.loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:
+            # The event loop was closed
+            self.wake_pending = False
+
+    def _wake(self):
+        self.wake_pending = False
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.entries.maxlen,
+            "buffered": len(self.entries),
+            "first": self.first,
+            "height": self.height,
+            "generation": self.generation,
+            "subscribers": self.subscribers,
+        }
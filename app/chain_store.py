@@ -0,0 +1,302 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from models import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Every record is prefixed with its length and a CRC32 of the payload
+RECORD_HEADER = struct.Struct("<II")
+# Every index entry holds the segment number and the offset of a record
+INDEX_ENTRY = struct.Struct("<IQ")
+
+
+class ChainStore:
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024, snapshot_interval: int = 1000, sync: bool = False):
+        """
+        Open an append-only chain store in the given directory, recovering from a torn last record.
+
+        Args:
+            directory (str): Directory holding the segment files, the index and the snapshot.
+            segment_size (int): Size in bytes after which a new segment file is started.
+            snapshot_interval (int): Number of appended transactions between two balance snapshots.
+            sync (bool): Call fsync after every append.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.snapshot_interval = snapshot_interval
+        self.sync = sync
+        self.index_path = os.path.join(directory, "index.bin")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.segment_fds = {}
+        self.index_map = None
+        self.mapped_entries = 0
+        os.makedirs(directory, exist_ok=True)
+        self.index_fd = os.open(self.index_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.recover()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:08d}.log")
+
+    def _segment_fd(self, segment: int) -> int:
+        fd = self.segment_fds.get(segment)
+        if fd is None:
+            fd = os.open(self._segment_path(segment), os.O_RDWR | os.O_CREAT, 0o644)
+            self.segment_fds[segment] = fd
+        return fd
+
+    def _segments(self) -> list:
+        return sorted(int(name[8:16]) for name in os.listdir(self.directory)
+                      if name.startswith("segment-") and name.endswith(".log"))
+
+    def _remap(self):
+        if self.index_map is not None:
+            self.index_map.close()
+            self.index_map = None
+        self.mapped_entries = self.count
+        if self.count:
+            self.index_map = mmap.mmap(self.index_fd, self.count * INDEX_ENTRY.size, access=mmap.ACCESS_READ)
+
+    def _read_record(self, segment: int, offset: int):
+        """
+        Reads the record at an offset of a segment.
+
+        Returns:
+            bytes: The payload, None if the record is incomplete or corrupted.
+        """
+        fd = self._segment_fd(segment)
+        header = os.pread(fd, RECORD_HEADER.size, offset)
+        if len(header) < RECORD_HEADER.size:
+            return None
+        length, checksum = RECORD_HEADER.unpack(header)
+        payload = os.pread(fd, length, offset + RECORD_HEADER.size)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return None
+        return payload
+
+    def _entry(self, index: int) -> tuple:
+        if index >= self.mapped_entries:
+            self._remap()
+        return INDEX_ENTRY.unpack_from(self.index_map, index * INDEX_ENTRY.size)
+
+    def recover(self):
+        """
+        Brings the index in line with the segment log after a restart.
+        Only the records after the last indexed record are scanned, a torn record is cut off.
+        """
+        index_size = os.fstat(self.index_fd).st_size
+        self.count = index_size // INDEX_ENTRY.size
+        os.ftruncate(self.index_fd, self.count * INDEX_ENTRY.size)
+        self._remap()
+
+        # Drop index entries whose record did not make it to disk
+        while self.count and self._read_record(*self._entry(self.count - 1)) is None:
+            self.count -= 1
+        os.ftruncate(self.index_fd, self.count * INDEX_ENTRY.size)
+        self._remap()
+
+        segments = self._segments() or [0]
+        if self.count:
+            segment, offset = self._entry(self.count - 1)
+            offset += RECORD_HEADER.size + len(self._read_record(segment, offset))
+        else:
+            segment, offset = segments[0], 0
+
+        # Index the records that were written after the last index entry
+        new_entries = []
+        for current in [s for s in segments if s >= segment]:
+            if current != segment:
+                offset = 0
+            # The tail is wherever the scan stops, also when it stops inside a later segment
+            segment = current
+            while True:
+                payload = self._read_record(current, offset)
+                if payload is None:
+                    break
+                new_entries.append(INDEX_ENTRY.pack(current, offset))
+                offset += RECORD_HEADER.size + len(payload)
+            fd = self._segment_fd(current)
+            if os.fstat(fd).st_size > offset:
+                logger.warning(f"Truncating torn record in segment {current} at offset {offset}")
+                os.ftruncate(fd, offset)
+                self._drop_segments_after(current)
+                break
+
+        if new_entries:
+            os.pwrite(self.index_fd, b"".join(new_entries), self.count * INDEX_ENTRY.size)
+            self.count += len(new_entries)
+            self._remap()
+        self.tail_segment = segment
+        self.tail_offset = offset
+
+    def _drop_segments_after(self, segment: int):
+        for later in [s for s in self._segments() if s > segment]:
+            fd = self.segment_fds.pop(later, None)
+            if fd is not None:
+                os.close(fd)
+            os.remove(self._segment_path(later))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, transaction: Transaction):
+        """
+        Appends a transaction record to the log and its offset to the index.
+
+        Args:
+            transaction (Transaction): The transaction to store.
+        """
+        payload = json.dumps(transaction.model_dump(), separators=(",", ":")).encode("utf-8")
+        if self.tail_offset >= self.segment_size:
+            self.tail_segment += 1
+            self.tail_offset = 0
+        fd = self._segment_fd(self.tail_segment)
+        os.pwrite(fd, RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload, self.tail_offset)
+        os.pwrite(self.index_fd, INDEX_ENTRY.pack(self.tail_segment, self.tail_offset), self.count * INDEX_ENTRY.size)
+        if self.sync:
+            os.fsync(fd)
+            os.fsync(self.index_fd)
+        self.tail_offset += RECORD_HEADER.size + len(payload)
+        self.count += 1
+
+    def read(self, index: int) -> Transaction:
+        """
+        Reads the transaction stored at a chain index.
+
+        Args:
+            index (int): The chain index of the transaction.
+
+        Returns:
+            Transaction: The stored transaction.
+        """
+        if index < 0 or index >= self.count:
+            raise IndexError("chain index out of range")
+        payload = self._read_record(*self._entry(index))
+        if payload is None:
+            # Truncated by another thread after the bounds check
+            raise IndexError("chain index out of range")
+        return Transaction(**json.loads(payload))
+
+    def truncate(self, height: int):
+        """
+        Removes all transactions from the given chain index onward.
+
+        Args:
+            height (int): The number of transactions to keep.
+        """
+        if height >= self.count:
+            return
+        if height:
+            segment, offset = self._entry(height)
+        else:
+            segment, offset = 0, 0
+        os.ftruncate(self._segment_fd(segment), offset)
+        self._drop_segments_after(segment)
+        self.count = height
+        os.ftruncate(self.index_fd, self.count * INDEX_ENTRY.size)
+        self._remap()
+        self.tail_segment = segment
+        self.tail_offset = offset
+        snapshot = self.load_snapshot()
+        if snapshot is not None and snapshot["height"] > height:
+            os.remove(self.snapshot_path)
+
+    def snapshot_due(self) -> bool:
+        """
+        Returns whether a balance snapshot should be written at the current height.
+        """
+        return self.count % self.snapshot_interval == 0
+
+    def write_snapshot(self, height: int, balances: dict):
+        """
+        Atomically writes a snapshot of the balance state at a chain height.
+
+        Args:
+            height (int): The number of transactions covered by the balances.
+            balances (dict): The balance of every account at that height.
+        """
+        temporary_path = self.snapshot_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"height": height, "balances": balances}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+
+    def load_snapshot(self):
+        """
+        Loads the last balance snapshot.
+
+        Returns:
+            dict: The snapshot with its height and balances, None if there is no usable snapshot.
+        """
+        try:
+            with open(self.snapshot_path) as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get("height", 0) > self.count:
+            return None
+        return snapshot
+
+    def close(self):
+        """
+        Closes the index map and all open files.
+        """
+        if self.index_map is not None:
+            self.index_map.close()
+            self.index_map = None
+        for fd in self.segment_fds.values():
+            os.close(fd)
+        self.segment_fds = {}
+        os.close(self.index_fd)
+
+
+class StoredTransactions:
+    def __init__(self, store: ChainStore):
+        """
+        List-like view of the transactions in a ChainStore.
+        Only the last transaction is kept in memory.
+        """
+        self.store = store
+        self.tip = None
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.store.read(i) for i in range(*index.indices(len(self.store)))]
+        if index < 0:
+            index += len(self.store)
+        if index == len(self.store) - 1:
+            if self.tip is None:
+                self.tip = self.store.read(index)
+            return self.tip
+        return self.store.read(index)
+
+    def __iter__(self):
+        for index in range(len(self.store)):
+            yield self.store.read(index)
+
+    def append(self, transaction: Transaction):
+        self.store.append(transaction)
+        self.tip = transaction
+
+    def truncate(self, height: int):
+        self.store.truncate(height)
+        self.tip = None
+
+
+class PersistentChain:
+    def __init__(self, store: ChainStore):
+        """
+        Chain backed by a ChainStore with the interface of TransactionChain used by Transchain and main.py.
+        """
+        self.store = store
+        self.transactions = StoredTransactions(store)
+
+    def model_dump(self) -> dict:
+        return {"transactions": [transaction.model_dump() for transaction in self.transactions]}
@@ -0,0 +1,179 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.exceptions import InvalidSignature
+from rsa_utils import load_cached_public_key
+
+logger = logging.getLogger(__name__)
+
+# Workers are not forked from the node, which runs an event loop and worker threads
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _verify_with_pem(public_key_pem: str, signature_hex: str, data_hash: str) -> bool:
+    """
+    Verifies a signature inside a worker process, parsing each PEM key only once.
+
+    Args:
+        public_key_pem (str): The PEM encoded public key.
+        signature_hex (str): The signature in hexadecimal format.
+        data_hash (str): The hash the signature was created for.
+
+    Returns:
+        bool: True if the signature is valid, False otherwise.
+    """
+    if not public_key_pem or not signature_hex:
+        return False
+    try:
+        public_key = load_cached_public_key(public_key_pem)
+        public_key.verify(bytes.fromhex(signature_hex), data_hash.encode("utf-8"), padding.PKCS1v15(), hashes.SHA256())
+        return True
+    except (InvalidSignature, ValueError):
+        return False
+
+
+def verify_signature_chunk(chunk: list) -> list:
+    """
+    Verifies the sender, recipient and authority signatures of a chunk of transactions.
+
+    Args:
+        chunk (list): Tuples of (index, hash, sender pem, sender signature, recipient pem,
+            recipient signature, authority pems, authority signature).
+
+    Returns:
+        list: (index, reason) for every transaction of the chunk with an invalid signature.
+    """
+    failures = []
+    for index, data_hash, sender_pem, sender_signature, recipient_pem, recipient_signature, authority_pems, authority_signature in chunk:
+        if not _verify_with_pem(sender_pem, sender_signature, data_hash):
+            failures.append((index, "sender"))
+        elif not _verify_with_pem(recipient_pem, recipient_signature, data_hash):
+            failures.append((index, "recipient"))
+        elif not any(_verify_with_pem(authority_pem, authority_signature, data_hash) for authority_pem in authority_pems):
+            failures.append((index, "authority"))
+    return failures
+
+
+class ChainVerifier:
+    def __init__(self, max_workers: int = None, chunk_size: int = 256, parallel_threshold: int = 512):
+        """
+        Initialize a verifier that checks chain signatures on a process pool.
+
+        Args:
+            max_workers (int): Number of worker processes, all cores if omitted.
+            chunk_size (int): Number of transactions sent to a worker at once.
+            parallel_threshold (int): Chains with fewer transactions are verified in-process.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the worker processes, e.g. when the node starts up instead of on the first long chain.
+        """
+        self._get_executor()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Chains are verified in worker threads, only one of them creates the pool
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context(START_METHOD))
+            return self.executor
+
+    def shutdown(self):
+        """
+        Shuts down the worker processes.
+        """
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def check_linkage(self, transactions: list, hash_many):
+        """
+        Checks the hashes and the previous_hash linkage of the whole chain before any signature work.
+
+        Args:
+            transactions (list): The transactions of the chain.
+            hash_many (callable): Function computing the hashes of a list of transactions in one pass.
+
+        Returns:
+            tuple: (index, reason) of the first invalid transaction, None if the chain is linked correctly.
+        """
+        hashes = hash_many(transactions[1:])
+        current_hashes = [transaction.current_hash for transaction in transactions]
+        previous_hashes = [transaction.previous_hash for transaction in transactions[1:]]
+        for i, (computed, stored, previous, parent) in enumerate(zip(hashes, current_hashes[1:], previous_hashes, current_hashes), start=1):
+            if computed != stored:
+                return i, "hash"
+            if previous != parent:
+                return i, "linkage"
+        return None
+
+    def verify_signatures(self, work: list) -> list:
+        """
+        Verifies the signatures of all work items, in chunks on the process pool for long chains.
+
+        Args:
+            work (list): Work items as accepted by verify_signature_chunk.
+
+        Returns:
+            list: (index, reason) of every transaction with an invalid signature, sorted by index.
+        """
+        if len(work) < self.parallel_threshold or self.max_workers == 1:
+            return verify_signature_chunk(work)
+        chunks = [work[i:i + self.chunk_size] for i in range(0, len(work), self.chunk_size)]
+        failures = []
+        for chunk_failures in self._get_executor().map(verify_signature_chunk, chunks):
+            failures.extend(chunk_failures)
+        return sorted(failures)
+
+    def verify(self, transactions: list, hash_many, key_registry, authority_keyring, index_offset: int = 0) -> bool:
+        """
+        Verifies a whole chain: linkage first, then all signatures in parallel.
+        The first transaction is trusted and only used as the anchor of the second one.
+
+        Args:
+            transactions (list): The transactions of the chain.
+            hash_many (callable): Function computing the hashes of a list of transactions in one pass.
+            key_registry (KeyRegistry): Registry providing the keys of senders and recipients.
+            authority_keyring (AuthorityKeyring): Keyring providing the authority keys.
+            index_offset (int): Chain index of the first transaction, used when reporting errors.
+
+        Returns:
+            bool: True if the chain is valid, False otherwise.
+        """
+        invalid = self.check_linkage(transactions, hash_many)
+        if invalid is not None:
+            logger.warning(f"Invalid {invalid[1]} at index {invalid[0] + index_offset}")
+            return False
+
+        work = []
+        for i in range(1, len(transactions)):
+            transaction = transactions[i]
+            work.append((
+                i,
+                transaction.current_hash,
+                key_registry.get_pem(transaction.sender),
+                transaction.sender_signature,
+                key_registry.get_pem(transaction.recipient),
+                transaction.recipient_signature,
+                authority_keyring.candidate_pems(transaction.authority),
+                transaction.authority_signature,
+            ))
+
+        for index, reason in self.verify_signatures(work):
+            transaction = transactions[index]
+            # An authority key may have changed since it was loaded, retry once with a refreshed keyring
+            if reason == "authority" and authority_keyring.verify(transaction.authority_signature, transaction.current_hash, transaction.authority):
+                continue
+            logger.warning(f"Invalid {reason} signature at index {index + index_offset}")
+            return False
+        return True
@@ -0,0 +1,166 @@
+from array import array
+from models import Transaction
+
+HASH_SIZE = 32
+SIGNATURE_SIZE = 256
+
+
+class HexColumn:
+    __slots__ = ("width", "data", "exceptions")
+
+    def __init__(self, width: int):
+        """
+        Column of fixed-width hex strings stored as raw bytes.
+        Values that are not hex strings of the column width are kept as they are.
+
+        Args:
+            width (int): The width of a value in bytes.
+        """
+        self.width = width
+        self.data = bytearray()
+        self.exceptions = {}
+
+    def append(self, value):
+        if isinstance(value, str) and len(value) == 2 * self.width:
+            try:
+                raw = bytes.fromhex(value)
+                if raw.hex() == value:
+                    self.data += raw
+                    return
+            except ValueError:
+                pass
+        self.exceptions[len(self.data) // self.width] = value
+        self.data += bytes(self.width)
+
+    def __getitem__(self, index: int):
+        if index in self.exceptions:
+            return self.exceptions[index]
+        return self.data[index * self.width:(index + 1) * self.width].hex()
+
+
+class StringColumn:
+    __slots__ = ("data", "offsets", "nulls")
+
+    def __init__(self):
+        """
+        Column of optional strings stored back to back in one buffer.
+        """
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+        self.nulls = set()
+
+    def append(self, value):
+        if value is None:
+            self.nulls.add(len(self.offsets) - 1)
+        else:
+            self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, index: int):
+        if index in self.nulls:
+            return None
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+
+class CompactTransactions:
+    def __init__(self, transactions=()):
+        """
+        Columnar, list-like store of transactions.
+        Names are interned, hashes and signatures are kept as raw bytes and amounts in a numeric array.
+
+        Args:
+            transactions (iterable): Transactions to add initially.
+        """
+        self.names = []
+        self.name_ids = {}
+        self.indexes = array("q")
+        self.senders = array("I")
+        self.recipients = array("I")
+        self.authorities = array("i")
+        self.amounts = array("d")
+        self.expirations = StringColumn()
+        self.timestamps = StringColumn()
+        self.current_hashes = HexColumn(HASH_SIZE)
+        self.sender_signatures = HexColumn(SIGNATURE_SIZE)
+        self.recipient_signatures = HexColumn(SIGNATURE_SIZE)
+        self.authority_signatures = HexColumn(SIGNATURE_SIZE)
+        # The previous hash is only stored when it differs from the current hash of the previous entry
+        self.previous_hashes = {}
+        self.tip = None
+        for transaction in transactions:
+            self.append(transaction)
+
+    def _intern(self, name: str) -> int:
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self.name_ids[name] = name_id
+        return name_id
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+    def append(self, transaction: Transaction):
+        position = len(self.indexes)
+        if position == 0 or transaction.previous_hash != self.current_hashes[position - 1]:
+            self.previous_hashes[position] = transaction.previous_hash
+        self.indexes.append(transaction.index)
+        self.senders.append(self._intern(transaction.sender))
+        self.recipients.append(self._intern(transaction.recipient))
+        self.authorities.append(-1 if transaction.authority is None else self._intern(transaction.authority))
+        self.amounts.append(transaction.amount)
+        self.expirations.append(transaction.expiration)
+        self.timestamps.append(transaction.timestamp)
+        self.current_hashes.append(transaction.current_hash)
+        self.sender_signatures.append(transaction.sender_signature)
+        self.recipient_signatures.append(transaction.recipient_signature)
+        self.authority_signatures.append(transaction.authority_signature)
+        self.tip = transaction
+
+    def _materialize(self, position: int) -> Transaction:
+        if position in self.previous_hashes:
+            previous_hash = self.previous_hashes[position]
+        else:
+            previous_hash = self.current_hashes[position - 1]
+        authority = self.authorities[position]
+        return Transaction(
+            index=self.indexes[position],
+            sender=self.names[self.senders[position]],
+            recipient=self.names[self.recipients[position]],
+            amount=self.amounts[position],
+            expiration=self.expirations[position],
+            previous_hash=previous_hash,
+            current_hash=self.current_hashes[position],
+            sender_signature=self.sender_signatures[position],
+            recipient_signature=self.recipient_signatures[position],
+            timestamp=self.timestamps[position],
+            authority_signature=self.authority_signatures[position],
+            authority=None if authority < 0 else self.names[authority],
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._materialize(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("chain index out of range")
+        if index == len(self) - 1:
+            return self.tip
+        return self._materialize(index)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self._materialize(position)
+
+
+class CompactChain:
+    def __init__(self, transactions=()):
+        """
+        Compact in-memory chain with the interface of TransactionChain used by Transchain and main.py.
+        """
+        self.transactions = CompactTransactions(transactions)
+
+    def model_dump(self) -> dict:
+        return {"transactions": [transaction.model_dump() for transaction in self.transactions]}
@@ -0,0 +1,129 @@
+import logging
+from fastapi.concurrency import run_in_threadpool
+from models import Transaction
+from peer_client import peer_client
+from wire_format import PEER_HEADERS, is_binary, load_chain
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500
+
+
+async def fetch_status(peer: str) -> dict:
+    """
+    Fetches the chain height and tip hash advertised by a peer.
+
+    Args:
+        peer (str): The name of the peer node.
+
+    Returns:
+        dict: The height and tip hash of the peer's chain.
+    """
+    response = await peer_client.get(peer, "/chain/status")
+    response.raise_for_status()
+    return response.json()
+
+
+async def fetch_hash(peer: str, index: int) -> str:
+    """
+    Fetches the hash of the transaction at a chain index of a peer.
+
+    Args:
+        peer (str): The name of the peer node.
+        index (int): The chain index.
+
+    Returns:
+        str: The current hash of the transaction at that index.
+    """
+    response = await peer_client.get(peer, f"/chain/hash/{index}")
+    response.raise_for_status()
+    return response.json()["hash"]
+
+
+async def fetch_range(peer: str, from_index: int, limit: int) -> list:
+    """
+    Fetches a page of transactions from a peer.
+
+    Args:
+        peer (str): The name of the peer node.
+        from_index (int): Chain index of the first transaction.
+        limit (int): Maximum number of transactions.
+
+    Returns:
+        list: The transactions of the page.
+    """
+    response = await peer_client.get(peer, "/chain/range", params={"from_index": from_index, "limit": limit},
+                                     headers={"accept": PEER_HEADERS["accept"]})
+    response.raise_for_status()
+    if is_binary(response.headers.get("content-type")):
+        return load_chain(response.content, response.headers["content-type"])
+    return [Transaction(**transaction) for transaction in response.json()["transactions"]]
+
+
+async def find_common_height(local_hash_at, remote_hash_at, local_height: int, remote_height: int) -> int:
+    """
+    Finds the length of the longest common prefix of two chains with a binary search over hash checkpoints.
+    Because every transaction commits to the hash of its predecessor, equal hashes at an index imply
+    equal chains up to that index.
+
+    Args:
+        local_hash_at (callable): Returns the local hash at a chain index.
+        remote_hash_at (callable): Coroutine function returning the remote hash at a chain index.
+        local_height (int): Length of the local chain.
+        remote_height (int): Length of the remote chain.
+
+    Returns:
+        int: The number of leading transactions both chains share.
+    """
+    low, high = 0, min(local_height, remote_height)
+    # Invariant: the first `low` transactions match, the first `high + 1` do not
+    while low < high:
+        middle = (low + high + 1) // 2
+        if local_hash_at(middle - 1) == await remote_hash_at(middle - 1):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+async def synchronize_from_peer(transchain, peer: str, status: dict = None, page_size: int = PAGE_SIZE) -> str:
+    """
+    Catches up with a peer by downloading only the transactions after the common prefix.
+
+    Args:
+        transchain (Transchain): The local chain.
+        peer (str): The name of the peer node.
+        status (dict): The height and tip hash advertised by the peer, fetched if omitted.
+        page_size (int): Number of transactions requested per page.
+
+    Returns:
+        str: The result of the synchronization.
+    """
+    if status is None:
+        status = await fetch_status(peer)
+    transactions = transchain.transaction_chain.transactions
+    local_height = len(transactions)
+    remote_height = status["height"]
+    if remote_height <= local_height:
+        return "nothing to synchronize"
+
+    # Fast path: the peer's chain extends the local tip
+    if await fetch_hash(peer, local_height - 1) == transactions[-1].current_hash:
+        common_height = local_height
+    else:
+        common_height = await find_common_height(
+            lambda index: transactions[index].current_hash,
+            lambda index: fetch_hash(peer, index),
+            local_height,
+            remote_height,
+        )
+
+    missing = []
+    while common_height + len(missing) < remote_height:
+        page = await fetch_range(peer, common_height + len(missing), page_size)
+        if not page:
+            break
+        missing.extend(page)
+    logger.info(f"Synchronizing {len(missing)} transactions from {peer} after index {common_height}")
+    # Verification is CPU bound, keep it off the event loop
+    return await run_in_threadpool(transchain.synchronize_suffix, common_height, missing)
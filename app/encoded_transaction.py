@@ -0,0 +1,66 @@
+import hashlib
+from models import Transaction
+from wire_format import JSON, dump_transaction, load_transaction
+
+
+class EncodedTransaction:
+    __slots__ = ("_transaction", "_data", "_bodies", "_cache_key")
+
+    def __init__(self, transaction: Transaction = None, data: dict = None, bodies: dict = None):
+        """
+        Transaction that carries its dict and encoded representations along, so every representation
+        is produced at most once no matter how often the transaction is checked, cached and forwarded.
+        Use from_body instead of calling this directly.
+        """
+        self._transaction = transaction
+        self._data = data
+        self._bodies = bodies or {}
+        self._cache_key = None
+
+    @classmethod
+    def from_body(cls, body: bytes, media_type: str = JSON) -> "EncodedTransaction":
+        """
+        Parses and validates a received request body. The body is kept as it is for forwarding.
+
+        Raises:
+            pydantic.ValidationError: If the body is not a valid transaction.
+        """
+        transaction = load_transaction(body, media_type)
+        return cls(transaction=transaction, bodies={media_type.split(";", 1)[0].strip(): body})
+
+    @property
+    def transaction(self) -> Transaction:
+        if self._transaction is None:
+            self._transaction = Transaction(**self._data)
+        return self._transaction
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = self._transaction.model_dump()
+        return self._data
+
+    def encode(self, media_type: str = JSON) -> bytes:
+        """
+        Returns the transaction encoded in a wire format, reusing the received body if it has that format.
+        """
+        body = self._bodies.get(media_type)
+        if body is None:
+            body = self._bodies[media_type] = dump_transaction(self.data, media_type)
+        return body
+
+    @property
+    def current_hash(self) -> str:
+        return self._transaction.current_hash if self._transaction is not None else self._data.get("current_hash")
+
+    @property
+    def cache_key(self) -> tuple:
+        """
+        The key of the transaction in an LRUCache of processed transactions.
+        """
+        if self._cache_key is None:
+            transaction = self._transaction
+            authority_signature = transaction.authority_signature if transaction is not None else self._data.get("authority_signature")
+            signature_digest = hashlib.sha256(authority_signature.encode("utf-8")).digest() if authority_signature else None
+            self._cache_key = (self.current_hash, signature_digest)
+        return self._cache_key
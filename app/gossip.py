@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import random
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class Commit:
+    __slots__ = ("transactions", "body", "path")
+
+    def __init__(self, transactions: list, body: bytes = None, path: str = None):
+        """
+        Committed transactions queued for peers. The same commit is queued for every chosen peer,
+        so its body is encoded at most once and every peer is sent the same bytes.
+
+        Args:
+            transactions (list): The committed transactions, in chain order.
+            body (bytes): The encoded transactions, encoded on the first send if omitted.
+            path (str): The endpoint the body is sent to, the default endpoint of the sender if omitted.
+        """
+        self.transactions = transactions
+        self.body = body
+        self.path = path
+
+
+class PeerQueue:
+    def __init__(self, name: str, max_size: int):
+        """
+        Commits waiting to be sent to one peer, drained by its own worker task.
+
+        Args:
+            name (str): The name of the peer.
+            max_size (int): Number of queued commits after which the oldest commit is dropped.
+        """
+        self.name = name
+        self.queue = asyncio.Queue(max_size)
+        self.task = None
+        self.sent = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def put(self, commit: Commit) -> bool:
+        """
+        Queues a commit without waiting. A full queue drops its oldest commit,
+        the peer then catches up with the chain once it receives the next one.
+
+        Returns:
+            bool: False if an older commit was dropped to make room.
+        """
+        dropped = False
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            dropped = True
+        self.queue.put_nowait(commit)
+        return not dropped
+
+    def take(self, first: Commit, max_batch: int) -> Commit:
+        """
+        Returns the given commit merged with the commits queued behind it,
+        up to max_batch transactions, in chain order. A commit that is sent on its own keeps its body.
+        """
+        if self.queue.empty() or len(first.transactions) >= max_batch:
+            return first
+        transactions = list(first.transactions)
+        while not self.queue.empty() and len(transactions) < max_batch:
+            transactions.extend(self.queue.get_nowait().transactions)
+        return Commit(transactions)
+
+
+class Gossip:
+    def __init__(self, send, fanout: int = 4, queue_size: int = 256, max_batch: int = 64,
+                 max_failures: int = 3, seen_size: int = 10000, pull=None, pull_interval: float = 5.0, encode=None):
+        """
+        Propagates committed transactions to the peers of a node. Every commit is queued for at most
+        fanout randomly chosen peers, which forward it the same way, so the work of a node does not
+        grow with the number of followers. The caller never waits for a peer.
+        A node can miss a commit that none of its peers chose to forward, so every pull_interval
+        the node also asks one random peer for commits it is missing.
+
+        Args:
+            send (callable): Coroutine function sending a Commit to a peer, raises on failure.
+            fanout (int): Number of peers every commit is forwarded to.
+            queue_size (int): Commits queued per peer before the oldest one is dropped.
+            max_batch (int): Maximum number of transactions sent to a peer in one message.
+            max_failures (int): Consecutive failed sends after which a peer is removed.
+            seen_size (int): Number of commit hashes remembered to suppress duplicates.
+            pull (callable): Coroutine function catching up with a peer, no periodic pull if omitted.
+            pull_interval (float): Seconds between two pulls.
+            encode (callable): Function encoding a list of transactions into the body of a Commit, no bodies if omitted.
+        """
+        self.send = send
+        self.fanout = fanout
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.max_failures = max_failures
+        self.seen_size = seen_size
+        self.pull = pull
+        self.pull_interval = pull_interval
+        self.encode = encode
+        self.pull_task = None
+        self.peers = {}
+        self.seen = OrderedDict()
+        self.published = 0
+        self.duplicates = 0
+        self.removed = 0
+        # Counted here and not per peer, so removing a peer does not lower the count
+        self.dropped_total = 0
+
+    def start(self):
+        """
+        Starts the periodic pull, needs a running event loop.
+        """
+        if self.pull is not None and self.pull_task is None:
+            self.pull_task = asyncio.create_task(self._pull_periodically())
+
+    async def _pull_periodically(self):
+        while True:
+            await asyncio.sleep(self.pull_interval)
+            for name in self.sample(1):
+                try:
+                    await self.pull(name)
+                except Exception as e:
+                    logger.warning(f"Error pulling commits from {name}: {e!r}")
+
+    @property
+    def peer_names(self) -> list:
+        return list(self.peers)
+
+    def add_peer(self, name: str) -> bool:
+        """
+        Adds a peer and starts its worker.
+
+        Returns:
+            bool: False if the node already was a peer.
+        """
+        if name in self.peers:
+            return False
+        peer = PeerQueue(name, self.queue_size)
+        peer.task = asyncio.create_task(self._run(peer))
+        self.peers[name] = peer
+        return True
+
+    def remove_peer(self, name: str) -> bool:
+        peer = self.peers.pop(name, None)
+        if peer is None:
+            return False
+        peer.task.cancel()
+        return True
+
+    def sample(self, count: int, exclude: str = None) -> list:
+        """
+        Returns up to count randomly chosen peers.
+        """
+        names = [name for name in self.peers if name != exclude]
+        return names if len(names) <= count else random.sample(names, count)
+
+    def _remember(self, key: str) -> bool:
+        """
+        Marks a commit as seen.
+
+        Returns:
+            bool: False if the commit was seen before.
+        """
+        if key in self.seen:
+            self.seen.move_to_end(key)
+            return False
+        self.seen[key] = None
+        if len(self.seen) > self.seen_size:
+            self.seen.popitem(last=False)
+        return True
+
+    def publish(self, transactions: list, body: bytes = None, path: str = None) -> int:
+        """
+        Queues committed transactions for a random subset of the peers.
+        A commit is identified by the hash of its last transaction and published only once.
+
+        Args:
+            transactions (list): The committed transactions, in chain order.
+            body (bytes): The transactions as they were received, forwarded as they are if given.
+            path (str): The endpoint the body is sent to.
+
+        Returns:
+            int: The number of peers the commit was queued for.
+        """
+        if not transactions:
+            return 0
+        if not self._remember(transactions[-1].current_hash):
+            self.duplicates += 1
+            return 0
+        self.published += 1
+        targets = self.sample(self.fanout)
+        commit = Commit(transactions, body, path)
+        for name in targets:
+            if not self.peers[name].put(commit):
+                self.dropped_total += 1
+        return len(targets)
+
+    async def _run(self, peer: PeerQueue):
+        while True:
+            commit = peer.take(await peer.queue.get(), self.max_batch)
+            if commit.body is None and self.encode is not None:
+                # Stored on the commit, the other peers it is queued for reuse the body
+                commit.body = self.encode(commit.transactions)
+            try:
+                await self.send(peer.name, commit)
+                peer.sent += 1
+                peer.failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                peer.failures += 1
+                logger.warning(f"Error forwarding {len(commit.transactions)} transactions to {peer.name}: {e!r}")
+                # A peer is only dropped after repeated failures, not after a single slow response
+                if peer.failures >= self.max_failures and self.peers.get(peer.name) is peer:
+                    logger.warning(f"Removing {peer.name} after {peer.failures} failed forwards")
+                    del self.peers[peer.name]
+                    self.removed += 1
+                    return
+
+    def queued(self) -> int:
+        return sum(peer.queue.qsize() for peer in self.peers.values())
+
+    def dropped(self) -> int:
+        return self.dropped_total
+
+    def stats(self) -> dict:
+        return {
+            "peers": len(self.peers),
+            "fanout": self.fanout,
+            "published": self.published,
+            "duplicates": self.duplicates,
+            "queued": self.queued(),
+            "dropped": self.dropped(),
+            "sent": sum(peer.sent for peer in self.peers.values()),
+            "removed": self.removed,
+        }
+
+    async def close(self):
+        tasks = [peer.task for peer in self.peers.values()]
+        if self.pull_task is not None:
+            tasks.append(self.pull_task)
+            self.pull_task = None
+        self.peers = {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
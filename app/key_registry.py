@@ -0,0 +1,372 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+from rsa_utils import verify_signature
+from peer_client import peer_client
+
+logger = logging.getLogger(__name__)
+
+
+class KeyRegistry:
+    def __init__(self, ttl_seconds: float = 300.0, pin_keys: bool = True, max_workers: int = 8):
+        """
+        Initialize an in-process registry of node public keys.
+
+        Args:
+            ttl_seconds (float): Seconds after which a cached key is fetched again.
+            pin_keys (bool): Reject a key that differs from the first key seen for a node.
+            max_workers (int): Number of parallel fetches used by prefetch.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.pin_keys = pin_keys
+        self.max_workers = max_workers
+        self.entries = {}
+        self.pinned = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.pin_violations = 0
+        self.lock = threading.Lock()
+
+    def fetch_public_key(self, node: str) -> str:
+        """
+        Fetches the PEM public key of a node over HTTP.
+
+        Args:
+            node (str): The node from which to fetch the public key.
+
+        Returns:
+            str: The public key in PEM format.
+        """
+        response = peer_client.get_sync(node, "/public_key")
+        response.raise_for_status()
+        return response.json()['public_key']
+
+    async def fetch_public_key_async(self, node: str) -> str:
+        """
+        Fetches the PEM public key of a node without blocking the event loop.
+
+        Args:
+            node (str): The node from which to fetch the public key.
+
+        Returns:
+            str: The public key in PEM format.
+        """
+        response = await peer_client.get(node, "/public_key")
+        response.raise_for_status()
+        return response.json()['public_key']
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return time.monotonic() - entry["fetched_at"] < self.ttl_seconds
+
+    def _store(self, node: str, public_key_pem: str) -> dict:
+        with self.lock:
+            pinned_pem = self.pinned.get(node)
+            if self.pin_keys and pinned_pem is not None and pinned_pem != public_key_pem:
+                # Keep serving the pinned key, a changed key has to be unpinned explicitly
+                self.pin_violations += 1
+                logger.warning(f"Public key of {node} changed, keeping pinned key")
+                entry = self.entries[node]
+                entry["fetched_at"] = time.monotonic()
+                return entry
+            entry = self.entries.get(node)
+            if entry is None or entry["pem"] != public_key_pem:
+                entry = {"pem": public_key_pem, "key": load_pem_public_key(public_key_pem.encode("utf-8"))}
+                self.entries[node] = entry
+            entry["fetched_at"] = time.monotonic()
+            self.pinned.setdefault(node, public_key_pem)
+            return entry
+
+    def register(self, node: str, public_key_pem: str):
+        """
+        Stores a key that is already known, for example the key of this node.
+
+        Args:
+            node (str): The node the key belongs to.
+            public_key_pem (str): The public key in PEM format.
+        """
+        self._store(node, public_key_pem)
+
+    def get_entry(self, node: str, force_refresh: bool = False, fetch: bool = True):
+        """
+        Returns the cached key entry of a node, fetching it if missing or expired.
+        A stale entry is kept if the refresh fails.
+
+        Args:
+            node (str): The node whose key is requested.
+            force_refresh (bool): Fetch the key again even if the cached entry is fresh.
+            fetch (bool): Fetch a missing or expired key over the network. Without fetching,
+                the cached entry is returned even if it expired, so the event loop never blocks;
+                keys are fetched there with prefetch_async beforehand.
+
+        Returns:
+            dict: The entry with the PEM string and the parsed key, None if unavailable.
+        """
+        entry = self.entries.get(node)
+        # Called from worker threads, the counters are only updated under the lock
+        if entry is not None and not force_refresh and (not fetch or self._is_fresh(entry)):
+            with self.lock:
+                self.hits += 1
+            return entry
+        if not fetch:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.misses += 1
+            if entry is not None:
+                self.refreshes += 1
+        try:
+            return self._store(node, self.fetch_public_key(node))
+        except Exception as e:
+            logger.warning(f"Error fetching public key from {node}: {e}")
+            return entry
+
+    def get_pem(self, node: str) -> str:
+        """
+        Returns the PEM public key of a node.
+
+        Args:
+            node (str): The node whose key is requested.
+
+        Returns:
+            str: The public key in PEM format, empty if unavailable.
+        """
+        entry = self.get_entry(node)
+        return entry["pem"] if entry else ""
+
+    def get_key(self, node: str, fetch: bool = True):
+        """
+        Returns the parsed public key object of a node.
+
+        Args:
+            node (str): The node whose key is requested.
+            fetch (bool): Fetch a missing or expired key over the network, see get_entry.
+
+        Returns:
+            PublicKey: The loaded public key, None if unavailable.
+        """
+        entry = self.get_entry(node, fetch=fetch)
+        return entry["key"] if entry else None
+
+    def prefetch(self, nodes):
+        """
+        Fetches the keys of all given nodes in parallel, skipping fresh entries.
+
+        Args:
+            nodes (iterable): The nodes whose keys should be cached.
+        """
+        missing = [node for node in set(nodes)
+                   if node not in self.entries or not self._is_fresh(self.entries[node])]
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+            list(executor.map(self.get_entry, missing))
+
+    async def prefetch_async(self, nodes):
+        """
+        Fetches the keys of all given nodes concurrently on the event loop, skipping fresh entries.
+        Afterwards get_key can be called without network access.
+
+        Args:
+            nodes (iterable): The nodes whose keys should be cached.
+        """
+        missing = [node for node in set(nodes)
+                   if node not in self.entries or not self._is_fresh(self.entries[node])]
+        if not missing:
+            return
+        with self.lock:
+            self.misses += len(missing)
+        results = await asyncio.gather(*(self.fetch_public_key_async(node) for node in missing), return_exceptions=True)
+        for node, result in zip(missing, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error fetching public key from {node}: {result}")
+            else:
+                self._store(node, result)
+
+    def prefetch_chain(self, transaction_chain):
+        """
+        Fetches the keys of every distinct sender and recipient of a chain.
+
+        Args:
+            transaction_chain (TransactionChain): The chain whose parties should be cached.
+        """
+        parties = set()
+        for transaction in transaction_chain.transactions[1:]:
+            parties.add(transaction.sender)
+            parties.add(transaction.recipient)
+        self.prefetch(parties)
+
+    def unpin(self, node: str):
+        """
+        Forgets the pinned key of a node so the next fetch is accepted.
+
+        Args:
+            node (str): The node to unpin.
+        """
+        with self.lock:
+            self.pinned.pop(node, None)
+            self.entries.pop(node, None)
+
+    def stats(self) -> dict:
+        """
+        Returns the hit and miss counters of the registry.
+        """
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "pin_violations": self.pin_violations,
+        }
+
+
+class AuthorityKeyring:
+    def __init__(self, authority_nodes, refresh_interval: float = 5.0):
+        """
+        Initialize a keyring holding one parsed public key per authority node.
+
+        Args:
+            authority_nodes (list): The names of the authority nodes.
+            refresh_interval (float): Minimum seconds between two refreshes of the same authority.
+        """
+        self.authority_nodes = list(dict.fromkeys(authority_nodes))
+        self.refresh_interval = refresh_interval
+        self.keys = {}
+        self.pems = {}
+        self.last_refresh = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def set_authorities(self, authority_nodes):
+        """
+        Replaces the authority set after a membership change.
+        Keys of removed authorities are dropped, keys of new authorities are fetched on first use.
+
+        Args:
+            authority_nodes (list): The names of the authority nodes.
+        """
+        with self.lock:
+            self.authority_nodes = list(dict.fromkeys(authority_nodes))
+            for authority in list(self.keys):
+                if authority not in self.authority_nodes:
+                    self.keys.pop(authority, None)
+                    self.pems.pop(authority, None)
+                    self.last_refresh.pop(authority, None)
+            if any(authority not in self.pems for authority in self.authority_nodes):
+                self.loaded = False
+
+    def fetch_public_key(self, authority: str):
+        """
+        Fetches the public key of an authority node.
+
+        Args:
+            authority (str): The name of the authority node.
+
+        Returns:
+            str: The public key in PEM format, None if the node could not be reached.
+        """
+        try:
+            logger.info(f"Fetching public key from {authority}")
+            response = peer_client.get_sync(authority, "/public_key")
+            response.raise_for_status()
+            return response.json()["public_key"]
+        except Exception as e:
+            logger.warning(f"Error fetching public key from {authority}: {e}")
+            return None
+
+    def refresh(self, authorities=None):
+        """
+        Fetches the keys of the given authorities in parallel and replaces the stored keys.
+
+        Args:
+            authorities (iterable): The authorities to refresh, all authorities if omitted.
+        """
+        now = time.monotonic()
+        if authorities is None:
+            authorities = list(self.authority_nodes)
+        else:
+            authorities = [authority for authority in set(authorities)
+                           if authority in self.authority_nodes
+                           and now - self.last_refresh.get(authority, float("-inf")) >= self.refresh_interval]
+        if not authorities:
+            return
+        with ThreadPoolExecutor(max_workers=len(authorities)) as executor:
+            fetched = dict(zip(authorities, executor.map(self.fetch_public_key, authorities)))
+        with self.lock:
+            for authority, public_key_pem in fetched.items():
+                self.last_refresh[authority] = now
+                if public_key_pem is not None and public_key_pem != self.pems.get(authority):
+                    self.keys[authority] = load_pem_public_key(public_key_pem.encode("utf-8"))
+                    self.pems[authority] = public_key_pem
+            self.loaded = True
+
+    def register(self, authority: str, public_key_pem: str):
+        """
+        Stores the key of an authority that is already known.
+
+        Args:
+            authority (str): The name of the authority node.
+            public_key_pem (str): The public key in PEM format.
+        """
+        with self.lock:
+            self.keys[authority] = load_pem_public_key(public_key_pem.encode("utf-8"))
+            self.pems[authority] = public_key_pem
+            self.last_refresh[authority] = time.monotonic()
+
+    def ensure_loaded(self):
+        """
+        Loads the keys of all authorities once.
+        """
+        if not self.loaded:
+            self.refresh()
+
+    def candidate_pems(self, authority: str = None) -> list:
+        """
+        Returns the PEM keys a signature of the given authority has to be checked against.
+
+        Args:
+            authority (str): The name of the signing authority, if known.
+
+        Returns:
+            list: The PEM key of the authority, or every authority key if it is unknown.
+        """
+        self.ensure_loaded()
+        if authority in self.authority_nodes:
+            return [self.pems[authority]] if authority in self.pems else []
+        return list(self.pems.values())
+
+    def _verify_with(self, authorities, signature_hex: str, data_hash: str) -> bool:
+        for authority in authorities:
+            public_key = self.keys.get(authority)
+            if public_key is not None and verify_signature(public_key, signature_hex, data_hash):
+                return True
+        return False
+
+    def verify(self, signature_hex: str, data_hash: str, authority: str = None) -> bool:
+        """
+        Verifies an authority signature against the key of the signing authority.
+        Transactions without a known signing authority are checked against every key.
+        The keys are refreshed once if the signature does not match, which fetches over the
+        network, so it is only called from worker threads, never on the event loop.
+
+        Args:
+            signature_hex (str): The authority signature in hexadecimal format.
+            data_hash (str): The hash the signature was created for.
+            authority (str): The name of the signing authority, if known.
+
+        Returns:
+            bool: True if the signature was created by an authority, False otherwise.
+        """
+        if not signature_hex:
+            return False
+        self.ensure_loaded()
+        candidates = [authority] if authority in self.authority_nodes else list(self.authority_nodes)
+        if self._verify_with(candidates, signature_hex, data_hash):
+            return True
+        self.refresh(candidates)
+        return self._verify_with(candidates, signature_hex, data_hash)
@@ -0,0 +1,70 @@
+import math
+import time
+from collections import defaultdict, deque
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 1024):
+        """
+        Keeps the most recent latency samples per phase and node.
+
+        Args:
+            window (int): Number of samples kept per phase and node.
+        """
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.counts = defaultdict(int)
+
+    def record(self, phase: str, node: str, seconds: float):
+        """
+        Records the duration of one call.
+
+        Args:
+            phase (str): The phase of the call, e.g. "prepare" or "commit".
+            node (str): The node that was called.
+            seconds (float): The duration of the call.
+        """
+        self.samples[(phase, node)].append(seconds)
+        self.counts[(phase, node)] += 1
+
+    def timer(self, phase: str, node: str):
+        """
+        Returns a context manager recording the duration of its block.
+        """
+        return _Timer(self, phase, node)
+
+    @staticmethod
+    def percentile(samples: list, quantile: float) -> float:
+        ordered = sorted(samples)
+        position = max(0, math.ceil(quantile * len(ordered)) - 1)
+        return ordered[position]
+
+    def summary(self) -> dict:
+        """
+        Returns p50 and p99 in milliseconds per phase and node.
+        """
+        result = defaultdict(dict)
+        for (phase, node), samples in self.samples.items():
+            if not samples:
+                continue
+            result[phase][node] = {
+                "count": self.counts[(phase, node)],
+                "p50_ms": round(self.percentile(samples, 0.50) * 1000, 3),
+                "p99_ms": round(self.percentile(samples, 0.99) * 1000, 3),
+            }
+        return dict(result)
+
+
+class _Timer:
+    def __init__(self, tracker: LatencyTracker, phase: str, node: str):
+        self.tracker = tracker
+        self.phase = phase
+        self.node = node
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracker.record(self.phase, self.node, time.perf_counter() - self.start)
+        return False
@@ -1,23 +1,74 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+
 class LRUCache:
-    def __init__(self, max_size):
+    def __init__(self, max_size, ttl=None):
+        """
+        Initialize a least recently used cache of processed transactions.
+        Entries are keyed on the transaction hash and a digest of the authority signature.
+
+        Args:
+            max_size (int): Maximum number of entries before the oldest entry is evicted.
+            ttl (float): Optional number of seconds after which an entry expires.
+        """
         self.max_size = max_size
-        self.cache = []
+        self.ttl = ttl
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(dictionary):
+        # An EncodedTransaction computes its key once
+        cache_key = getattr(dictionary, "cache_key", None)
+        if cache_key is not None:
+            return cache_key
+        authority_signature = dictionary.get("authority_signature")
+        signature_digest = hashlib.sha256(authority_signature.encode("utf-8")).digest() if authority_signature else None
+        return dictionary.get("current_hash"), signature_digest
+
+    def _expired(self, added_at):
+        return self.ttl is not None and time.monotonic() - added_at > self.ttl
 
     def add(self, dictionary):
-        # Check if the dictionary is already in the cache
-        if dictionary in self.cache:
-            # Move the existing dictionary to the end of the list
-            self.cache.remove(dictionary)
-            self.cache.append(dictionary)
-        else:
-            # If the cache is full, remove the oldest (least recently used) dictionary
-            if len(self.cache) >= self.max_size:
-                self.cache.pop(0)
-            # Add the new dictionary to the end of the list
-            self.cache.append(dictionary)
+        key = self.key_for(dictionary)
+        # Move an existing entry to the end, it is now the most recently used
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        # If the cache is full, remove the oldest (least recently used) entry
+        elif len(self.cache) >= self.max_size:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+        self.cache[key] = time.monotonic()
 
     def exists(self, dictionary):
-        return dictionary in self.cache
+        key = self.key_for(dictionary)
+        added_at = self.cache.get(key)
+        if added_at is not None and self._expired(added_at):
+            del self.cache[key]
+            added_at = None
+        if added_at is None:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.cache),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self.cache)
 
     def __str__(self):
-        return str(self.cache)
\ No newline at end of file
+        return str(self.stats())
@@ -1,56 +1,317 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import Optional
 from datetime import datetime, timedelta
-import requests
+import logging
 import os
-from models import Transaction, SendTransactionRequest, AcceptTransactionRequest, PrepareTransaction, ContainerName, TransactionChain, SendMoney
+from models import Transaction, SendTransactionRequest, AcceptTransactionRequest, PrepareTransaction, ContainerName, TransactionChain, SendMoney, ChainStatus, PeerList
 from transchain import Transchain
-from rsa_utils import generate_rsa_keys, sign_data, load_public_key, load_private_key
+from rsa_utils import ensure_rsa_keys, load_public_key, Signer
 import random
 import asyncio
 from lru_cache import LRUCache
+from chain_store import ChainStore
+from delta_sync import synchronize_from_peer
+from peer_client import peer_client
+from latency_stats import LatencyTracker
+from batcher import TransactionBatcher
+from gossip import Commit, Gossip
+from tip_lock import TipLock
+from mempool import Mempool
+from encoded_transaction import EncodedTransaction
+from chain_feed import format_event
+from topology import topology
+from metrics import CONTENT_TYPE, REGISTRY, Counter, Gauge
+from wire_format import BINARY, JSON_HEADERS, PEER_HEADERS, PEER_MEDIA_TYPE, accepts_binary, dump_chain, dump_prepare, dump_transaction, encode_json, load_chain, load_prepare
 app = FastAPI()
  
 container_name = os.getenv("CONTAINERNAME")
-blocker_set_time = None
-heartbeat_interval = timedelta(seconds=5)
-blocker = None 
+# Log lines are key=value pairs, LOG_LEVEL selects the minimum level (DEBUG, INFO, WARNING, ERROR)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(),
+                    format=f'time=%(asctime)s level=%(levelname)s node={container_name} logger=%(name)s msg="%(message)s"')
+# httpx logs every request at INFO, peer calls are covered by the metrics instead
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger("main")
+# Lease on the chain tip, expires if the holder does not commit or release it in time
+tip_lock = TipLock(lease_duration=float(os.getenv("TIP_LEASE_SECONDS", "5")))
+# Seconds a local proposer waits in line for the tip before the client has to try again
+TIP_LOCK_WAIT = float(os.getenv("TIP_LOCK_WAIT", "2"))
+# Deposits of this authority are built one at a time
+deposit_lock = asyncio.Lock()
+# Commit answers that count towards the quorum, gossip from another authority can deliver a commit first.
+# An authority only answers already processed if its chain holds the commit with the same hash
+COMMIT_ACCEPTED = ("transaction added", "transaction was already processed")
+# Times a deposit is built again when the chain tip moved while it was signed
+DEPOSIT_ATTEMPTS = max(1, int(os.getenv("DEPOSIT_ATTEMPTS", "3")))
 list_of_blockers = []
-AUTHORITY_NODES = ["http://fastapi_app_2:8000/", "http://fastapi_app_3:8000/", "http://fastapi_app_4:8000/"]
-transaction_requests = TransactionChain(transactions=[])
+# Seconds between two checks of the topology file for membership changes
+TOPOLOGY_RELOAD_SECONDS = float(os.getenv("TOPOLOGY_RELOAD_SECONDS", "5"))
+transaction_requests = Mempool(max_size=int(os.getenv("MEMPOOL_SIZE", "10000")))
 transaction_cache = LRUCache(100)
-connected_nodes = [] 
+consensus_latency = LatencyTracker()
+background_tasks = set()
+catch_up_task = None
+
+# Initialize transaction chain, persisted to disk if a data directory is configured
+CHAIN_DATA_DIR = os.getenv("CHAIN_DATA_DIR")
+# A persisted node keeps its key pair next to its chain, peers pin the key it had when they first saw it
+KEY_DIR = CHAIN_DATA_DIR or "."
+os.makedirs(KEY_DIR, exist_ok=True)
+PRIVATE_KEY_FILE = os.path.join(KEY_DIR, "private_key.pem")
+PUBLIC_KEY_FILE = os.path.join(KEY_DIR, "public_key.pem")
+
+ensure_rsa_keys(PRIVATE_KEY_FILE, PUBLIC_KEY_FILE)
+signer = Signer(PRIVATE_KEY_FILE)
+PUBLIC_KEY = load_public_key(PUBLIC_KEY_FILE)
+
+chain_store = ChainStore(CHAIN_DATA_DIR) if CHAIN_DATA_DIR else None
+transchain = Transchain(topology.authorities, store=chain_store, compact=os.getenv("CHAIN_BACKEND") == "compact",
+                        merkle_window=int(os.getenv("MERKLE_WINDOW", "256")), feed_capacity=int(os.getenv("FEED_CAPACITY", "1024")))
+# Seconds between two keep-alive comments on an idle subscription
+FEED_KEEPALIVE_SECONDS = float(os.getenv("FEED_KEEPALIVE_SECONDS", "15"))
+# Transactions read from the chain at once by a subscriber that is behind the feed buffer
+FEED_BACKFILL_PAGE = 500
+
+# Commit up to BATCH_SIZE verified transactions per consensus round, a size of 1 disables batching
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "1"))
+BATCH_WINDOW = int(os.getenv("BATCH_WINDOW_MS", "50")) / 1000
+batcher = None
+
+# Committed transactions are forwarded to GOSSIP_FANOUT random peers, which forward them the same way
+GOSSIP_FANOUT = int(os.getenv("GOSSIP_FANOUT", "4"))
+GOSSIP_QUEUE_SIZE = int(os.getenv("GOSSIP_QUEUE_SIZE", "256"))
+GOSSIP_BATCH_SIZE = int(os.getenv("GOSSIP_BATCH_SIZE", "64"))
+# Seconds between two pulls of missed commits from a random peer
+GOSSIP_PULL_SECONDS = float(os.getenv("GOSSIP_PULL_SECONDS", "5"))
+gossip = None
+
+# Node state, read when /metrics is scraped
+Gauge("transchain_chain_length", "Number of transactions on the local chain.", function=lambda: len(transchain.transaction_chain.transactions))
+Gauge("transchain_mempool_size", "Number of pending transaction requests.", function=lambda: len(transaction_requests))
+Counter("transchain_mempool_evicted_total", "Transaction requests evicted after they expired.", function=lambda: transaction_requests.evicted)
+Counter("transchain_lru_cache_hits_total", "Lookups of processed transactions that were found in the cache.", function=lambda: transaction_cache.hits)
+Counter("transchain_lru_cache_misses_total", "Lookups of processed transactions that were not in the cache.", function=lambda: transaction_cache.misses)
+Gauge("transchain_lru_cache_hit_ratio", "Share of cache lookups that were hits.", function=lambda: transaction_cache.stats()["hit_rate"])
+Counter("transchain_tip_lock_expired_total", "Leases on the chain tip that expired before they were released.", function=lambda: tip_lock.expired)
+Gauge("transchain_batch_pending", "Verified transactions waiting for the next batch commit.", function=lambda: len(batcher.pending) if batcher is not None else 0)
+Gauge("transchain_gossip_peers", "Peers committed transactions are forwarded to.", function=lambda: len(gossip.peers) if gossip is not None else 0)
+Gauge("transchain_gossip_queued", "Commits waiting in the send queues of the peers.", function=lambda: gossip.queued() if gossip is not None else 0)
+Gauge("transchain_feed_subscribers", "Open /subscribe connections.", function=lambda: transchain.feed.subscribers)
+Counter("transchain_gossip_dropped_total", "Commits dropped from full send queues.", function=lambda: gossip.dropped() if gossip is not None else 0)
 
-PRIVATE_KEY_FILE = "private_key.pem"
-PUBLIC_KEY_FILE = "public_key.pem"
 
-generate_rsa_keys(PRIVATE_KEY_FILE, PUBLIC_KEY_FILE)
-synchronization_needed = False
-votes_cast = {}
+@app.on_event("startup")
+async def startup_event():
+    global batcher
+    global gossip
+    gossip = Gossip(forward_commits, fanout=GOSSIP_FANOUT, queue_size=GOSSIP_QUEUE_SIZE, max_batch=GOSSIP_BATCH_SIZE,
+                    pull=pull_commits, pull_interval=GOSSIP_PULL_SECONDS, encode=encode_commit)
+    gossip.start()
+    transchain.chain_verifier.start()
+    if BATCH_SIZE > 1:
+        batcher = TransactionBatcher(transchain, commit_batch, max_size=BATCH_SIZE, max_wait=BATCH_WINDOW)
+    if topology.path is not None:
+        task = asyncio.create_task(watch_topology())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+
+def apply_topology():
+    """
+    Reloads the topology file and hands a changed authority set to the chain.
 
-# Initialize transaction chain
-transchain = Transchain(AUTHORITY_NODES)
+    Returns:
+        bool: True if the membership changed.
+    """
+    if not topology.reload():
+        return False
+    transchain.set_authorities(topology.authorities)
+    return True
 
 
-@app.on_event("startup")
-async def startup_event():
-    asyncio.create_task(heartbeat_check())
+async def watch_topology():
+    """
+    Checks the topology file for membership changes every TOPOLOGY_RELOAD_SECONDS.
+    """
+    while True:
+        await asyncio.sleep(TOPOLOGY_RELOAD_SECONDS)
+        apply_topology()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await gossip.close()
+    await peer_client.close()
+    await run_in_threadpool(transchain.chain_verifier.shutdown)
 
 @app.get("/")
 def read_root():
     return {"message": "Hello from FastAPI!"}
 
 @app.get("/transactions")
-def get_transactions():
-    return transchain.transaction_chain.model_dump()
+def get_transactions(request: Request, from_index: int = 0, limit: Optional[int] = None, format: str = "json"):
+    """
+    Returns the transaction chain, or a page of it.
+
+    - **from_index**: Chain index of the first transaction to return.
+    - **limit**: Maximum number of transactions, all remaining if omitted.
+    - **format**: `json` for one document, `ndjson` to stream one transaction per line.
+
+    The ETag is derived from the tip hash, so a poll with an unchanged chain gets a 304 response.
+    """
+    transactions = transchain.transaction_chain.transactions
+    height = len(transactions)
+    start = max(0, from_index)
+    end = height if limit is None else min(height, start + max(0, limit))
+    ndjson = format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", "")
+
+    etag = f'"{transactions[-1].current_hash}-{start}-{limit}-{"ndjson" if ndjson else "json"}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if ndjson:
+        def stream_transactions():
+            for index in range(start, end):
+                yield transactions[index].model_dump_json() + "\n"
+        return StreamingResponse(stream_transactions(), media_type="application/x-ndjson", headers={"ETag": etag})
+
+    return JSONResponse(content={"transactions": [transaction.model_dump() for transaction in transactions[start:end]]}, headers={"ETag": etag})
+
+@app.get("/subscribe")
+async def subscribe(request: Request, from_index: Optional[int] = None, account: Optional[str] = None):
+    """
+    Streams committed transactions as server-sent events, one `transaction` event per transaction with its chain index as id.
+
+    - **from_index**: Chain index of the first transaction to send, only new transactions if omitted.
+      A reconnecting client continues after its `Last-Event-ID`.
+    - **account**: Only send transactions with this sender or recipient.
+
+    A `reset` event with the new height is sent when transactions the client already received were removed from the chain,
+    the stream then continues from that height.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if from_index is None and last_event_id.isdigit():
+        from_index = int(last_event_id) + 1
+    position = len(transchain.transaction_chain.transactions) if from_index is None else max(0, from_index)
+    return StreamingResponse(stream_feed(position, account), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def stream_feed(position: int, account: Optional[str]):
+    """
+    Yields the server-sent events of one subscription. The subscription only reads from the feed,
+    it never holds up an append. Transactions older than the feed buffer are read from the chain.
+    """
+    feed = transchain.feed
+    generation = feed.generation
+    feed.subscribers += 1
+    try:
+        yield f"retry: 1000\n: subscribed at {position}\n\n"
+        while True:
+            changed = feed.changed()
+            read = feed.read(position, generation)
+            generation = read.generation
+            if read.rewind is not None and read.rewind < position:
+                position = read.rewind
+                yield f"event: reset\ndata: {encode_json({'height': position}).decode()}\n\n"
+            if read.entries is None:
+                # Behind the buffer, read the next page from the chain
+                page = transchain.transaction_chain.transactions[position:min(read.first, position + FEED_BACKFILL_PAGE)]
+                events = [format_event(position + offset, transaction) for offset, transaction in enumerate(page)
+                          if account is None or account in (transaction.sender, transaction.recipient)]
+                position += len(page)
+                if events:
+                    yield "".join(events)
+                # Let other requests run between pages, and wait for a chain that is being rewritten
+                await asyncio.sleep(0 if page else 0.01)
+                continue
+            if read.entries:
+                events = [entry.event for entry in read.entries if account is None or entry.involves(account)]
+                position = read.entries[-1].index + 1
+                if events:
+                    yield "".join(events)
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), FEED_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        feed.subscribers -= 1
+
+
+@app.get("/feed")
+def feed_stats():
+    """
+    Returns the size of the subscription buffer and the number of subscribers.
+    """
+    return transchain.feed.stats()
+
+
+@app.get("/accounts/{account}/history")
+def get_account_history(account: str, from_index: int = 0, limit: int = 100, before: Optional[int] = None):
+    """
+    Returns a page of the transactions an account sent or received, from the account index.
+
+    - **from_index**: Chain index the page starts at, oldest transactions first.
+    - **limit**: Maximum number of transactions, at most 1000.
+    - **before**: Returns the newest transactions below this chain index instead, newest first.
+
+    Every transaction carries the balance of the account after it. `next` holds the parameters of the following page,
+    None on the last page.
+    """
+    limit = max(1, min(limit, 1000))
+    count, page = transchain.account_history(account, max(0, from_index), limit, before)
+    next_page = None
+    if len(page) == limit:
+        next_page = {"before": page[-1][0].index} if before is not None else {"from_index": page[-1][0].index + 1}
+    return {
+        "account": account,
+        "count": count,
+        "transactions": [{**transaction.model_dump(), "balance_after": balance} for transaction, balance in page],
+        "next": next_page,
+    }
+
+
+@app.get("/accounts/{account}/balance")
+def get_account_balance(account: str, height: Optional[int] = None):
+    """
+    Returns the balance of an account after the first `height` transactions of the chain, the current balance if omitted.
+    """
+    chain_height = len(transchain.transaction_chain.transactions)
+    height = chain_height if height is None else height
+    if height < 0 or height > chain_height:
+        raise HTTPException(status_code=404, detail="Invalid height")
+    return {"account": account, "height": height, "balance": transchain.balance_at(account, height)}
+
 
 @app.get("/public_key")
 def get_public_key():
-    public_key = load_public_key(PUBLIC_KEY_FILE)
-    return {"public_key": public_key}
+    return {"public_key": PUBLIC_KEY}
+
+
+async def fetch_pending_tip() -> tuple:
+    """
+    Asks a random authority for the tip a new transaction has to build on.
+
+    Returns:
+        tuple: The authority and its (index, previous hash) tip. Falls back to no authority
+        and the tip of the local chain if no authority answers.
+    """
+    for authority_node in random.sample(topology.authorities, min(3, len(topology.authorities))):
+        try:
+            response = await peer_client.get(authority_node, "/pending_tip", timeout=5.0)
+            if response.is_success:
+                tip = response.json()
+                return authority_node, (tip["index"], tip["previous_hash"])
+        except Exception as e:
+            logger.warning(f"Error fetching the pending tip from {authority_node}: {e}")
+    return None, transchain.chain_tip()
 
 
 @app.post("/send_transaction/")
-def send_transaction(request: SendTransactionRequest):
+async def send_transaction(request: SendTransactionRequest):
     """
     Sends a transaction to a recipient container
     
@@ -63,13 +324,15 @@ def send_transaction(request: SendTransactionRequest):
 
     current_time = datetime.utcnow()
     expiration_time = current_time + timedelta(minutes=10)
+    # With batching the transfer has to build on the transactions waiting in the batch of an authority
+    authority_node, (index, previous_hash) = await fetch_pending_tip()
 
     transaction_data = {
-        "index": transchain.transaction_chain.transactions[-1].index + 1,
+        "index": index,
         "sender": container_name,
         "recipient": recipient_container,
         "amount": amount,
-        "previous_hash": transchain.transaction_chain.transactions[-1].current_hash,
+        "previous_hash": previous_hash,
         "expiration": expiration_time.isoformat(),
         # Placeholders
         "current_hash": "", # Will be updated
@@ -81,78 +344,105 @@ def send_transaction(request: SendTransactionRequest):
 
     transaction_hash = transchain.calculate_hash(transaction_data)
     transaction_data["current_hash"] = transaction_hash
-    transaction_data["sender_signature"] = sign_data(PRIVATE_KEY_FILE, transaction_hash)
+    transaction_data["sender_signature"] = signer.sign(transaction_hash)
     transaction_data["timestamp"] = datetime.utcnow().isoformat()
-    
-    transaction = Transaction(**transaction_data)
+    # Not hashed, tells the recipient which authority the transfer was built for
+    transaction_data["authority"] = authority_node
 
-    response = requests.post(f"http://{recipient_container}:8000/receive_transaction/", json=transaction.model_dump())
+    response = await peer_client.post(recipient_container, "/receive_transaction/", content=encode_json(transaction_data), headers=JSON_HEADERS)
     return {"message": "Transaction sent", "response": response.json()}
 
 
 @app.post("/receive_transaction/")
 def receive_transaction(transaction: Transaction):
     """
-    Receives a transaction and appends it to the local list of transaction requests
+    Receives a transaction and adds it to the pool of transaction requests
     
     - **transaction**: The transaction to be received
     """
-    global transaction_requests
-    transaction_requests.transactions.append(transaction)
+    result = transaction_requests.add(transaction)
+    if result == "duplicate":
+        return {"message": "Transaction already received"}
+    if result == "expired":
+        raise HTTPException(status_code=400, detail="Transaction has expired")
+    if result == "full":
+        raise HTTPException(status_code=429, detail="Too many pending transaction requests")
     return {"message": "Transaction received"}
 
 
 @app.get("/show_transactions")
-def show_transactions():
-    return {"transaction requests": transaction_requests}
+def show_transactions(offset: int = 0, limit: int = 100):
+    """
+    Returns a page of the pending transaction requests in arrival order.
+
+    - **offset**: Position of the first request.
+    - **limit**: Maximum number of requests, at most 1000.
+    """
+    transactions = transaction_requests.page(offset, min(limit, 1000))
+    return {"transaction requests": {"transactions": transactions}, "offset": max(0, offset), "total": len(transaction_requests)}
 
 
 @app.post("/accept_transaction/")
-def accept_transaction(request: AcceptTransactionRequest):
+async def accept_transaction(request: AcceptTransactionRequest):
     """
     Accepts a transaction request, signs it, and sends it to an authority node
     
-    - **request**: Contains the index of the transaction request to accept
+    - **request**: Contains the hash or the position of the transaction request to accept
     """
-    index_of_request = request.number
-
-    if index_of_request < 0 or index_of_request >= len(transaction_requests.transactions):
+    if request.current_hash is not None:
+        transaction = transaction_requests.get(request.current_hash)
+    elif request.number is not None:
+        transaction = transaction_requests.at(request.number)
+    else:
+        transaction = None
+    if transaction is None:
         raise HTTPException(status_code=400, detail="Invalid transaction index")
 
-    transaction_request = transaction_requests.transactions[index_of_request].model_dump()
+    transaction_request = transaction.model_dump()
     transaction_hash = transchain.calculate_hash(transaction_request)
 
     if transaction_hash != transaction_request["current_hash"]:
         return {"error": "Transaction was manipulated"}
 
-    signature = sign_data(PRIVATE_KEY_FILE, transaction_hash)
+    signature = signer.sign(transaction_hash)
     transaction_request['recipient_signature'] = signature
 
-    # Retry in case a authority is down
-    for _ in range(0, 3):
-        random_authority = random.randint(0, len(AUTHORITY_NODES)-1)
-        response = requests.post(f'{AUTHORITY_NODES[random_authority]}/verify_transaction/', json=transaction_request)
+    # Start with the authority whose pending tip the transfer was built on, retry in case it is down
+    authorities = random.sample(topology.authorities, min(3, len(topology.authorities)))
+    if transaction.authority in topology.authorities:
+        authorities = [transaction.authority] + [node for node in authorities if node != transaction.authority][:2]
+    response = None
+    for authority_node in authorities:
+        try:
+            response = await peer_client.post(authority_node, "/verify_transaction/", json=transaction_request, timeout=30.0, retries=0)
+        except Exception as e:
+            logger.warning(f"Error in contacting {authority_node}: {e}")
+            continue
         if response.status_code == 200:  # API returned OK
-            print(f"Transaction verification process initiated")
+            logger.info("Transaction verification process initiated")
             break  # Exit loop if verification is successful
-    return {"message": response.json()}
+    if response is None:
+        raise HTTPException(status_code=503, detail="No authority reachable")
+    response_data = response.json()
+    if response.status_code == 200 and response_data.get("message") == "transaction accepted":
+        transaction_requests.remove(transaction.current_hash)
+    return {"message": response_data}
 
 @app.get("/get_balance")
 def get_balance():
     return {"balance": transchain.calculate_balance(container_name)}
     
 @app.post("/deposit_money")
-def deposit_money(request: SendMoney):
-    for authority_node in AUTHORITY_NODES:
-        auth_deposit_money_url = f"{authority_node}/auth_deposit_money/"
+async def deposit_money(request: SendMoney):
+    for authority_node in topology.authorities:
         try:
-            response = requests.post(auth_deposit_money_url, json=request.model_dump())
-            if response.ok:
+            response = await peer_client.post(authority_node, "/auth_deposit_money", json=request.model_dump(), timeout=30.0, retries=0)
+            if response.is_success:
                 return {"message": response.json()}
             else:
                 raise HTTPException(status_code=response.status_code, detail="Failed to deposit money")
         except Exception as e:
-            print(f"Error in contacting {authority_node}: {e}")
+            logger.error(f"Error in contacting {authority_node}: {e}")
             raise HTTPException(status_code=500, detail="Internal server error during deposit")
 
 @app.post("/sign_money_deposit")
@@ -160,7 +450,7 @@ def sign_money_deposit(transaction: Transaction):
     global container_name
     transaction_data = transaction.model_dump()
     current_hash = transchain.calculate_hash(transaction_data)
-    signature = sign_data(PRIVATE_KEY_FILE, current_hash)
+    signature = signer.sign(current_hash)
     
     transaction_data["current_hash"] = current_hash
     
@@ -178,17 +468,66 @@ def sign_money_deposit(transaction: Transaction):
 Authority Routes
 """
 @app.post("/auth_deposit_money")
-def auth_deposit_money(request: SendMoney):
+async def auth_deposit_money(request: SendMoney):
+    for _ in range(DEPOSIT_ATTEMPTS):
+        tip, result = await propose_deposit(request)
+        # A deposit built on a tip that moved in the meantime is built again on the new tip
+        if result != "transaction accepted" and pending_chain_tip() != tip:
+            logger.info(f"Chain tip moved during the deposit of {request.name}, retrying")
+            continue
+        break
+    if result is None:
+        return {"message": "Deposit validation failed"}
+    if result != "transaction accepted":
+        return {"message": "Deposit was not committed", "detail": result}
+    return {"message": "Deposit validated successfully"}
+
+
+async def propose_deposit(request: SendMoney) -> tuple:
+    """
+    Builds a deposit on the pending tip, has it signed by the depositor and proposes it.
+    Deposits are built one at a time, so concurrent deposits do not claim the same tip.
+    Without batching the next deposit waits for the commit, with batching only until the
+    deposit joined the pending batch.
+
+    Returns:
+        tuple: The tip the deposit was built on and the result message of the proposal,
+        None if the deposit failed validation.
+    """
+    async with deposit_lock:
+        tip = pending_chain_tip()
+        transaction = await sign_deposit(request, tip)
+        if transaction is None:
+            return tip, None
+        if batcher is None:
+            # The tip only moves with the commit, the next deposit has to wait for it
+            response = await verify_transaction(Transaction(**transaction))
+            return tip, response.get("message")
+        if pending_chain_tip() != tip:
+            # A transfer joined the batch while the deposit was signed
+            return tip, "transaction is not valid"
+        committed = batcher.enqueue(transaction)
+    return tip, "transaction accepted" if await committed else "retry transaction"
+
+
+async def sign_deposit(request: SendMoney, tip: tuple):
+    """
+    Builds a deposit on the given tip and signs it by the depositor and this authority.
+
+    Returns:
+        dict: The signed deposit, None if it failed validation.
+    """
+    index, previous_hash = tip
     current_time = datetime.utcnow()
     expiration_time = current_time + timedelta(minutes=10)
     
     # Create a transaction dictionary
     transaction_data = {
-        "index": transchain.transaction_chain.transactions[-1].index + 1,
+        "index": index,
         "sender": request.name,
         "recipient": request.name,
         "amount": request.amount,
-        "previous_hash": transchain.transaction_chain.transactions[-1].current_hash,
+        "previous_hash": previous_hash,
         "expiration": expiration_time.isoformat(),
         "current_hash": "",
         "sender_signature": "",
@@ -200,248 +539,662 @@ def auth_deposit_money(request: SendMoney):
     transaction = Transaction(**transaction_data)
     
     try:
-        response = requests.post(f"http://{transaction_data['sender']}:8000/sign_money_deposit", json=transaction.model_dump())
+        response = await peer_client.post(transaction_data['sender'], "/sign_money_deposit", json=transaction.model_dump(), idempotent=True)
         if response.status_code == 200:
             transaction = response.json()["transaction"]
 
-            if transchain.validate_deposit(transaction, request.name):
+            await transchain.key_registry.prefetch_async([request.name])
+            if transchain.validate_deposit(transaction, request.name, fetch=False):
                 current_hash = transchain.calculate_hash(transaction)
                 if current_hash != transaction["current_hash"]:
-                    return {"message": "Deposit validation failed"}
-                signature = sign_data(PRIVATE_KEY_FILE, current_hash)
+                    return None
+                signature = signer.sign(current_hash)
                 transaction["authority_signature"] = signature
+                transaction["authority"] = container_name
                 current_time = datetime.utcnow().isoformat()
                 transaction["timestamp"] = current_time
-                requests.post(f"http://{container_name}:8000/verify_transaction/", json=transaction)
-                return {"message": "Deposit validated successfully"}
+                return transaction
             else:
-                return {"message": "Deposit validation failed"}
+                return None
         else:
             raise HTTPException(status_code=response.status_code, detail="Signing failed")
     except Exception as e:
-        print(f"Error signing transaction: {e}")
+        logger.error(f"Error signing transaction: {e}")
         raise HTTPException(status_code=500, detail="Internal server error during signing")
 
+
+def pending_chain_tip() -> tuple:
+    """
+    Returns the index and previous hash a new transaction has to use, including the transactions
+    waiting in the current batch of this authority.
+    """
+    return batcher.pending_tip() if batcher is not None else transchain.chain_tip()
+
 @app.post("/verify_transaction/")
-def verify_transaction(transaction: Transaction):
+async def verify_transaction(transaction: Transaction):
     """
     Verifies the transaction by checking its hash and signatures, then adds it to the chain.
     
     - **transaction**: The transaction to verify and add.
     """
-    def reset_blocker():
-        global blocker
-        blocker = None
-    global blocker 
     global container_name
-    global list_of_blockers
-    global blocker_set_time
 
-    if blocker is not None:
+    if batcher is not None:
+        return await batch_transaction(transaction.model_dump())
+
+    lease = await tip_lock.acquire(container_name, timeout=TIP_LOCK_WAIT)
+    if lease is None:
         return {"message": "try again"}
-    
-    blocker = container_name
-    blocker_set_time = datetime.utcnow() 
-    transaction_data = transaction.model_dump()
+    try:
+        return await propose_transaction(transaction.model_dump())
+    finally:
+        tip_lock.release(lease.token)
+
+
+async def propose_transaction(transaction_data: dict):
+    """
+    Verifies and signs a transaction and runs the prepare/commit round for it.
+    The caller holds the lease on the chain tip.
 
+    - **transaction_data**: The transaction to verify and add.
+    """
     """
     If the sender and recipient is equal
     it is a deposit and was already verified
     (signed)
     """
+    # Fetch the keys without blocking the event loop, the checks below then use the cached keys
+    if not (transaction_data["sender"] == transaction_data["recipient"] and transaction_data["authority_signature"]):
+        await transchain.key_registry.prefetch_async([transaction_data["sender"], transaction_data["recipient"]])
     if transaction_data["sender"] == transaction_data["recipient"]:
-        if not transaction_data["authority_signature"] and not transchain.verify_transaction(transaction_data):
-            reset_blocker()
+        if not transaction_data["authority_signature"] and not transchain.verify_transaction(transaction_data, fetch=False):
             return {"message": "transaction is not valid"}
     else:      
         sender_balance = transchain.calculate_balance(transaction_data["sender"])
 
         if sender_balance < transaction_data["amount"]:
-            reset_blocker()
             return {"message": "Insufficient balance"}
-        if not transchain.verify_transaction(transaction_data):
-            reset_blocker()
+        if not transchain.verify_transaction(transaction_data, fetch=False):
             return {"message": "transaction is not valid"}
         
         try:
-            signature = sign_data(PRIVATE_KEY_FILE, transaction_data["current_hash"])
+            signature = signer.sign(transaction_data["current_hash"])
             transaction_data["authority_signature"] = signature
+            transaction_data["authority"] = container_name
             transaction_data["timestamp"] = str(datetime.utcnow())
         
         except Exception as e:
-            reset_blocker()
             raise HTTPException(status_code=500, detail=f"Error signing transaction: {e}")
 
-    approvals = len(AUTHORITY_NODES) - 1  # Quorum
-    successful_approvals = 0
-    prepare_transaction = transaction_data
+    prepare_transaction = dict(transaction_data)
     prepare_transaction['container_name'] = container_name
 
-    global synchronization_needed
+    if await collect_prepare_votes(prepare_transaction):
+        # Encode once for all authorities
+        if await broadcast_commit(dump_transaction(transaction_data, PEER_MEDIA_TYPE), "/add_to_chain/"):
+            return {"message": "transaction accepted"}
+        return {"message": "retry transaction"}
+    else:
+        await initiaze_lock_release()
+        return {"message": "retry transaction"}
+
+
+async def batch_transaction(transaction_data: dict):
+    """
+    Verifies a transaction against the pending batch, signs it and waits until its batch is committed.
+
+    - **transaction_data**: The transaction, built on the tip returned by /pending_tip.
+    """
+    # Fetch the keys first, the checks below then run without yielding to other requests,
+    # so the pending tip cannot move between the checks and the submission
+    if not (transaction_data["sender"] == transaction_data["recipient"] and transaction_data["authority_signature"]):
+        await transchain.key_registry.prefetch_async([transaction_data["sender"], transaction_data["recipient"]])
+    tip = batcher.pending_tip()
+    if transaction_data["sender"] == transaction_data["recipient"]:
+        if transaction_data["authority_signature"]:
+            if (transaction_data["index"], transaction_data["previous_hash"]) != tip:
+                return {"message": "transaction is not valid"}
+        elif not transchain.verify_transaction(transaction_data, tip, fetch=False):
+            return {"message": "transaction is not valid"}
+    else:
+        sender = transaction_data["sender"]
+        sender_balance = transchain.calculate_balance(sender) + batcher.pending_balance_delta(sender)
+        if sender_balance < transaction_data["amount"]:
+            return {"message": "Insufficient balance"}
+        if not transchain.verify_transaction(transaction_data, tip, fetch=False):
+            return {"message": "transaction is not valid"}
+        try:
+            transaction_data["authority_signature"] = signer.sign(transaction_data["current_hash"])
+            transaction_data["authority"] = container_name
+            transaction_data["timestamp"] = str(datetime.utcnow())
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error signing transaction: {e}")
+
+    if await batcher.submit(transaction_data):
+        return {"message": "transaction accepted"}
+    return {"message": "retry transaction"}
+
+
+async def commit_batch(batch: list) -> bool:
+    """
+    Runs one prepare/commit round for a whole batch of transactions.
+    The authorities are prepared with the first transaction of the batch and apply the batch as a whole.
+
+    Args:
+        batch (list): The authority-signed transactions, in chain order.
+
+    Returns:
+        bool: True if the batch was committed.
+    """
+    # Wait in line behind the rounds of other proposers
+    lease = await tip_lock.acquire(container_name, timeout=TIP_LOCK_WAIT)
+    if lease is None:
+        return False
     try:
-        for authority_node in AUTHORITY_NODES:
-            authority_url = f"{authority_node}/prepare_transaction/"
-            
-            # Send the request to the authority node
-            response = requests.post(authority_url, json=prepare_transaction)
-
-
-            # Check if the response is OK (successful approval)
-            if response.ok:
-                response_data = response.json()
-                if response_data.get("status") == "accepted":
-                    print(f"Transaction approved by {authority_node}")
-                    successful_approvals += 1  # Increment successful approvals
-                elif response_data.get("message") == "we have to synchronize...":
-                    print(f"Synchronization required by {authority_node}")
-                    synchronization_needed = True
-                    break  
-                elif response_data.get("message") == "Sorry, transaction is already in process.":
-                    list_of_blockers.append(response_data.get("blocker"))
-                else:
-                    print(f"Unknown response from {authority_node}: {response_data}")
+        prepare_transaction = dict(batch[0])
+        prepare_transaction['container_name'] = container_name
+
+        if not await collect_prepare_votes(prepare_transaction):
+            await initiaze_lock_release()
+            return False
+        return await broadcast_commit(dump_chain(batch, PEER_MEDIA_TYPE), "/add_batch_to_chain/")
+    finally:
+        tip_lock.release(lease.token)
+
+
+async def broadcast_commit(body: bytes, path: str) -> bool:
+    """
+    Commits an encoded transaction or batch on all authorities in parallel.
+
+    Returns:
+        bool: True if a quorum of authorities appended it. Authorities that did not
+        keep the lease of this proposer until it expires.
+    """
+    committed = 0
+    for authority_node, response in await asyncio.gather(*(send_commit(authority_node, body, path) for authority_node in topology.authorities)):
+        if isinstance(response, Exception):
+            logger.warning(f"Error committing to {authority_node}: {response}")
+        elif response.is_success and response.json().get("message") in COMMIT_ACCEPTED:
+            committed += 1
+        else:
+            logger.warning(f"{authority_node} rejected the commit: {response.text}")
+    if committed < topology.quorum:
+        logger.warning(f"Commit reached {committed} of {topology.quorum} authorities")
+        return False
+    return True
+
+
+async def collect_prepare_votes(prepare_transaction: dict) -> bool:
+    """
+    Sends the prepare request to all authorities and waits until the quorum is reached or can no longer be reached.
+
+    Returns:
+        bool: True if enough authorities accepted the prepare request.
+    """
+    global list_of_blockers
+    # The quorum is derived from the authority set, a failing authority does not lower it
+    authorities = list(topology.authorities)
+    approvals = topology.quorum
+    successful_approvals = 0
+    synchronization_needed = False
+
+    # Send the prepare request to all authorities at once and stop waiting as soon as the quorum is reached
+    pending = len(authorities)
+    body = dump_prepare(prepare_transaction, PEER_MEDIA_TYPE)
+    prepare_tasks = [asyncio.create_task(send_prepare(authority_node, body)) for authority_node in authorities]
+    # Keep the remaining requests alive after an early return
+    for task in prepare_tasks:
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    for prepare_result in asyncio.as_completed(prepare_tasks):
+        authority_node, response = await prepare_result
+        pending -= 1
+        if isinstance(response, Exception):
+            logger.warning(f"Error in contacting {authority_node}: {response}")
+
+        # Check if the response is OK (successful approval)
+        elif response.is_success:
+            response_data = response.json()
+            if response_data.get("status") == "accepted":
+                logger.debug(f"Transaction approved by {authority_node}")
+                successful_approvals += 1  # Increment successful approvals
+            elif response_data.get("message") == "We need to synchronize...":
+                logger.info(f"Synchronization required by {authority_node}")
+                synchronization_needed = True
+                break
+            elif response_data.get("message") == "Sorry, transaction is already in process.":
+                list_of_blockers.append(response_data.get("blocker"))
             else:
-                print(f"Transaction approval failed from {authority_node}: {response.status_code}")
+                logger.warning(f"Unknown response from {authority_node}: {response_data}")
+        else:
+            logger.warning(f"Transaction approval failed from {authority_node}: {response.status_code}")
 
-            # If the response is None or failed, adjust the approvals
-            if not response:
-                approvals -= 1 
+        # Check if quorum (enough approvals) has been reached
+        if successful_approvals >= approvals:
+            logger.info("Consensus reached, transaction can be committed.")
+            break
+        # Stop early if the quorum can no longer be reached
+        if successful_approvals + pending < approvals:
+            break
 
-            # Check if quorum (enough approvals) has been reached
-            if successful_approvals >= approvals:
-                print("Consensus reached, transaction can be committed.")
-                break 
+    if synchronization_needed:
+        logger.info("Starting blockchain synchronization process...")
+    return successful_approvals >= approvals
+
+
+async def send_prepare(authority_node: str, body: bytes):
+    """
+    Sends an encoded prepare request to an authority and records its latency.
 
+    Returns:
+        tuple: The authority and its response, or the exception raised by the call.
+    """
+    try:
+        with consensus_latency.timer("prepare", authority_node):
+            return authority_node, await peer_client.post(authority_node, "/prepare_transaction", content=body, headers=PEER_HEADERS, idempotent=True)
     except Exception as e:
-        print(e) 
+        return authority_node, e
 
-    if synchronization_needed:
-        print("Starting blockchain synchronization process...")
 
-    if successful_approvals >= approvals:
-        for authority_node in AUTHORITY_NODES:
-            try:
-                response = requests.post(f'{authority_node}/add_to_chain', json=transaction_data)
-            except Exception as e:
-                print(e)
-        return {"message": "transaction accepted"}
-    else:
-        initiaze_lock_release()
-        return {"message": "retry transaction"}
+async def send_commit(authority_node: str, body: bytes, path: str = "/add_to_chain/"):
+    """
+    Sends an encoded commit (add_to_chain) request to an authority and records its latency.
+    Batches are committed by passing an encoded transaction chain and the /add_batch_to_chain/ path.
 
+    Returns:
+        tuple: The authority and its response, or the exception raised by the call.
+    """
+    try:
+        with consensus_latency.timer("commit", authority_node):
+            return authority_node, await peer_client.post(authority_node, path, content=body, headers=PEER_HEADERS, idempotent=True)
+    except Exception as e:
+        return authority_node, e
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Returns the metrics of the node in the Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
 
-@app.post('/prepare_transaction')
-def prepare_transaction(transaction: PrepareTransaction):
-    global container_name
-    global blocker
 
+@app.get("/consensus_latency")
+def get_consensus_latency():
+    """
+    Returns p50 and p99 latency of the prepare and commit calls per authority.
+    """
+    return consensus_latency.summary()
+
+
+@app.post('/prepare_transaction', openapi_extra={"requestBody": {"content": {"application/json": {"schema": PrepareTransaction.model_json_schema()}}, "required": True}})
+async def prepare_transaction(request: Request):
+    transaction, _, _ = await read_model(request, load_prepare)
+    proposer = transaction.container_name
     transchain_len = len(transchain.transaction_chain.transactions)
 
-    if blocker is not None:
-        return {'message': 'Sorry, transaction is already in process.', 'blocker': blocker}
+    if tip_lock.holder not in (None, proposer):
+        return {'message': 'Sorry, transaction is already in process.', 'blocker': tip_lock.holder}
 
     transaction_data = transaction.model_dump()
     transaction_data_index = transaction_data['index']  
     if transaction_data_index != transchain_len:
+        if transaction_data_index > transchain_len:
+            schedule_catch_up(proposer)
         return {
             'message': 'We need to synchronize...', 
             'current_index': transchain_len,  
             'suggestion': 'Please use the longer chain as the source of truth.'
         }
-    else:
-        blocker = container_name
-        return {'message': 'Transaction is good to go.', 'status': 'accepted'}
+    # The proposer keeps the lease until its commit arrives or the lease expires
+    if tip_lock.try_acquire(proposer) is None:
+        return {'message': 'Sorry, transaction is already in process.', 'blocker': tip_lock.holder}
+    return {'message': 'Transaction is good to go.', 'status': 'accepted'}
 
 
 @app.post("/unlock_transaction/")
-def unlock_transaction():
-    global blocker
+async def unlock_transaction():
     global list_of_blockers
-    blocker = None
+    tip_lock.release_holder()
     list_of_blockers = []
     return {"message": "unlocked"}
 
 
 @app.post("/join")
-def join(container_name: ContainerName):
-    global connected_nodes
+async def join(container_name: ContainerName):
+    """
+    Registers a node and lets it catch up by advertising the local height and tip hash.
+    The joining node pulls only the transactions it is missing.
+    It then learns a few peers to forward commits to, and a few peers learn about it.
+    """
     container_name_ = str(container_name.name)
-    if container_name_ not in connected_nodes:
-        connected_nodes.append(container_name_)
-    response = requests.post(f'http://{container_name_}:8000/synchronize', json=transchain.transaction_chain.model_dump())
+    gossip.add_peer(container_name_)
+    response = await peer_client.post(container_name_, "/synchronize_from", json=chain_status(), timeout=120.0, idempotent=True)
+    introductions = [introduce(container_name_, gossip.sample(2 * gossip.fanout, exclude=container_name_))]
+    introductions += [introduce(peer, [container_name_]) for peer in gossip.sample(gossip.fanout, exclude=container_name_)]
+    await asyncio.gather(*introductions)
     return {"message": response.text}
 
 
+async def introduce(node: str, peers: list):
+    """
+    Tells a node about peers it can forward commits to.
+    """
+    if not peers:
+        return
+    try:
+        await peer_client.post(node, "/gossip/peers", json={"peers": peers}, idempotent=True)
+    except Exception as e:
+        logger.warning(f"Could not introduce {len(peers)} peers to {node}: {e}")
+
+
+@app.post("/gossip/peers")
+async def add_gossip_peers(peer_list: PeerList):
+    """
+    Adds peers this node forwards committed transactions to.
+    """
+    added = [peer for peer in peer_list.peers if peer != container_name and gossip.add_peer(peer)]
+    return {"added": added, "peers": len(gossip.peers)}
+
+
+@app.get("/gossip")
+def gossip_stats():
+    """
+    Returns the number of peers and the forwarding counters of the node.
+    """
+    return gossip.stats()
+
+
+def encode_commit(transactions: list) -> bytes:
+    return dump_chain(transactions, PEER_MEDIA_TYPE)
+
+
+async def forward_commits(node: str, commit: Commit):
+    """
+    Sends committed transactions to a peer in one message. The body is shared by all peers of the commit.
+
+    Raises:
+        httpx.HTTPError: If the peer cannot be reached or answers with an error.
+    """
+    response = await peer_client.post(node, commit.path or "/add_batch_to_chain/", content=commit.body, headers=PEER_HEADERS, idempotent=True)
+    response.raise_for_status()
+
+
+@app.get("/chain/status")
+def chain_status():
+    return {"name": container_name, "height": len(transchain.transaction_chain.transactions), "tip_hash": transchain.transaction_chain.transactions[-1].current_hash}
+
+
+@app.get("/chain/hash/{index}")
+def chain_hash(index: int):
+    if index < 0 or index >= len(transchain.transaction_chain.transactions):
+        raise HTTPException(status_code=404, detail="Invalid transaction index")
+    return {"index": index, "hash": transchain.transaction_chain.transactions[index].current_hash}
+
+
+@app.get("/checkpoint")
+async def checkpoint(windows: Optional[int] = None):
+    """
+    Returns the Merkle root over the window roots of the chain.
+    With `windows`, only the first windows are covered, nodes compare such roots to find the first window where they diverge.
+    """
+    return {"name": container_name, **transchain.merkle_checkpoint(windows)}
+
+
+@app.get("/checkpoint/window/{window}")
+async def checkpoint_window(window: int):
+    try:
+        root, complete = transchain.merkle_window(window)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Invalid window")
+    return {"window": window, "root": root.hex(), "complete": complete}
+
+
+@app.get("/chain/proof/{index}")
+async def chain_proof(index: int):
+    """
+    Returns the proof that the transaction at a chain index is included under the current checkpoint root,
+    checked with merkle.verify_proof.
+    """
+    try:
+        return transchain.merkle_proof(index)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Invalid transaction index")
+
+
+@app.get("/chain/range")
+def chain_range(request: Request, from_index: int = 0, limit: int = 500):
+    """
+    Returns a page of the chain starting at from_index.
+    Nodes that accept the binary wire format get the transactions in it, with the chain height in a header.
+    """
+    from_index = max(0, from_index)
+    limit = max(0, min(limit, 5000))
+    transactions = transchain.transaction_chain.transactions[from_index:from_index + limit]
+    if accepts_binary(request.headers.get("accept")):
+        return Response(content=dump_chain(transactions, BINARY), media_type=BINARY,
+                        headers={"X-Chain-Height": str(len(transchain.transaction_chain.transactions))})
+    return {"from_index": from_index, "height": len(transchain.transaction_chain.transactions), "transactions": [transaction.model_dump() for transaction in transactions]}
+
+
+@app.post("/synchronize_from")
+async def synchronize_from(status: ChainStatus):
+    """
+    Catches up with the advertising node by downloading the missing suffix of its chain.
+    """
+    if status.height <= len(transchain.transaction_chain.transactions):
+        return {"message": "nothing to synchronize"}
+    return {"message": await synchronize_from_peer(transchain, status.name, status.model_dump())}
+
+
 @app.post("/synchronize")
-def synchronize(transaction_list: TransactionChain):
+async def synchronize(request: Request):
+    transactions, _, _ = await read_model(request, load_chain)
+    transaction_list = TransactionChain.model_construct(transactions=transactions)
     if len(transaction_list.transactions) > len(transchain.transaction_chain.transactions):
-        transchain.synchronize(transaction_list) 
+        await run_in_threadpool(transchain.synchronize, transaction_list)
         return {"message": "synchronized"}
     return {"message": "nothing to synchronize"}
 
-@app.post("/add_to_chain/")
+async def read_model(request: Request, parse):
+    """
+    Parses a JSON or binary request body that is also kept as raw bytes for forwarding.
+    Invalid bodies are answered like any other request validation error.
+
+    Returns:
+        tuple: The parsed body, the raw body and its media type.
+    """
+    body = await request.body()
+    media_type = request.headers.get("content-type", "application/json").split(";", 1)[0].strip()
+    try:
+        return parse(body, media_type), body, media_type
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
-def add_to_chain(transaction: Transaction):
-    global blocker
+@app.post("/add_to_chain/", openapi_extra={"requestBody": {"content": {"application/json": {"schema": Transaction.model_json_schema()}}, "required": True}})
+async def add_to_chain(request: Request):
+    """
+    Verifies a committed transaction, appends it and hands it to gossip for forwarding.
+    """
     global list_of_blockers
     global transaction_cache
-    global connected_nodes
 
-    transaction_data = transaction.model_dump()
-    if transaction_cache.exists(transaction_data):
+    encoded, _, _ = await read_model(request, EncodedTransaction.from_body)
+    transaction = encoded.transaction
+    # The cache only holds appended commits, the chain may have dropped them since
+    if transaction_cache.exists(encoded) and chain_holds([transaction]):
         return {"message": "transaction was already processed"}
 
-    transaction_cache.add(transaction_data)
-
-    if transchain.verify_auth_transaction(transaction_data):
-        transchain.transaction_chain.transactions.append(transaction)
-        blocker = None
+    tip = transchain.chain_tip()
+    # The chain must not have moved while the transaction was verified off the event loop
+    if await run_in_threadpool(transchain.verify_auth_transaction, encoded.data, tip) and transchain.append_batch([transaction], tip):
+        transaction_cache.add(encoded)
+        # The tip moved on, the lease of the proposer is no longer needed
+        release_commit_lease(transaction.authority)
         list_of_blockers = []
-        for node in connected_nodes:
-            print("CONNECTED NODES", connected_nodes)
-            try:
-                response = requests.post(f'http://{node}:8000/add_to_chain/', json=transaction.model_dump())
-                if response.status_code == 200 and "transaction" not in response.json().get("message", ""):
-                    connected_nodes.remove(node)
-            except Exception as e:
-                print(f"Error communicating with {node}: {e}")
-                connected_nodes.remove(node)
+        # Forwarded as it was received, in the wire format of the peers
+        gossip.publish([transaction], encoded.encode(PEER_MEDIA_TYPE), "/add_to_chain/")
         return {"message": "transaction added"}
 
-    blocker = None
-    list_of_blockers = []
+    # Another delivery of the same commit was appended while this one was verified
+    if chain_holds([transaction]):
+        return {"message": "transaction was already processed"}
+    # A rejected commit proves nothing about its sender, the lease it names expires on its own
+    if transaction.index > len(transchain.transaction_chain.transactions):
+        schedule_catch_up(transaction.authority)
     return {"message": "transaction not added"}
 
 
-def initiaze_lock_release():
-    global container_name
+@app.post("/add_batch_to_chain/")
+async def add_batch_to_chain(request: Request):
+    """
+    Verifies a batch of transactions and appends it as a whole, or not at all.
+    Transactions the chain already holds are skipped, gossip can deliver them more than once.
+    """
     global list_of_blockers
-    if container_name == sorted(list_of_blockers)[0]:
-        broadcast_unlock()
 
-def broadcast_unlock():
-    global container_name
+    transactions, body, media_type = await read_model(request, load_chain)
+    if not transactions:
+        return {"message": "transaction not added"}
+    # The last transaction identifies the batch, it commits to all transactions before it
+    last = transactions[-1].model_dump()
+    if transaction_cache.exists(last) and chain_holds(transactions[-1:]):
+        return {"message": "transaction was already processed"}
+    height = len(transchain.transaction_chain.transactions)
+    held = [transaction for transaction in transactions if transaction.index < height]
+    # Only the transactions the chain holds with the same hash count as processed, others belong to a fork
+    if not chain_holds(held):
+        return {"message": "transaction not added"}
+    batch = TransactionChain.model_construct(transactions=[transaction for transaction in transactions if transaction.index >= height])
+    if not batch.transactions:
+        return {"message": "transaction was already processed"}
+    transactions_data = [transaction.model_dump() for transaction in batch.transactions]
+
+    tip = transchain.chain_tip()
+    # The chain must not have moved while the batch was verified off the event loop
+    if await run_in_threadpool(transchain.verify_auth_batch, transactions_data, tip) and transchain.append_batch(batch.transactions, tip):
+        transaction_cache.add(last)
+        release_commit_lease(batch.transactions[-1].authority)
+        list_of_blockers = []
+        # A batch that was applied as a whole is forwarded as it was received
+        received = len(batch.transactions) == len(transactions) and media_type == PEER_MEDIA_TYPE
+        gossip.publish(batch.transactions, body if received else None)
+        return {"message": "transaction added", "count": len(transactions_data)}
+
+    if chain_holds(batch.transactions):
+        return {"message": "transaction was already processed"}
+    if batch.transactions[0].index > len(transchain.transaction_chain.transactions):
+        schedule_catch_up(batch.transactions[0].authority)
+    return {"message": "transaction not added"}
+
+
+def chain_holds(transactions: list) -> bool:
+    """
+    Returns True if the local chain holds every given transaction at its index with the same hash.
+    """
+    chain = transchain.transaction_chain.transactions
+    height = len(chain)
+    return all(transaction.index < height and chain[transaction.index].current_hash == transaction.current_hash
+               for transaction in transactions)
+
+
+def release_commit_lease(authority: str):
+    """
+    Releases the lease of the authority that signed an appended commit.
+    The authority field is not hashed, it is only verified if it names a known authority,
+    otherwise the signature was checked against every authority key.
+    """
+    if authority in transchain.authority_keyring.authority_nodes:
+        tip_lock.release_holder(authority)
+
+
+def schedule_catch_up(proposer: str):
+    """
+    Starts catching up with the proposer of a prepare or commit that is ahead of the local chain.
+    With a quorum smaller than the authority set, the next round can be committed before
+    the previous commit reached every authority, so a slow authority misses a commit.
+    """
+    global catch_up_task
+    if catch_up_task is None or catch_up_task.done():
+        catch_up_task = asyncio.create_task(catch_up(proposer))
+
+
+async def catch_up(proposer: str):
     try:
-        for authority_node in AUTHORITY_NODES:
-            unlock_url = f"{authority_node}unlock_transaction/"
-            response = requests.post(unlock_url)
-            if response.ok:
-                print(f"Transaction unlocked at {authority_node}.")
-            else:
-                print(f"Failed to unlock transaction at {authority_node}.")
+        result = await synchronize_from_peer(transchain, proposer)
     except Exception as e:
-        print(f"An error occurred during broadcast unlock: {e}")
+        logger.warning(f"Could not catch up with {proposer}: {e}")
+        return
+    if result == "nothing to synchronize":
+        logger.debug(f"Nothing to catch up with {proposer}")
+    else:
+        logger.info(f"Catching up with {proposer}: {result}")
+
+
+async def pull_commits(peer: str):
+    """
+    Catches up with a gossip peer, in case none of the peers forwarded a commit to this node.
+    """
+    schedule_catch_up(peer)
+    await catch_up_task
+
+
+@app.get("/topology")
+def get_topology():
+    """
+    Returns the authority set, the quorum and the peer addresses this node uses.
+    """
+    return topology.to_dict()
+
+
+@app.post("/topology/reload")
+async def reload_topology():
+    """
+    Reloads the topology file right away instead of waiting for the next periodic check.
+    """
+    return {"changed": apply_topology(), **topology.to_dict()}
+
 
-async def heartbeat_check():
-    global blocker
-    global blocker_set_time
+@app.get("/pending_tip")
+def pending_tip():
+    """
+    Returns the index and previous hash a new transaction has to use, including the transactions
+    waiting in the current batch of this authority.
+    """
+    index, previous_hash = pending_chain_tip()
+    return {"index": index, "previous_hash": previous_hash}
+
+
+@app.get("/tip_lock")
+def tip_lock_stats():
+    """
+    Returns the holder of the chain tip lease and the contention counters.
+    """
+    return tip_lock.stats()
+
+
+@app.get("/batching")
+def batching_stats():
+    return batcher.stats() if batcher is not None else {"max_size": 1}
+
+
+async def initiaze_lock_release():
+    global container_name
     global list_of_blockers
-    while True:
-        now = datetime.utcnow()
-        if blocker_set_time and (now - blocker_set_time) > heartbeat_interval:
-            print("Deadlock detected. Attempting to unlock...")
-            blocker = None
-            blocker_set_time = None
-            list_of_blockers = []
-        await asyncio.sleep(1)
+    if list_of_blockers and container_name == sorted(list_of_blockers)[0]:
+        await broadcast_unlock()
 
+async def broadcast_unlock():
+    global container_name
+    try:
+        for authority_node in topology.authorities:
+            response = await peer_client.post(authority_node, "/unlock_transaction/", idempotent=True)
+            if response.is_success:
+                logger.info(f"Transaction unlocked at {authority_node}.")
+            else:
+                logger.warning(f"Failed to unlock transaction at {authority_node}.")
+    except Exception as e:
+        logger.error(f"An error occurred during broadcast unlock: {e}")
@@ -0,0 +1,158 @@
+import heapq
+import itertools
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from models import Transaction
+
+
+def expiration_timestamp(expiration) -> float:
+    """
+    Converts the expiration of a transaction to a POSIX timestamp.
+
+    Args:
+        expiration (str): ISO formatted UTC time, or None.
+
+    Returns:
+        float: The timestamp, infinity if the transaction does not expire or the value cannot be parsed.
+    """
+    if not expiration:
+        return math.inf
+    try:
+        return (datetime.fromisoformat(expiration) - datetime(1970, 1, 1)).total_seconds()
+    except (TypeError, ValueError):
+        return math.inf
+
+
+class Mempool:
+    def __init__(self, max_size: int = 10000):
+        """
+        Pool of received transaction requests waiting to be accepted.
+        Requests are indexed by their hash, listed in arrival order and evicted once expired.
+
+        Args:
+            max_size (int): Maximum number of requests held at once.
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        # Heap of (expiration, sequence number, hash), entries of removed requests are skipped lazily
+        self.expirations = []
+        self.sequence = itertools.count()
+        self.evicted = 0
+        self.rejected = 0
+        # Sync endpoints change the pool from worker threads, async ones from the event loop
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, transaction_hash: str) -> bool:
+        return transaction_hash in self.entries
+
+    def _now(self) -> float:
+        return (datetime.utcnow() - datetime(1970, 1, 1)).total_seconds()
+
+    def add(self, transaction: Transaction) -> str:
+        """
+        Adds a transaction request.
+
+        Args:
+            transaction (Transaction): The received transaction.
+
+        Returns:
+            str: "added", "duplicate", "expired" or "full".
+        """
+        now = self._now()
+        with self.lock:
+            self._evict_expired(now)
+            transaction_hash = transaction.current_hash
+            if transaction_hash in self.entries:
+                self.rejected += 1
+                return "duplicate"
+            expiration = expiration_timestamp(transaction.expiration)
+            if expiration <= now:
+                self.rejected += 1
+                return "expired"
+            if len(self.entries) >= self.max_size:
+                self.rejected += 1
+                return "full"
+            self.entries[transaction_hash] = transaction
+            heapq.heappush(self.expirations, (expiration, next(self.sequence), transaction_hash))
+            return "added"
+
+    def evict_expired(self, now: float = None) -> int:
+        """
+        Removes all requests whose expiration has passed.
+
+        Returns:
+            int: The number of evicted requests.
+        """
+        now = self._now() if now is None else now
+        with self.lock:
+            return self._evict_expired(now)
+
+    def _evict_expired(self, now: float) -> int:
+        # The caller holds the lock
+        evicted = 0
+        while self.expirations and self.expirations[0][0] <= now:
+            _, _, transaction_hash = heapq.heappop(self.expirations)
+            if self.entries.pop(transaction_hash, None) is not None:
+                evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def _compact(self):
+        # The caller holds the lock. Rebuild the heap once most of its entries belong to removed requests
+        if len(self.expirations) > 2 * len(self.entries) + 64:
+            self.expirations = [entry for entry in self.expirations if entry[2] in self.entries]
+            heapq.heapify(self.expirations)
+
+    def get(self, transaction_hash: str):
+        """
+        Returns the request with the given hash, None if it is unknown or expired.
+        """
+        with self.lock:
+            self._evict_expired(self._now())
+            return self.entries.get(transaction_hash)
+
+    def at(self, position: int):
+        """
+        Returns the request at a position in arrival order, None if the position is out of range.
+        """
+        with self.lock:
+            self._evict_expired(self._now())
+            if position < 0 or position >= len(self.entries):
+                return None
+            return next(itertools.islice(self.entries.values(), position, None))
+
+    def remove(self, transaction_hash: str):
+        """
+        Removes a request, e.g. after it was accepted.
+
+        Returns:
+            Transaction: The removed request, None if it was not in the pool.
+        """
+        with self.lock:
+            transaction = self.entries.pop(transaction_hash, None)
+            self._compact()
+            return transaction
+
+    def page(self, offset: int = 0, limit: int = 100) -> list:
+        """
+        Returns a page of the requests in arrival order.
+
+        Args:
+            offset (int): Position of the first request.
+            limit (int): Maximum number of requests.
+
+        Returns:
+            list: The requests of the page.
+        """
+        with self.lock:
+            self._evict_expired(self._now())
+            offset = max(0, offset)
+            return list(itertools.islice(self.entries.values(), offset, offset + max(0, limit)))
+
+    def stats(self) -> dict:
+        return {"size": len(self.entries), "max_size": self.max_size, "evicted": self.evicted, "rejected": self.rejected}
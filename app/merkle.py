@@ -0,0 +1,205 @@
+import hashlib
+import threading
+
+# Leaves and inner nodes are hashed with different prefixes, so an inner node can never pass as a leaf
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+LEAF_SIZE = 32
+
+
+def leaf_hash(current_hash: str) -> bytes:
+    """
+    Returns the Merkle leaf of a transaction, which commits to its current hash.
+    """
+    return hashlib.sha256(LEAF_PREFIX + (current_hash or "").encode("utf-8")).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def merkle_root(nodes: list) -> bytes:
+    """
+    Computes the root of a Merkle tree over the given nodes, level by level.
+    The last node of a level with an odd number of nodes is carried up unchanged.
+
+    Args:
+        nodes (list): The leaf or subtree hashes, in order.
+
+    Returns:
+        bytes: The root, the hash of empty input if there are no nodes.
+    """
+    if not nodes:
+        return hashlib.sha256(b"").digest()
+    level = list(nodes)
+    while len(level) > 1:
+        paired = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def merkle_path(nodes: list, position: int) -> list:
+    """
+    Computes the path proving that the node at a position is part of the Merkle root over all nodes.
+
+    Args:
+        nodes (list): The leaf or subtree hashes, in order.
+        position (int): The position of the proven node.
+
+    Returns:
+        list: (side, hash) pairs from the bottom up, side tells whether the sibling is "left" or "right".
+    """
+    path = []
+    level = list(nodes)
+    while len(level) > 1:
+        sibling = position ^ 1
+        if sibling < len(level):
+            path.append(("left" if sibling < position else "right", level[sibling]))
+        paired = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+        position //= 2
+    return path
+
+
+def verify_proof(current_hash: str, path: list, root: str) -> bool:
+    """
+    Checks an inclusion proof without access to the chain, e.g. on a light client.
+
+    Args:
+        current_hash (str): The hash of the transaction, recomputed by the client from its fields.
+        path (list): The "path" of a proof returned by MerkleIndex.proof.
+        root (str): The hex encoded root of a checkpoint the client trusts.
+
+    Returns:
+        bool: True if the transaction is included under the root.
+    """
+    node = leaf_hash(current_hash)
+    for side, sibling in path:
+        sibling = bytes.fromhex(sibling)
+        node = node_hash(sibling, node) if side == "left" else node_hash(node, sibling)
+    return node.hex() == root
+
+
+class MerkleIndex:
+    def __init__(self, window_size: int = 256):
+        """
+        Merkle roots over fixed-size windows of the chain. The root of a window is computed once
+        when the window is complete, the checkpoint root is the Merkle root over all window roots.
+
+        Args:
+            window_size (int): Number of transactions per window.
+        """
+        self.window_size = window_size
+        # Leaf hashes stored back to back
+        self.leaves = bytearray()
+        self.window_roots = []
+        # Queries catch the index up on the event loop while syncs truncate it from worker threads
+        self.lock = threading.Lock()
+
+    @property
+    def height(self) -> int:
+        return len(self.leaves) // LEAF_SIZE
+
+    def apply(self, transaction):
+        """
+        Adds a transaction appended to the chain.
+
+        Args:
+            transaction (Transaction): The transaction appended to the chain.
+        """
+        self.leaves += leaf_hash(transaction.current_hash)
+        if self.height % self.window_size == 0:
+            self.window_roots.append(merkle_root(self._window_leaves(self.height // self.window_size - 1)))
+
+    def extend(self, transactions):
+        for transaction in transactions:
+            self.apply(transaction)
+
+    def truncate(self, height: int):
+        """
+        Drops all transactions from the given chain index onward, e.g. when the chain is replaced.
+        """
+        del self.leaves[height * LEAF_SIZE:]
+        del self.window_roots[height // self.window_size:]
+
+    def window_count(self) -> int:
+        """
+        Returns the number of windows, including a window that is not complete yet.
+        """
+        return -(-self.height // self.window_size)
+
+    def _window_leaves(self, window: int) -> list:
+        start = window * self.window_size
+        end = min(start + self.window_size, self.height)
+        return [bytes(self.leaves[position * LEAF_SIZE:(position + 1) * LEAF_SIZE]) for position in range(start, end)]
+
+    def window_root(self, window: int) -> bytes:
+        """
+        Returns the root of a window, computed on the fly if the window is not complete yet.
+
+        Raises:
+            IndexError: If the window does not exist.
+        """
+        if window < 0 or window >= self.window_count():
+            raise IndexError(f"window {window} out of range")
+        if window < len(self.window_roots):
+            return self.window_roots[window]
+        return merkle_root(self._window_leaves(window))
+
+    def _roots(self, windows: int = None) -> list:
+        count = self.window_count() if windows is None else max(0, min(windows, self.window_count()))
+        return self.window_roots[:count] + [self.window_root(window) for window in range(len(self.window_roots), count)]
+
+    def root(self, windows: int = None) -> bytes:
+        """
+        Returns the checkpoint root over the first `windows` windows.
+        Two chains with equal roots over k windows share their first k windows, so a divergence
+        can be located with a binary search over k.
+
+        Args:
+            windows (int): Number of leading windows covered, all windows if omitted.
+        """
+        return merkle_root(self._roots(windows))
+
+    def checkpoint(self, windows: int = None) -> dict:
+        """
+        Returns the checkpoint over the first `windows` windows, all windows if omitted.
+        """
+        roots = self._roots(windows)
+        return {
+            "height": min(self.height, len(roots) * self.window_size),
+            "window_size": self.window_size,
+            "windows": len(roots),
+            "root": merkle_root(roots).hex(),
+        }
+
+    def proof(self, index: int) -> dict:
+        """
+        Returns the proof that the transaction at a chain index is included under the current checkpoint root.
+
+        Args:
+            index (int): The chain index of the transaction.
+
+        Returns:
+            dict: The window of the transaction, the checkpoint root and the path from the leaf to the root.
+
+        Raises:
+            IndexError: If there is no transaction at the index.
+        """
+        if index < 0 or index >= self.height:
+            raise IndexError(f"index {index} out of range")
+        window = index // self.window_size
+        roots = self._roots()
+        path = merkle_path(self._window_leaves(window), index % self.window_size) + merkle_path(roots, window)
+        return {
+            "index": index,
+            "height": self.height,
+            "window": window,
+            "window_root": roots[window].hex(),
+            "root": merkle_root(roots).hex(),
+            "path": [(side, sibling.hex()) for side, sibling in path],
+        }
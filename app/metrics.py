@@ -0,0 +1,187 @@
+import bisect
+import math
+import threading
+import time
+
+# Upper bounds in seconds, from hashing (microseconds) up to consensus rounds and chain verification (seconds)
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Registry:
+    def __init__(self):
+        """
+        Collection of metrics rendered together in the Prometheus text format.
+        """
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registry served by the /metrics endpoint of the node
+REGISTRY = Registry()
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), function=None, registry: Registry = None):
+        """
+        Base of all metrics. Values are kept per combination of label values.
+
+        Args:
+            name (str): The metric name.
+            help (str): The description shown in the HELP line.
+            labelnames (tuple): Names of the labels every sample carries.
+            function (callable): Returns the current value when the metric is rendered, instead of a recorded value.
+            registry (Registry): The registry to add the metric to, REGISTRY if omitted.
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self.values = {}
+        # Metrics are also recorded from worker threads
+        self.lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """
+        Yields (name, label pairs, value) for every sample of the metric.
+        """
+        if self.function is not None:
+            yield self.name, (), self.function()
+            return
+        with self.lock:
+            values = list(self.values.items())
+        for key, value in values:
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS, registry: Registry = None):
+        """
+        Distribution of observed values over fixed buckets, e.g. durations in seconds.
+
+        Args:
+            buckets (tuple): Ascending upper bounds of the buckets, +Inf is added implicitly.
+        """
+        super().__init__(name, help, labelnames, registry=registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Count per bucket (not cumulative), sum and count
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][position] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """
+        Returns a context manager observing the duration of its block in seconds.
+        """
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self.lock:
+            values = [(key, (list(state[0]), state[1], state[2])) for key, state in self.values.items()]
+        for key, (counts, total, count) in values:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labels + (("le", _format_value(bound)),), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def route_label(path: str) -> str:
+    """
+    Returns the route of a request path with numeric segments replaced, to keep the number of label values small.
+    """
+    path = path.split("?", 1)[0]
+    return "/".join("{index}" if segment.isdigit() else segment for segment in path.split("/"))
+
+
+# Hot path timings, recorded by the modules doing the work
+HASH_SECONDS = Histogram("transchain_hash_seconds", "Time spent hashing transactions, per call.", ("call",))
+SIGN_SECONDS = Histogram("transchain_sign_seconds", "Time spent creating one RSA signature.")
+VERIFY_SIGNATURE_SECONDS = Histogram("transchain_verify_signature_seconds", "Time spent verifying one RSA signature.")
+CHAIN_VERIFY_SECONDS = Histogram("transchain_chain_verify_seconds", "Time spent verifying a received chain or chain suffix.")
+PEER_REQUEST_SECONDS = Histogram("transchain_peer_request_seconds", "Duration of HTTP calls to other nodes.", ("target", "route", "status"))
+TIP_LOCK_WAIT_SECONDS = Histogram("transchain_tip_lock_wait_seconds", "Time proposers waited for the chain tip lease.")
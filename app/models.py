@@ -1,6 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing import Optional, List
 
+# Fields covered by the hash of a transaction, in hashing order
+HASHED_FIELDS = ("index", "sender", "recipient", "amount", "previous_hash", "expiration")
+
 class Transaction(BaseModel):
     index: int
     sender: str
@@ -13,6 +16,22 @@ class Transaction(BaseModel):
     recipient_signature: Optional[str] = None
     timestamp: str
     authority_signature: Optional[str] = None
+    authority: Optional[str] = None
+    # Digest of the hashed fields, computed once by Transchain.calculate_hash
+    _digest: Optional[str] = PrivateAttr(default=None)
+
+    def __setattr__(self, name, value):
+        # A changed hashed field invalidates the cached digest
+        if name in HASHED_FIELDS and self.__pydantic_private__:
+            self.__pydantic_private__["_digest"] = None
+        super().__setattr__(name, value)
+
+    def model_copy(self, *, update=None, deep: bool = False):
+        # The copy shares the private attributes, an update of a hashed field bypasses __setattr__
+        copy = super().model_copy(update=update, deep=deep)
+        if update and any(name in HASHED_FIELDS for name in update) and copy.__pydantic_private__:
+            copy.__pydantic_private__["_digest"] = None
+        return copy
 
 class TransactionChain(BaseModel):
     transactions: List[Transaction]
@@ -29,6 +48,7 @@ class PrepareTransaction(BaseModel):
     recipient_signature: Optional[str] = None
     timestamp: str
     authority_signature: Optional[str] = None
+    authority: Optional[str] = None
     container_name: str
 
 class SendTransactionRequest(BaseModel):
@@ -36,11 +56,20 @@ class SendTransactionRequest(BaseModel):
     amount: float
 
 class AcceptTransactionRequest(BaseModel):
-    number: int
+    number: Optional[int] = None
+    current_hash: Optional[str] = None
 
 class ContainerName(BaseModel):
     name: str
 
 class SendMoney(BaseModel):
     name: str
-    amount: int
\ No newline at end of file
+    amount: int
+
+class ChainStatus(BaseModel):
+    name: str
+    height: int
+    tip_hash: str
+
+class PeerList(BaseModel):
+    peers: List[str]
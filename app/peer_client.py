@@ -0,0 +1,170 @@
+import asyncio
+import time
+import httpx
+from metrics import PEER_REQUEST_SECONDS, route_label
+from topology import topology
+
+DEFAULT_TIMEOUT = 5.0
+# Methods that can be sent again after a timeout without changing the outcome
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
+def peer_url(node: str) -> str:
+    """
+    Returns the base URL of a node from the cluster topology.
+
+    Args:
+        node (str): The name of the node.
+
+    Returns:
+        str: The base URL of the node without a trailing slash.
+    """
+    return topology.url(node)
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        """
+        Limits retries to a fraction of the requests, so a slow peer does not cause a retry storm.
+
+        Args:
+            ratio (float): Retries allowed per request.
+            max_tokens (float): Maximum number of retries that can be saved up.
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class PeerClient:
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, retries: int = 2, backoff: float = 0.05,
+                 max_connections: int = 100, max_keepalive_connections: int = 20):
+        """
+        Shared HTTP client for all calls to other nodes, with pooled keep-alive connections.
+
+        Args:
+            timeout (float): Default timeout of a call in seconds.
+            retries (int): Maximum number of retries of an idempotent call after a connection error or timeout.
+            backoff (float): Delay before the first retry, doubled for every further retry.
+            max_connections (int): Maximum number of open connections.
+            max_keepalive_connections (int): Maximum number of idle connections kept open.
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.retry_budget = RetryBudget()
+        self.client = None
+        self.sync_client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, follow_redirects=True)
+        return self.client
+
+    def _get_sync_client(self) -> httpx.Client:
+        if self.sync_client is None:
+            self.sync_client = httpx.Client(limits=self.limits, timeout=self.timeout, follow_redirects=True)
+        return self.sync_client
+
+    @staticmethod
+    def _observe(node: str, path: str, start: float, status):
+        PEER_REQUEST_SECONDS.observe(time.perf_counter() - start, target=node, route=route_label(path), status=status)
+
+    def _retries(self, method: str, retries: int, idempotent: bool) -> int:
+        if retries is not None:
+            return retries
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        # A timed out call may have been processed, so only calls that are safe to repeat are retried
+        return self.retries if idempotent else 0
+
+    async def request(self, method: str, node: str, path: str, timeout: float = None, retries: int = None,
+                      idempotent: bool = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request to a node, retrying connection errors and timeouts within the retry budget.
+        Only idempotent calls are retried by default.
+
+        Args:
+            method (str): The HTTP method.
+            node (str): The name of the node.
+            path (str): The path of the endpoint, starting with a slash.
+            timeout (float): Timeout of this call, the client default if omitted.
+            retries (int): Maximum number of retries of this call, overrides idempotent.
+            idempotent (bool): Whether the call can be repeated safely, true for GET requests if omitted.
+            **kwargs: Passed on to httpx (json, params, content, headers).
+
+        Returns:
+            httpx.Response: The response of the node.
+        """
+        retries = self._retries(method, retries, idempotent)
+        url = peer_url(node) + path
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = await self._get_client().request(method, url, timeout=timeout or self.timeout, **kwargs)
+                self._observe(node, path, start, response.status_code)
+                return response
+            except httpx.TransportError:
+                self._observe(node, path, start, "error")
+                if attempt >= retries or not self.retry_budget.withdraw():
+                    raise
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+
+    async def get(self, node: str, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", node, path, **kwargs)
+
+    async def post(self, node: str, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", node, path, **kwargs)
+
+    def request_sync(self, method: str, node: str, path: str, timeout: float = None, retries: int = None,
+                     idempotent: bool = None, **kwargs) -> httpx.Response:
+        """
+        Blocking variant of request for code that runs outside the event loop.
+        """
+        retries = self._retries(method, retries, idempotent)
+        url = peer_url(node) + path
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self._get_sync_client().request(method, url, timeout=timeout or self.timeout, **kwargs)
+                self._observe(node, path, start, response.status_code)
+                return response
+            except httpx.TransportError:
+                self._observe(node, path, start, "error")
+                if attempt >= retries or not self.retry_budget.withdraw():
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+
+    def get_sync(self, node: str, path: str, **kwargs) -> httpx.Response:
+        return self.request_sync("GET", node, path, **kwargs)
+
+    async def close(self):
+        """
+        Closes all pooled connections.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self.sync_client is not None:
+            self.sync_client.close()
+            self.sync_client = None
+
+
+# Client shared by all modules of a node
+peer_client = PeerClient()
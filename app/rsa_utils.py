@@ -1,7 +1,19 @@
+import hashlib
+import logging
+import os
+import time
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 from cryptography.hazmat.primitives.serialization import load_pem_public_key, load_pem_private_key
 from cryptography.exceptions import InvalidSignature
+from metrics import SIGN_SECONDS, VERIFY_SIGNATURE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Loaded signers keyed by private key file and parsed public keys keyed by PEM fingerprint
+_signers = {}
+_public_keys = {}
+MAX_CACHED_PUBLIC_KEYS = 1024
 
 def generate_rsa_keys(private_key_file: str, public_key_file: str):
     """
@@ -17,6 +29,7 @@ def generate_rsa_keys(private_key_file: str, public_key_file: str):
         key_size=2048
     )
     public_key = private_key.public_key()
+    _signers.pop(private_key_file, None)
     
     # Save the private key to a file
     with open(private_key_file, "wb") as file:
@@ -37,6 +50,23 @@ def generate_rsa_keys(private_key_file: str, public_key_file: str):
             )
         )
 
+def ensure_rsa_keys(private_key_file: str, public_key_file: str) -> bool:
+    """
+    Generate RSA key pairs unless both key files already exist.
+    A restarted node keeps its key pair, so peers that pinned its public key still accept it.
+
+    Args:
+        private_key_file (str): Path to the file holding the private key.
+        public_key_file (str): Path to the file holding the public key.
+
+    Returns:
+        bool: True if a new key pair was generated.
+    """
+    if os.path.exists(private_key_file) and os.path.exists(public_key_file):
+        return False
+    generate_rsa_keys(private_key_file, public_key_file)
+    return True
+
 def load_public_key(public_key_file: str) -> str:
     """
     Load the public key from a PEM file.
@@ -66,9 +96,78 @@ def load_private_key(file_path: str):
             password=None
         )
 
+class Signer:
+    def __init__(self, private_key_file: str):
+        """
+        Load the private key once so it can be used for many signatures.
+
+        Args:
+            private_key_file (str): Path to the PEM file containing the private key.
+        """
+        self.private_key_file = private_key_file
+        self.private_key = load_private_key(private_key_file)
+
+    def sign(self, data: str) -> str:
+        """
+        Sign the given data with the loaded private key.
+
+        Args:
+            data (str): The data to be signed.
+
+        Returns:
+            str: The signature in hexadecimal format.
+        """
+        start = time.perf_counter()
+        try:
+            signature = self.private_key.sign(
+                data.encode('utf-8'),
+                padding.PKCS1v15(),
+                hashes.SHA256()
+            )
+
+            return signature.hex()
+        except Exception as e:
+            logger.error(f"Error during data signing: {e}")
+            raise
+        finally:
+            SIGN_SECONDS.observe(time.perf_counter() - start)
+
+    def sign_many(self, items: list, executor=None) -> list:
+        """
+        Sign several pieces of data, in parallel if an executor is given.
+
+        Args:
+            items (list): The data to be signed.
+            executor (Executor): Optional thread pool used to sign in parallel.
+
+        Returns:
+            list: The signatures in hexadecimal format, in the order of the items.
+        """
+        if executor is None:
+            return [self.sign(data) for data in items]
+        return list(executor.map(self.sign, items))
+
+
+def get_signer(private_key_file: str) -> Signer:
+    """
+    Return the signer of a private key file, loading the key on first use.
+
+    Args:
+        private_key_file (str): Path to the PEM file containing the private key.
+
+    Returns:
+        Signer: The signer holding the loaded private key.
+    """
+    signer = _signers.get(private_key_file)
+    if signer is None:
+        signer = Signer(private_key_file)
+        _signers[private_key_file] = signer
+    return signer
+
 def sign_data(private_key_file: str, data: str) -> str:
     """
     Sign the given data using the private key from a PEM file.
+    The key is only read from disk on the first call.
 
     Args:
         private_key_file (str): Path to the PEM file containing the private key.
@@ -77,27 +176,39 @@ def sign_data(private_key_file: str, data: str) -> str:
     Returns:
         str: The signature in hexadecimal format.
     """
-    try:
-        private_key = load_private_key(private_key_file)
+    return get_signer(private_key_file).sign(data)
 
-        # Sign the data
-        signature = private_key.sign(
-            data.encode('utf-8'),
-            padding.PKCS1v15(),
-            hashes.SHA256()
-        )
+def public_key_fingerprint(public_key_pem: str) -> bytes:
+    """
+    Return the SHA-256 fingerprint of a PEM encoded public key.
+    """
+    return hashlib.sha256(public_key_pem.encode("utf-8")).digest()
 
-        return signature.hex()
-    except Exception as e:
-        print(f"Error during data signing: {e}")
-        raise
+def load_cached_public_key(public_key_pem: str):
+    """
+    Parse a PEM encoded public key, reusing the parsed key of an earlier call.
+
+    Args:
+        public_key_pem (str): The PEM encoded public key as a string.
+
+    Returns:
+        PublicKey: The loaded public key object.
+    """
+    fingerprint = public_key_fingerprint(public_key_pem)
+    public_key = _public_keys.get(fingerprint)
+    if public_key is None:
+        public_key = load_pem_public_key(public_key_pem.encode("utf-8"))
+        if len(_public_keys) >= MAX_CACHED_PUBLIC_KEYS:
+            _public_keys.pop(next(iter(_public_keys)))
+        _public_keys[fingerprint] = public_key
+    return public_key
 
-def verify_signature(public_key_pem: str, signature_hex: str, data_hash: str) -> bool:
+def verify_signature(public_key_pem, signature_hex: str, data_hash: str) -> bool:
     """
     Verify the signature of the given data using the provided public key.
 
     Args:
-        public_key_pem (str): The PEM encoded public key as a string.
+        public_key_pem (str | PublicKey): The PEM encoded public key as a string or an already loaded public key.
         signature_hex (str): The signature in hexadecimal format.
         data_hash (str): The hash of the data to verify against.
 
@@ -105,8 +216,12 @@ def verify_signature(public_key_pem: str, signature_hex: str, data_hash: str) ->
         bool: True if the signature is valid, False otherwise.
     """
 
+    start = time.perf_counter()
     try:
-        public_key = load_pem_public_key(public_key_pem.encode("utf-8"))
+        if isinstance(public_key_pem, str):
+            public_key = load_cached_public_key(public_key_pem)
+        else:
+            public_key = public_key_pem
 
         signature = bytes.fromhex(signature_hex)
 
@@ -123,5 +238,7 @@ def verify_signature(public_key_pem: str, signature_hex: str, data_hash: str) ->
         return False
     except Exception as e:
 
-        print(f"Error during signature verification: {e}")
+        logger.warning(f"Error during signature verification: {e}")
         return False
+    finally:
+        VERIFY_SIGNATURE_SECONDS.observe(time.perf_counter() - start)
@@ -0,0 +1,184 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from metrics import TIP_LOCK_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Lease:
+    __slots__ = ("token", "holder", "acquired_at", "expires_at", "timer")
+
+    def __init__(self, token: int, holder: str, duration: float):
+        """
+        Exclusive right of a proposer to extend the chain tip until it is released or expires.
+
+        Args:
+            token (int): Unique token of the lease, needed to release it.
+            holder (str): The node the lease was granted to.
+            duration (float): Seconds until the lease expires.
+        """
+        self.token = token
+        self.holder = holder
+        self.acquired_at = time.monotonic()
+        self.expires_at = self.acquired_at + duration
+        self.timer = None
+
+
+class TipLock:
+    def __init__(self, lease_duration: float = 5.0):
+        """
+        Lease manager around the chain tip. Only one proposer at a time may run a consensus round
+        on the tip, waiting proposers are served in arrival order.
+
+        Args:
+            lease_duration (float): Seconds after which a lease that was not released expires.
+        """
+        self.lease_duration = lease_duration
+        self.lease = None
+        self.waiters = deque()
+        self.tokens = itertools.count(1)
+        self.acquired = 0
+        self.contended = 0
+        self.rejected = 0
+        self.expired = 0
+        self.released = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def holder(self):
+        """
+        The node holding the current lease, None if the tip is free.
+        """
+        return self.lease.holder if self.lease is not None else None
+
+    def _grant(self, holder: str) -> Lease:
+        lease = Lease(next(self.tokens), holder, self.lease_duration)
+        lease.timer = asyncio.get_running_loop().call_later(self.lease_duration, self._expire, lease.token)
+        self.lease = lease
+        self.acquired += 1
+        return lease
+
+    def _expire(self, token: int):
+        if self.lease is not None and self.lease.token == token:
+            logger.warning(f"Lease of {self.lease.holder} on the chain tip expired")
+            self.expired += 1
+            self._hand_over()
+
+    def _hand_over(self):
+        """
+        Ends the current lease and grants the next one to the longest waiting proposer.
+        """
+        if self.lease is not None and self.lease.timer is not None:
+            self.lease.timer.cancel()
+        self.lease = None
+        while self.waiters:
+            holder, future = self.waiters.popleft()
+            # Skip proposers that gave up waiting
+            if not future.done():
+                future.set_result(self._grant(holder))
+                return
+
+    def _has_waiters(self) -> bool:
+        # Drop proposers at the head of the queue that gave up waiting
+        while self.waiters and self.waiters[0][1].done():
+            self.waiters.popleft()
+        return bool(self.waiters)
+
+    def try_acquire(self, holder: str):
+        """
+        Acquires the lease without waiting. A holder that already owns the lease gets it again.
+
+        Args:
+            holder (str): The node asking for the lease.
+
+        Returns:
+            Lease: The granted lease, None if the tip is locked by another node.
+        """
+        if self.lease is not None and self.lease.holder == holder:
+            return self.lease
+        if self.lease is None and not self._has_waiters():
+            return self._grant(holder)
+        self.rejected += 1
+        return None
+
+    async def acquire(self, holder: str, timeout: float = None):
+        """
+        Waits in line for the lease.
+
+        Args:
+            holder (str): The node asking for the lease.
+            timeout (float): Maximum seconds to wait, no limit if omitted.
+
+        Returns:
+            Lease: The granted lease, None if it was not granted within the timeout.
+        """
+        if self.lease is None and not self._has_waiters():
+            TIP_LOCK_WAIT_SECONDS.observe(0.0)
+            return self._grant(holder)
+
+        self.contended += 1
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((holder, future))
+        try:
+            lease = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return None
+        finally:
+            waited = time.monotonic() - start
+            TIP_LOCK_WAIT_SECONDS.observe(waited)
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return lease
+
+    def release(self, token: int) -> bool:
+        """
+        Releases a lease. A lease that already expired or was released is not touched.
+
+        Args:
+            token (int): The token of the lease.
+
+        Returns:
+            bool: True if the lease was still held and is now released.
+        """
+        if self.lease is None or self.lease.token != token:
+            return False
+        self.released += 1
+        self._hand_over()
+        return True
+
+    def release_holder(self, holder: str = None) -> bool:
+        """
+        Releases the lease of a node, e.g. once its transaction was committed.
+
+        Args:
+            holder (str): The node whose lease is released, the current lease regardless of its holder if omitted.
+
+        Returns:
+            bool: True if a lease was released.
+        """
+        if self.lease is None or (holder is not None and self.lease.holder != holder):
+            return False
+        return self.release(self.lease.token)
+
+    def stats(self) -> dict:
+        """
+        Returns the contention counters of the lock.
+        """
+        return {
+            "holder": self.holder,
+            "queued": sum(1 for _, future in self.waiters if not future.done()),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "released": self.released,
+            "total_wait_ms": round(self.total_wait * 1000, 3),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "mean_wait_ms": round(self.total_wait * 1000 / self.contended, 3) if self.contended else 0.0,
+        }
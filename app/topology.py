@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUTHORITIES = ["fastapi_app_2", "fastapi_app_3", "fastapi_app_4"]
+DEFAULT_PORT = 8000
+
+
+def parse_peer_addresses(value: str) -> dict:
+    """
+    Parses peer addresses of the form "name=host:port,name=host:port".
+
+    Args:
+        value (str): The comma separated list of addresses.
+
+    Returns:
+        dict: The host and port of every named node.
+    """
+    addresses = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, address = item.split("=", 1)
+            addresses[name.strip()] = address.strip()
+    return addresses
+
+
+def parse_names(value: str) -> list:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def quorum_size(authorities: int, rule="majority") -> int:
+    """
+    Returns how many authorities have to approve a transaction.
+
+    Args:
+        authorities (int): The number of authorities.
+        rule (str | int): "majority", "all-but-one", "all" or a fixed number of approvals.
+
+    Returns:
+        int: The number of approvals, at least 1 and at most the number of authorities.
+
+    Raises:
+        ValueError: If the rule is unknown.
+    """
+    if rule == "majority":
+        size = authorities // 2 + 1
+    elif rule == "all-but-one":
+        size = authorities - 1
+    elif rule == "all":
+        size = authorities
+    else:
+        try:
+            size = int(rule)
+        except (TypeError, ValueError):
+            raise ValueError(f"unknown quorum rule {rule!r}")
+    return max(1, min(size, authorities))
+
+
+class Topology:
+    def __init__(self, authorities: list, addresses: dict = None, port: int = DEFAULT_PORT, quorum="majority", path: str = None):
+        """
+        Membership of the cluster: the authority set, where every node is reached and the quorum rule.
+        The object is shared by all modules of a node and updated in place when the membership changes.
+
+        Args:
+            authorities (list): The names of the authority nodes.
+            addresses (dict): "host:port" per node name, nodes without an address are reached as "name:port".
+            port (int): The port of nodes without an address.
+            quorum (str | int): The quorum rule, see quorum_size.
+            path (str): The topology file the membership was loaded from, if any.
+        """
+        self.authorities = list(dict.fromkeys(authorities))
+        self.addresses = dict(addresses or {})
+        self.port = port
+        self.quorum_rule = quorum
+        self.path = path
+        self.mtime = None
+        self.version = 1
+        # Checked here so a bad rule is reported when the topology is loaded, not during consensus
+        quorum_size(len(self.authorities), quorum)
+
+    @classmethod
+    def from_env(cls, env=None) -> "Topology":
+        """
+        Loads the topology from TOPOLOGY_FILE if it is set, otherwise from AUTHORITY_NODES,
+        PEER_ADDRESSES, PEER_PORT and QUORUM.
+        """
+        env = os.environ if env is None else env
+        if env.get("TOPOLOGY_FILE"):
+            return cls.from_file(env["TOPOLOGY_FILE"])
+        return cls(
+            parse_names(env.get("AUTHORITY_NODES", "")) or DEFAULT_AUTHORITIES,
+            parse_peer_addresses(env.get("PEER_ADDRESSES", "")),
+            int(env.get("PEER_PORT", DEFAULT_PORT)),
+            env.get("QUORUM", "majority"),
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "Topology":
+        """
+        Loads the topology from a JSON file of the form
+        {"authorities": [...], "addresses": {"name": "host:port"}, "port": 8000, "quorum": "majority"}.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a valid topology.
+        """
+        with open(path) as file:
+            data = json.load(file)
+        if not isinstance(data, dict) or not data.get("authorities"):
+            raise ValueError(f"{path} does not list any authorities")
+        topology = cls(data["authorities"], data.get("addresses"), int(data.get("port", DEFAULT_PORT)), data.get("quorum", "majority"), path)
+        topology.mtime = os.stat(path).st_mtime
+        return topology
+
+    @property
+    def quorum(self) -> int:
+        """
+        The number of approvals needed to commit a transaction.
+        """
+        return quorum_size(len(self.authorities), self.quorum_rule)
+
+    def is_authority(self, node: str) -> bool:
+        return node in self.authorities
+
+    def url(self, node: str) -> str:
+        """
+        Returns the base URL of a node without a trailing slash.
+        """
+        address = self.addresses.get(node)
+        return f"http://{address}" if address else f"http://{node}:{self.port}"
+
+    def update(self, other: "Topology") -> bool:
+        """
+        Takes over the membership of another topology.
+
+        Returns:
+            bool: True if the authority set, the addresses or the quorum changed.
+        """
+        changed = (self.authorities, self.addresses, self.port, self.quorum_rule) != (other.authorities, other.addresses, other.port, other.quorum_rule)
+        self.authorities = other.authorities
+        self.addresses = other.addresses
+        self.port = other.port
+        self.quorum_rule = other.quorum_rule
+        self.mtime = other.mtime
+        if changed:
+            self.version += 1
+        return changed
+
+    def reload(self) -> bool:
+        """
+        Reloads the topology file if it was modified since it was loaded.
+        A file that cannot be loaded is reported and the current membership is kept.
+
+        Returns:
+            bool: True if the membership changed.
+        """
+        if self.path is None:
+            return False
+        try:
+            if os.stat(self.path).st_mtime == self.mtime:
+                return False
+            changed = self.update(Topology.from_file(self.path))
+        except (OSError, ValueError) as e:
+            logger.error(f"Keeping the current topology, {self.path} could not be loaded: {e}")
+            return False
+        if changed:
+            logger.info(f"Topology changed: {len(self.authorities)} authorities, quorum {self.quorum}")
+        return changed
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "authorities": self.authorities,
+            "quorum": self.quorum,
+            "quorum_rule": self.quorum_rule,
+            "addresses": self.addresses,
+            "port": self.port,
+            "file": self.path,
+        }
+
+
+# Topology shared by all modules of a node
+topology = Topology.from_env()
@@ -1,17 +1,87 @@
 from datetime import datetime
 import hashlib
-import requests
-from models import Transaction, TransactionChain
+import logging
+import threading
+import time
+from models import Transaction, TransactionChain, HASHED_FIELDS
 from rsa_utils import *
+from balance_ledger import BalanceLedger
+from key_registry import KeyRegistry, AuthorityKeyring
+from chain_verifier import ChainVerifier
+from chain_store import PersistentChain
+from compact_chain import CompactChain
+from merkle import MerkleIndex
+from chain_feed import ChainFeed
+from account_index import AccountIndex
+from metrics import CHAIN_VERIFY_SECONDS, HASH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Transactions read from the chain at once while the account index catches up
+ACCOUNT_INDEX_CHUNK = 1000
+
+def canonical_encoding(index, sender, recipient, amount, previous_hash, expiration) -> bytes:
+    """
+    Encodes the hashed fields of a transaction unambiguously. Every field is written as
+    "<number of characters>:<value>" and a missing field as "-", so no two different
+    transactions share an encoding.
+
+    Returns:
+        bytes: The bytes the transaction hash is computed from.
+    """
+    index = str(int(index))
+    amount = repr(float(amount))
+    return (f"{len(index)}:{index}{len(sender)}:{sender}{len(recipient)}:{recipient}{len(amount)}:{amount}"
+            f"{'-' if previous_hash is None else f'{len(previous_hash)}:{previous_hash}'}"
+            f"{'-' if expiration is None else f'{len(expiration)}:{expiration}'}").encode("utf-8")
+
 
 class Transchain:
-    def __init__(self, AUTHORITY_NODES):
+    def __init__(self, AUTHORITY_NODES, store=None, compact=False, merkle_window=256, feed_capacity=1024):
         """
-        Initialize the Transchain with a genesis transaction and an empty list for authority public keys.
+        Initialize the Transchain with a genesis transaction and a keyring for the authority public keys.
+        If a ChainStore is given, the chain is read from and appended to the store.
+        With compact=True the chain is kept in memory in a columnar CompactChain.
+        Merkle roots are kept over windows of merkle_window transactions.
+        The last feed_capacity appended transactions are kept for subscribers.
         """
-        self.transaction_chain = TransactionChain(transactions=[self.create_genesis_transaction()])
-        self.authority_public_keys = []
+        self.store = store
+        self.compact = compact
+        if store is None and compact:
+            self.transaction_chain = CompactChain([self.create_genesis_transaction()])
+        elif store is None:
+            self.transaction_chain = TransactionChain(transactions=[self.create_genesis_transaction()])
+        else:
+            self.transaction_chain = PersistentChain(store)
+            if len(store) == 0:
+                self.transaction_chain.transactions.append(self.create_genesis_transaction())
         self.AUTHORITY_NODES = AUTHORITY_NODES
+        self.authority_keyring = AuthorityKeyring(AUTHORITY_NODES)
+        self.key_registry = KeyRegistry()
+        self.chain_verifier = ChainVerifier()
+        self.ledger = BalanceLedger()
+        self.load_ledger()
+        self.merkle = MerkleIndex(merkle_window)
+        self.feed = ChainFeed(feed_capacity, len(self.transaction_chain.transactions))
+        # Built on the first account query, then kept up to date on every append
+        self.accounts = AccountIndex()
+        # Held across every change of the chain and its indexes, ledger and feed. Commits append on
+        # the event loop while synchronizations run in worker threads. Taken before the index locks.
+        self.chain_lock = threading.RLock()
+
+
+    def load_ledger(self):
+        """
+        Builds the balance index on startup.
+        With a store, the last snapshot is loaded and only the transactions after it are applied.
+        """
+        snapshot = self.store.load_snapshot() if self.store is not None else None
+        if snapshot is None:
+            self.ledger.rebuild(self.transaction_chain.transactions)
+            return
+        self.ledger.load(snapshot["balances"], snapshot["height"])
+        for transaction in self.transaction_chain.transactions[snapshot["height"]:]:
+            self.ledger.apply(transaction)
 
 
     def create_genesis_transaction(self) -> Transaction:
@@ -39,90 +109,193 @@ class Transchain:
         return Transaction(**transaction_data)
 
 
-    def fetch_authority_public_keys(self):
-        """
-        Fetches public keys from all authority nodes and stores them in the list.
-        """
-        for node_url in self.AUTHORITY_NODES:
-            try:
-                print(f"Fetching public key from {node_url}")
-                response = requests.get(f"{node_url}/public_key")
-                if response.status_code == 200:
-                    public_key = response.json().get("public_key")
-                    self.authority_public_keys.append(public_key)
-            except Exception as e:
-                print(f"Error fetching public key from {node_url}: {e}")
-
-
-    def calculate_hash(self, data: dict) -> str:
+    def calculate_hash(self, data) -> str:
         """
         Calculates the hash of a given block/transaction data.
+        The digest of a Transaction is cached on the object.
 
         Args:
-            data (dict): The data for which the hash needs to be calculated.
+            data (dict | Transaction): The data for which the hash needs to be calculated.
 
         Returns:
-            str: The SHA-256 hash of the concatenated string representation of the data.
+            str: The SHA-256 hash of the canonical encoding of the hashed fields.
         """
-        # Define the order and keys to be used for hashing
-        keywords = ["index", "sender", "recipient", "amount", "previous_hash", "expiration"]
-        string_to_hash = ''.join(str(data.get(keyword, '')) for keyword in keywords)
+        start = time.perf_counter()
+        if isinstance(data, Transaction):
+            digest = self._hash_all([data])[0]
+        else:
+            digest = hashlib.sha256(canonical_encoding(*(data.get(field) for field in HASHED_FIELDS))).hexdigest()
+        HASH_SECONDS.observe(time.perf_counter() - start, call="calculate_hash")
+        return digest
 
-        return hashlib.sha256(string_to_hash.encode('utf-8')).hexdigest()
 
+    def hash_many(self, transactions) -> list:
+        """
+        Calculates the hashes of many transactions in one pass, e.g. of a received chain.
 
-    def verify_transchain(self, transchain_to_check) -> bool:
+        Args:
+            transactions (iterable): Transactions as Transaction objects or dicts.
+
+        Returns:
+            list: The hash of every transaction, in order.
+        """
+        start = time.perf_counter()
+        hashes = self._hash_all(transactions)
+        HASH_SECONDS.observe(time.perf_counter() - start, call="hash_many")
+        return hashes
+
+
+    def _hash_all(self, transactions) -> list:
+        sha256 = hashlib.sha256
+        hashes = []
+        for transaction in transactions:
+            if isinstance(transaction, Transaction):
+                # Access the private attribute storage directly, pydantic's attribute lookup is much slower
+                private = transaction.__pydantic_private__
+                digest = private.get("_digest")
+                if digest is None:
+                    digest = private["_digest"] = sha256(canonical_encoding(
+                        transaction.index, transaction.sender, transaction.recipient,
+                        transaction.amount, transaction.previous_hash, transaction.expiration)).hexdigest()
+            else:
+                digest = sha256(canonical_encoding(*(transaction.get(field) for field in HASHED_FIELDS))).hexdigest()
+            hashes.append(digest)
+        return hashes
+
+
+    def verify_transchain(self, transchain_to_check, index_offset: int = 0) -> bool:
         """
         Verifies the entire transaction chain for consistency and integrity.
+        Hashes and linkage are checked first, the signatures are then verified in parallel.
+
+        Args:
+            transchain_to_check (TransactionChain): The chain to verify.
+            index_offset (int): Chain index of the first transaction if only a part of a chain is checked.
 
         Returns:
             bool: True if the chain is valid, False otherwise.
         """
-        self.fetch_authority_public_keys()
-        transchain_to_check = [transaction.dict() for transaction in transchain_to_check.transactions]
-        for i in range(1, len(transchain_to_check)):
-            current_transaction = transchain_to_check[i]
-            previous_transaction = transchain_to_check[i - 1]
+        with CHAIN_VERIFY_SECONDS.time():
+            self.authority_keyring.ensure_loaded()
+            self.key_registry.prefetch_chain(transchain_to_check)
+            return self.chain_verifier.verify(list(transchain_to_check.transactions), self.hash_many, self.key_registry, self.authority_keyring, index_offset)
 
-            # Verify the current hash
-            if current_transaction['current_hash'] != self.calculate_hash(transchain_to_check[i]):
-                print(f"Invalid hash at index {i}")
-                return False
 
-            # Verify the chaining
-            if current_transaction['previous_hash'] != previous_transaction['current_hash']:
-                return False
+    def _catch_up_merkle(self):
+        transactions = self.transaction_chain.transactions
+        if self.merkle.height < len(transactions):
+            self.merkle.extend(transactions[self.merkle.height:])
 
-            # Verify sender signature
-            sender_public_key = self.get_public_key_from_node(current_transaction['sender'])
-            if not verify_signature(sender_public_key, current_transaction['sender_signature'], current_transaction['current_hash']):
-                print(f"Invalid sender signature at index {i}")
-                return False
 
-            # Verify recipient signature
-            recipient_public_key = self.get_public_key_from_node(current_transaction['recipient'])
-            if not verify_signature(recipient_public_key, current_transaction['recipient_signature'], current_transaction['current_hash']):
-                print(f"Invalid recipient signature at index {i}")
-                return False
+    def merkle_checkpoint(self, windows: int = None) -> dict:
+        """
+        Returns the Merkle checkpoint over the first windows of the chain, all windows if omitted.
+        The transactions appended since the last query are hashed first.
+        """
+        with self.merkle.lock:
+            self._catch_up_merkle()
+            return self.merkle.checkpoint(windows)
 
-            # Verify authority signature - At least one must be valid
-            valid_authority_signature = False
-            for authority_public_key in self.authority_public_keys:
-                if verify_signature(authority_public_key, current_transaction['authority_signature'], current_transaction['current_hash']):
-                    valid_authority_signature = True
-                    break 
 
-            if not valid_authority_signature:
-                print(f"Invalid authority signature at index {i}")
-                return False
+    def merkle_window(self, window: int) -> tuple:
+        """
+        Returns the root of a window of the chain and whether the window is complete.
 
-        return True
+        Raises:
+            IndexError: If the window does not exist.
+        """
+        with self.merkle.lock:
+            self._catch_up_merkle()
+            return self.merkle.window_root(window), window < len(self.merkle.window_roots)
 
 
+    def merkle_proof(self, index: int) -> dict:
+        """
+        Returns the hash of the transaction at a chain index with the proof of its inclusion under the current checkpoint root.
+
+        Raises:
+            IndexError: If there is no transaction at the index.
+        """
+        with self.merkle.lock:
+            self._catch_up_merkle()
+            proof = self.merkle.proof(index)
+            return {"current_hash": self.transaction_chain.transactions[index].current_hash, **proof}
+
+
+    def _catch_up_accounts(self):
+        """
+        Brings the account index up to the chain in chunks. The chunks are read from the chain without
+        holding the lock of the index, so an append waits for at most one chunk to be applied.
+        Once the index is caught up, every append keeps it up to date.
+        """
+        while True:
+            with self.accounts.lock:
+                start, generation = self.accounts.height, self.accounts.generation
+                end = min(len(self.transaction_chain.transactions), start + ACCOUNT_INDEX_CHUNK)
+                if start >= end:
+                    return
+            try:
+                chunk = self.transaction_chain.transactions[start:end]
+            except IndexError:
+                # The chain was truncated while the chunk was read
+                continue
+            with self.accounts.lock:
+                # Drop the chunk if a sync rewrote the chain in the meantime
+                if self.accounts.height == start and self.accounts.generation == generation:
+                    self.accounts.extend(chunk)
+
+
+    def _query_accounts(self, query):
+        """
+        Runs a query on the account index once it is caught up with the chain, holding its lock.
+        """
+        while True:
+            self._catch_up_accounts()
+            with self.accounts.lock:
+                # A sync can have rolled the index back since the catch up
+                if self.accounts.height == len(self.transaction_chain.transactions):
+                    return query()
+
+
+    def account_history(self, account: str, from_index: int = 0, limit: int = 100, before: int = None) -> tuple:
+        """
+        Returns a page of the transactions of an account from the account index.
+
+        Args:
+            account (str): The sender or recipient.
+            from_index (int): Oldest chain index of the page, used if before is omitted.
+            limit (int): Maximum number of transactions.
+            before (int): Returns the newest transactions below this chain index instead, newest first.
+
+        Returns:
+            tuple: The number of transactions of the account and a list of (transaction, balance after it) pairs.
+        """
+        def query():
+            transactions = self.transaction_chain.transactions
+            page = self.accounts.history(account, from_index, limit, before)
+            return self.accounts.count(account), [(transactions[index], balance) for index, balance in page]
+
+        return self._query_accounts(query)
+
+
+    def balance_at(self, account: str, height: int) -> float:
+        """
+        Returns the balance of an account after the first height transactions of the chain.
+        """
+        return self._query_accounts(lambda: self.accounts.balance_at(account, height))
+
+
+    def set_authorities(self, AUTHORITY_NODES):
+        """
+        Replaces the authority set whose signatures are accepted, e.g. after the topology changed.
+        """
+        self.AUTHORITY_NODES = AUTHORITY_NODES
+        self.authority_keyring.set_authorities(AUTHORITY_NODES)
+
 
     def get_public_key_from_node(self, node: str) -> str:
         """
-        Fetches the public key of a given node.
+        Returns the public key of a given node from the key registry.
 
         Args:
             node (str): The node from which to fetch the public key.
@@ -130,74 +303,74 @@ class Transchain:
         Returns:
             str: The public key in PEM format.
         """
-        try:
-            response = requests.get(f"http://{node}:8000/public_key")
-            response.raise_for_status()
-            return response.json().get('public_key')
-        except requests.RequestException as e:
-            print(f"Error fetching public key from {node}: {e}")
-            return ""
+        return self.key_registry.get_pem(node)
     
 
-    def verify_transaction(self, transaction_data) -> bool:
+    def chain_tip(self):
+        """
+        Returns the index and hash a new transaction has to build on.
+
+        Returns:
+            tuple: The next chain index and the current hash of the last transaction.
+        """
+        return len(self.transaction_chain.transactions), self.transaction_chain.transactions[-1].current_hash
+
+
+    def verify_transaction(self, transaction_data, tip=None, fetch=True) -> bool:
         """
         Verifies the transaction by checking its hash, signatures, and other validation criteria.
         
         - **transaction_data**: Type !Dict!.
-        - **PRIVATE_KEY_FILE**: Path to the private key file for signing.
+        - **tip**: Next index and previous hash the transaction must build on, the chain tip if omitted.
+        - **fetch**: Fetch missing keys over the network. Callers on the event loop prefetch the keys
+          asynchronously and pass False, a key that is still missing then fails the check.
         
         Returns:
             - `bool`: `True` if the transaction is valid, `False` otherwise.
         """
+        expected_index, expected_previous_hash = tip or self.chain_tip()
         transaction_hash = self.calculate_hash(transaction_data)
         # Check if the current hash matches
         if transaction_hash != transaction_data["current_hash"]:
             return False
         # Check if the previous hash matches the last transaction's current hash
-        if transaction_data["previous_hash"] != self.transaction_chain.transactions[-1].current_hash:
+        if transaction_data["previous_hash"] != expected_previous_hash:
             return False
         # Check if the transaction index matches the length of the chain
-        print("g")
-        if transaction_data["index"] != len(self.transaction_chain.transactions):
+        if transaction_data["index"] != expected_index:
             return False
-        try:
-            # Get sender's public key
-            sender_response = requests.get(f"http://{transaction_data['sender']}:8000/public_key")
-            sender_response.raise_for_status()
-            sender_public_key_pem = sender_response.json()['public_key']
-            
-            # Get recipient's public key
-            recipient_response = requests.get(f"http://{transaction_data['recipient']}:8000/public_key")
-            recipient_response.raise_for_status()
-            recipient_public_key_pem = recipient_response.json()['public_key']
-        
-        except requests.RequestException as e:
-            print(f"Error retrieving public keys: {e}")
+        # Get sender's and recipient's public keys
+        if fetch:
+            self.key_registry.prefetch([transaction_data['sender'], transaction_data['recipient']])
+        sender_public_key = self.key_registry.get_key(transaction_data['sender'], fetch)
+        recipient_public_key = self.key_registry.get_key(transaction_data['recipient'], fetch)
+        if sender_public_key is None or recipient_public_key is None:
+            logger.warning("Error retrieving public keys")
             return False
         
         # Verify sender's and recipient's signatures
-        if not verify_signature(sender_public_key_pem, transaction_data['sender_signature'], transaction_hash):
-            print("Invalid sender signature")
+        if not verify_signature(sender_public_key, transaction_data['sender_signature'], transaction_hash):
+            logger.warning("Invalid sender signature")
             return False
         
-        if not verify_signature(recipient_public_key_pem, transaction_data['recipient_signature'], transaction_hash):
-            print("Invalid recipient signature")
+        if not verify_signature(recipient_public_key, transaction_data['recipient_signature'], transaction_hash):
+            logger.warning("Invalid recipient signature")
             return False
         return True
     
 
-    def verify_auth_transaction(self, transaction_data):
+    def verify_auth_transaction(self, transaction_data, tip=None):
         """
         Verifies the transaction by checking its hash, signatures, and other validation criteria.
         
         - **transaction**: The transaction to verify.
+        - **tip**: Next index and previous hash the transaction must build on, the chain tip if omitted.
         
         Returns:
             - `bool`: `True` if the transaction is valid and updated, `False` otherwise.
             - If valid, the updated transaction data is returned; otherwise, `False`.
         """
-        self.fetch_authority_public_keys()
-
+        expected_index, expected_previous_hash = tip or self.chain_tip()
         transaction_hash = self.calculate_hash(transaction_data)
 
         # Check if the current hash matches
@@ -205,30 +378,211 @@ class Transchain:
             return False
 
         # Check if the previous hash matches the last transaction's current hash
-        if transaction_data["previous_hash"] != self.transaction_chain.transactions[-1].current_hash:
+        if transaction_data["previous_hash"] != expected_previous_hash:
             return False
 
         # Check if the transaction index matches the length of the chain
-        if transaction_data["index"] != len(self.transaction_chain.transactions):
+        if transaction_data["index"] != expected_index:
             return False
-        valid_authority_signature = False
-        for authority_public_key in self.authority_public_keys:
-            if verify_signature(authority_public_key, transaction_data['authority_signature'], transaction_data['current_hash']):
-                valid_authority_signature = True
-                break 
-        if not valid_authority_signature:
+        if not self.authority_keyring.verify(transaction_data['authority_signature'], transaction_data['current_hash'], transaction_data.get('authority')):
             return False
         return True
 
 
+    def verify_auth_batch(self, transactions_data: list, tip=None) -> bool:
+        """
+        Verifies a batch of consecutive transactions that is applied as a whole.
+
+        - **transactions_data**: The transactions of the batch as dictionaries, in chain order.
+        - **tip**: Next index and previous hash the batch must build on, the chain tip if omitted.
+
+        Returns:
+            - `bool`: `True` if every transaction of the batch is valid, `False` otherwise.
+        """
+        tip = tip or self.chain_tip()
+        for transaction_data in transactions_data:
+            if not self.verify_auth_transaction(transaction_data, tip):
+                return False
+            tip = (tip[0] + 1, transaction_data["current_hash"])
+        return True
+
+
+    def append_batch(self, transactions: list, tip: tuple = None) -> bool:
+        """
+        Appends a verified batch of transactions to the chain.
+
+        Args:
+            transactions (list): The transactions of the batch, in chain order.
+            tip (tuple): The chain tip the batch was verified against. Nothing is appended if the chain moved since.
+
+        Returns:
+            bool: True if the batch was appended.
+        """
+        with self.chain_lock:
+            if tip is not None and self.chain_tip() != tip:
+                return False
+            for transaction in transactions:
+                self.append_transaction(transaction)
+        return True
+
+
+    def append_transaction(self, transaction: Transaction):
+        """
+        Appends a verified transaction to the chain and updates the balance index.
+
+        Args:
+            transaction (Transaction): The transaction to append.
+        """
+        with self.chain_lock:
+            with self.accounts.lock:
+                self.transaction_chain.transactions.append(transaction)
+                # An index that was never queried is built on the first query instead
+                if self.accounts.height == len(self.transaction_chain.transactions) - 1:
+                    self.accounts.apply(transaction)
+            self.ledger.apply(transaction)
+            self.feed.append(transaction)
+            if self.store is not None and self.store.snapshot_due():
+                self.store.write_snapshot(self.ledger.height, self.ledger.balances)
+
+
+    def replace_chain(self, transaction_chain):
+        """
+        Replaces the local chain with another chain and rebuilds the balance index.
+        The indexes and the feed keep the transactions both chains share.
+
+        Args:
+            transaction_chain (TransactionChain): The chain that becomes the local chain.
+        """
+        with self.chain_lock:
+            # The indexes are rolled back together with the chain, so no query sees a mix of both chains
+            with self.accounts.lock, self.merkle.lock:
+                fork = self.fork_index(transaction_chain.transactions)
+                if self.store is None and self.compact:
+                    self.transaction_chain = CompactChain(transaction_chain.transactions)
+                elif self.store is None:
+                    self.transaction_chain = transaction_chain
+                else:
+                    self.transaction_chain.transactions.truncate(fork)
+                    for transaction in transaction_chain.transactions[fork:]:
+                        self.transaction_chain.transactions.append(transaction)
+                self.accounts.truncate(fork)
+                self.merkle.truncate(fork)
+            self.ledger.rebuild(transaction_chain.transactions)
+            self.feed.reset(fork, len(self.transaction_chain.transactions))
+            if self.store is not None:
+                self.store.write_snapshot(self.ledger.height, self.ledger.balances)
+
+    def fork_index(self, transactions, start: int = 0) -> int:
+        """
+        Returns the position in the given transactions at which they first differ from the local chain.
+        Every hash covers the previous hash, so the chains agree up to the last index with an equal hash.
+
+        Args:
+            transactions (list): Transactions of another chain.
+            start (int): Chain index of the first of the transactions.
+        """
+        local = self.transaction_chain.transactions
+        low, high = 0, min(len(local) - start, len(transactions))
+        while low < high:
+            middle = (low + high) // 2
+            if local[start + middle].current_hash == transactions[middle].current_hash:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+    def truncate_chain(self, height: int):
+        """
+        Removes all transactions from the given chain index onward and rebuilds the balance index.
+
+        Args:
+            height (int): The number of transactions to keep.
+        """
+        with self.chain_lock:
+            with self.accounts.lock, self.merkle.lock:
+                if self.store is not None:
+                    self.transaction_chain.transactions.truncate(height)
+                elif self.compact:
+                    self.transaction_chain = CompactChain(self.transaction_chain.transactions[:height])
+                else:
+                    del self.transaction_chain.transactions[height:]
+                self.accounts.truncate(height)
+                self.merkle.truncate(height)
+            self.ledger.rebuild(self.transaction_chain.transactions)
+            self.feed.reset(height, height)
+            if self.store is not None:
+                self.store.write_snapshot(self.ledger.height, self.ledger.balances)
+
+
     def synchronize(self, transchain):
         if not self.verify_transchain(transchain):
             return "Transchain not valid"
-        if len(transchain.transactions) > len(self.transaction_chain.transactions):
-            self.transaction_chain = transchain 
+        # Commits may have been appended while the chain was verified
+        with self.chain_lock:
+            if len(transchain.transactions) > len(self.transaction_chain.transactions):
+                self.replace_chain(transchain)
+        return "Synchronized"
+
+
+    def synchronize_suffix(self, start: int, transactions: list):
+        """
+        Adopts the transactions of a longer chain that shares the first `start` transactions with the local chain.
+        Only the new transactions are verified.
+
+        Args:
+            start (int): Chain index of the first transaction in `transactions`.
+            transactions (list): The transactions of the other chain from `start` onward.
+
+        Returns:
+            str: The result of the synchronization.
+        """
+        if start + len(transactions) <= len(self.transaction_chain.transactions):
+            return "nothing to synchronize"
+        if start == 0:
+            return self.synchronize(TransactionChain(transactions=transactions))
+
+        anchor = self.transaction_chain.transactions[start - 1]
+        if not self.verify_transchain(TransactionChain(transactions=[anchor] + transactions), index_offset=start - 1):
+            return "Transchain not valid"
+
+        # The chain may have changed while the suffix was verified, commits it holds are kept
+        with self.chain_lock:
+            local = self.transaction_chain.transactions
+            if len(local) < start or local[start - 1].current_hash != anchor.current_hash:
+                return "Transchain not valid"
+            if start + len(transactions) <= len(local):
+                return "nothing to synchronize"
+            fork = start + self.fork_index(transactions, start)
+            if fork < len(local):
+                self.truncate_chain(fork)
+            for transaction in transactions[fork - start:]:
+                self.append_transaction(transaction)
         return "Synchronized"
     
     def calculate_balance(self, node_name: str):
+        """
+        Returns the balance of a node from the balance index.
+
+        Args:
+            node_name (str): The node whose balance is requested.
+
+        Returns:
+            float: The current balance of the node.
+        """
+        return self.ledger.balance(node_name)
+
+    def recalculate_balance(self, node_name: str):
+        """
+        Recomputes the balance of a node by scanning the whole chain.
+        Used to check the balance index against the chain.
+
+        Args:
+            node_name (str): The node whose balance is requested.
+
+        Returns:
+            float: The balance of the node according to the chain.
+        """
         balance = 0
         for transaction in self.transaction_chain.transactions:
             if transaction.sender == transaction.recipient == node_name:
@@ -240,7 +594,11 @@ class Transchain:
                 balance += transaction.amount
         return balance
     
-    def validate_deposit(self, transaction: Transaction, container_name: str) -> bool:
+    def validate_deposit(self, transaction: Transaction, container_name: str, fetch: bool = True) -> bool:
+        """
+        Checks that a deposit is signed by the depositing node as sender and recipient.
+        With fetch=False a key missing from the registry fails the check instead of being fetched.
+        """
         transaction_data = transaction.model_dump() if not isinstance(transaction, dict) else transaction
 
         # Check if the sender and recipient are the same as the container name
@@ -250,14 +608,16 @@ class Transchain:
             return False
         
         # Retrieve the public key of the container
-        public_key_pem = self.get_public_key_from_node(container_name)
+        public_key = self.key_registry.get_key(container_name, fetch)
+        if public_key is None:
+            return False
         
         # Validate the sender's signature
-        if not verify_signature(public_key_pem, transaction_data['sender_signature'], transaction_data['current_hash']):
+        if not verify_signature(public_key, transaction_data['sender_signature'], transaction_data['current_hash']):
             return False
         
         # Validate the recipient's signature
-        if not verify_signature(public_key_pem, transaction_data['recipient_signature'], transaction_data['current_hash']):
+        if not verify_signature(public_key, transaction_data['recipient_signature'], transaction_data['current_hash']):
             return False
         
         # If all checks passed, return True
@@ -0,0 +1,329 @@
+import json
+import os
+import struct
+import sys
+from array import array
+from models import PrepareTransaction, Transaction, TransactionChain
+
+JSON = "application/json"
+BINARY = "application/x-transchain"
+
+JSON_HEADERS = {"content-type": JSON}
+# Format used for requests between nodes, external clients always use JSON
+PEER_MEDIA_TYPE = JSON if os.getenv("PEER_WIRE_FORMAT", "binary") == "json" else BINARY
+PEER_HEADERS = {"content-type": PEER_MEDIA_TYPE, "accept": f"{PEER_MEDIA_TYPE}, {JSON};q=0.5"}
+
+# Optional fields of a transaction record, in encoding order
+FIELDS = (
+    "sender", "recipient", "expiration", "timestamp", "authority",
+    "previous_hash", "current_hash", "sender_signature", "recipient_signature", "authority_signature",
+)
+# Every record starts with the index, the amount, a bitmask of missing fields,
+# a bitmask of fields stored as raw bytes instead of hex, and the byte length of every field
+RECORD_HEADER = struct.Struct("<qdHH" + "I" * len(FIELDS))
+NAME_LENGTH = struct.Struct("<H")
+# A chain is sent column by column: the indexes, the amounts, then one column per optional field
+CHAIN_HEADER = struct.Struct("<4sI")
+CHAIN_MAGIC = b"TXC1"
+# Every column starts with its type, the value width of hex columns and the number of
+# missing values (hex columns) or the size of the value table (dictionary columns)
+COLUMN_HEADER = struct.Struct("<BHI")
+BLOB_LENGTH = struct.Struct("<Q")
+HEX_COLUMN = 1
+DICTIONARY_COLUMN = 2
+STRING_COLUMN = 3
+
+
+def encode_json(data) -> bytes:
+    """
+    Encodes a JSON document compactly, to be sent with JSON_HEADERS as the body of a request.
+    """
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def is_binary(content_type: str) -> bool:
+    return bool(content_type) and content_type.split(";", 1)[0].strip() == BINARY
+
+
+def accepts_binary(accept: str) -> bool:
+    return bool(accept) and BINARY in accept
+
+
+def _encode_record(data: dict, parts: list):
+    missing = 0
+    raw = 0
+    lengths = []
+    payloads = []
+    for bit, field in enumerate(FIELDS):
+        value = data.get(field)
+        if value is None:
+            missing |= 1 << bit
+            lengths.append(0)
+            continue
+        payload = None
+        # Hashes and signatures are lowercase hex, send them as the raw bytes
+        if field in ("previous_hash", "current_hash") or field.endswith("_signature"):
+            if len(value) % 2 == 0:
+                try:
+                    payload = bytes.fromhex(value)
+                except ValueError:
+                    payload = None
+                if payload is not None and payload.hex() == value:
+                    raw |= 1 << bit
+                else:
+                    payload = None
+        if payload is None:
+            payload = value.encode("utf-8")
+        lengths.append(len(payload))
+        payloads.append(payload)
+    parts.append(RECORD_HEADER.pack(data["index"], data["amount"], missing, raw, *lengths))
+    parts.extend(payloads)
+
+
+def _decode_record(view: memoryview, offset: int):
+    header = RECORD_HEADER.unpack_from(view, offset)
+    index, amount, missing, raw = header[:4]
+    offset += RECORD_HEADER.size
+    data = {"index": index, "amount": amount}
+    bit = 1
+    for field, length in zip(FIELDS, header[4:]):
+        if offset + length > len(view):
+            raise ValueError("truncated transaction record")
+        if missing & bit:
+            data[field] = None
+        elif raw & bit:
+            data[field] = view[offset:offset + length].hex()
+        else:
+            data[field] = str(view[offset:offset + length], "utf-8")
+        offset += length
+        bit <<= 1
+    return data, offset
+
+
+def encode_transaction(data: dict) -> bytes:
+    parts = []
+    _encode_record(data, parts)
+    return b"".join(parts)
+
+
+def decode_transaction(body: bytes) -> dict:
+    data, _ = _decode_record(memoryview(body), 0)
+    return data
+
+
+def encode_prepare(data: dict) -> bytes:
+    name = data["container_name"].encode("utf-8")
+    return encode_transaction(data) + NAME_LENGTH.pack(len(name)) + name
+
+
+def decode_prepare(body: bytes) -> dict:
+    view = memoryview(body)
+    data, offset = _decode_record(view, 0)
+    (length,) = NAME_LENGTH.unpack_from(view, offset)
+    offset += NAME_LENGTH.size
+    data["container_name"] = str(view[offset:offset + length], "utf-8")
+    return data
+
+
+def _array(typecode: str, values=()) -> array:
+    return array(typecode, values)
+
+
+def _pack_array(values: array) -> bytes:
+    # Arrays are sent little endian
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack_array(typecode: str, view: memoryview, offset: int, count: int):
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    if end > len(view):
+        raise ValueError("truncated array")
+    values.frombytes(view[offset:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+def _hex_width(values: list):
+    # Width in bytes if every present value is lowercase hex of one common width
+    width = None
+    for value in values:
+        if value is None:
+            continue
+        if width is None:
+            width = len(value) // 2
+        if len(value) != 2 * width:
+            return None
+    return width
+
+
+def _encode_column(values: list, parts: list):
+    width = _hex_width(values)
+    if width:
+        missing = [position for position, value in enumerate(values) if value is None]
+        placeholder = "00" * width
+        try:
+            raw = bytes.fromhex("".join(placeholder if value is None else value for value in values))
+        except ValueError:
+            raw = None
+        if raw is not None and raw.hex() == "".join(placeholder if value is None else value for value in values):
+            parts.append(COLUMN_HEADER.pack(HEX_COLUMN, width, len(missing)))
+            parts.append(_pack_array(_array("I", missing)))
+            parts.append(raw)
+            return
+    distinct = set(values)
+    if len(distinct) * 4 <= len(values):
+        table = list(distinct)
+        ids = {value: position for position, value in enumerate(table)}
+        parts.append(COLUMN_HEADER.pack(DICTIONARY_COLUMN, 0, len(table)))
+        _encode_strings(table, parts)
+        parts.append(_pack_array(_array("I", [ids[value] for value in values])))
+        return
+    parts.append(COLUMN_HEADER.pack(STRING_COLUMN, 0, 0))
+    _encode_strings(values, parts)
+
+
+def _encode_strings(values: list, parts: list):
+    encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+    parts.append(_pack_array(_array("i", [-1 if value is None else len(data) for value, data in zip(values, encoded)])))
+    blob = b"".join(encoded)
+    parts.append(BLOB_LENGTH.pack(len(blob)))
+    parts.append(blob)
+
+
+def _decode_strings(view: memoryview, offset: int, count: int):
+    lengths, offset = _unpack_array("i", view, offset, count)
+    (size,) = BLOB_LENGTH.unpack_from(view, offset)
+    offset += BLOB_LENGTH.size
+    if offset + size > len(view) or sum(length for length in lengths if length > 0) != size:
+        raise ValueError("string lengths do not match the blob")
+    blob = bytes(view[offset:offset + size])
+    text = blob.decode("utf-8")
+    # Only ASCII text can be sliced at byte offsets
+    source = text if len(text) == len(blob) else blob
+    values = []
+    position = 0
+    for length in lengths:
+        if length < 0:
+            values.append(None)
+            continue
+        value = source[position:position + length]
+        values.append(value if source is text else value.decode("utf-8"))
+        position += length
+    return values, offset + size
+
+
+def _decode_column(view: memoryview, offset: int, count: int):
+    kind, width, size = COLUMN_HEADER.unpack_from(view, offset)
+    offset += COLUMN_HEADER.size
+    if kind == HEX_COLUMN:
+        missing, offset = _unpack_array("I", view, offset, size)
+        end = offset + count * width
+        if end > len(view):
+            raise ValueError("truncated hex column")
+        text = view[offset:end].hex()
+        step = 2 * width
+        values = [text[position:position + step] for position in range(0, count * step, step)]
+        for position in missing:
+            values[position] = None
+        return values, end
+    if kind == DICTIONARY_COLUMN:
+        table, offset = _decode_strings(view, offset, size)
+        ids, offset = _unpack_array("I", view, offset, count)
+        return [table[value] for value in ids], offset
+    if kind == STRING_COLUMN:
+        return _decode_strings(view, offset, count)
+    raise ValueError(f"unknown column type {kind}")
+
+
+def encode_chain(transactions) -> bytes:
+    """
+    Encodes a list of transactions, given as dicts or Transaction models, column by column.
+    Hashes and signatures become raw bytes and repeated names are sent once.
+    """
+    records = [transaction if isinstance(transaction, dict) else transaction.model_dump() for transaction in transactions]
+    parts = [CHAIN_HEADER.pack(CHAIN_MAGIC, len(records))]
+    parts.append(_pack_array(_array("q", [record["index"] for record in records])))
+    parts.append(_pack_array(_array("d", [record["amount"] for record in records])))
+    for field in FIELDS:
+        _encode_column([record.get(field) for record in records], parts)
+    return b"".join(parts)
+
+
+def decode_chain(body: bytes) -> list:
+    """
+    Decodes a list of transactions into dicts.
+
+    Raises:
+        ValueError: If the body is not an encoded chain.
+    """
+    view = memoryview(body)
+    magic, count = CHAIN_HEADER.unpack_from(view, 0)
+    if magic != CHAIN_MAGIC:
+        raise ValueError("not an encoded transaction chain")
+    offset = CHAIN_HEADER.size
+    indexes, offset = _unpack_array("q", view, offset, count)
+    amounts, offset = _unpack_array("d", view, offset, count)
+    columns = [indexes.tolist(), amounts.tolist()]
+    for _ in FIELDS:
+        values, offset = _decode_column(view, offset, count)
+        columns.append(values)
+    keys = ("index", "amount") + FIELDS
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def dump_transaction(data: dict, media_type: str) -> bytes:
+    return encode_transaction(data) if media_type == BINARY else encode_json(data)
+
+
+def load_transaction(body: bytes, media_type: str) -> Transaction:
+    """
+    Parses a transaction in the given format.
+
+    Raises:
+        pydantic.ValidationError: If the body is not a valid transaction.
+    """
+    if is_binary(media_type):
+        return Transaction.model_validate(_checked(decode_transaction, body))
+    return Transaction.model_validate_json(body)
+
+
+def dump_prepare(data: dict, media_type: str) -> bytes:
+    return encode_prepare(data) if media_type == BINARY else encode_json(data)
+
+
+def load_prepare(body: bytes, media_type: str) -> PrepareTransaction:
+    if is_binary(media_type):
+        return PrepareTransaction.model_validate(_checked(decode_prepare, body))
+    return PrepareTransaction.model_validate_json(body)
+
+
+def dump_chain(transactions: list, media_type: str) -> bytes:
+    if media_type == BINARY:
+        return encode_chain(transactions)
+    return encode_json({"transactions": [t if isinstance(t, dict) else t.model_dump() for t in transactions]})
+
+
+def load_chain(body: bytes, media_type: str) -> list:
+    """
+    Parses a list of transactions in the given format, a JSON body holds a transaction chain object.
+
+    Returns:
+        list: The transactions as Transaction models.
+    """
+    if is_binary(media_type):
+        return [Transaction(**data) for data in _checked(decode_chain, body)]
+    return TransactionChain.model_validate_json(body).transactions
+
+
+def _checked(decode, body: bytes):
+    # Report malformed binary bodies the same way as invalid JSON, out of range
+    # dictionary ids and missing positions raise IndexError
+    try:
+        return decode(body)
+    except (struct.error, ValueError, UnicodeDecodeError, IndexError, KeyError) as e:
+        raise ValueError(f"malformed {BINARY} body: {e}")
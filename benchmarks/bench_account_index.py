@@ -0,0 +1,61 @@
+"""
+Compares account queries through the account index with scanning the chain.
+The chain grows while the number of transactions per account is kept constant, so the
+indexed lookups should not get slower while the scans grow with the chain.
+
+Usage:
+    python benchmarks/bench_account_index.py [transactions per account]
+"""
+import sys
+import time
+
+from chain_fixtures import AUTHORITY_NODES, build_chain
+from models import TransactionChain
+from transchain import Transchain
+
+CHAIN_LENGTHS = [1000, 10000, 100000]
+REPEAT = 200
+
+
+def scan_history(transactions, account: str, limit: int) -> list:
+    return [transaction for transaction in transactions if account in (transaction.sender, transaction.recipient)][:limit]
+
+
+def timed(function, repeat: int = REPEAT) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    per_account = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    print(f"transactions per account: ~{per_account}")
+    print("  chain  index build ms  history us  scan history us  balance at us  scan balance us")
+    for length in CHAIN_LENGTHS:
+        # More parties on a longer chain, every account keeps about the same number of transactions
+        source, _ = build_chain(length, parties=max(2, length // per_account), signed=False)
+        transchain = Transchain(AUTHORITY_NODES)
+        transchain.replace_chain(TransactionChain.model_construct(transactions=source.transaction_chain.transactions))
+        transactions = transchain.transaction_chain.transactions
+        account = transactions[length // 2].sender
+        height = length // 2
+
+        start = time.perf_counter()
+        transchain.balance_at(account, 0)
+        build = time.perf_counter() - start
+
+        count, page = transchain.account_history(account, 0, 100)
+        assert [transaction for transaction, _ in page] == scan_history(transactions, account, 100)
+        assert transchain.balance_at(account, len(transactions)) == transchain.calculate_balance(account)
+
+        history = timed(lambda: transchain.account_history(account, 0, 100))
+        scan = timed(lambda: scan_history(transactions, account, 100), repeat=5)
+        balance = timed(lambda: transchain.balance_at(account, height))
+        scan_balance = timed(lambda: transchain.recalculate_balance(account), repeat=5)
+        print(f"{length:7d}  {build * 1000:14.1f}  {history * 1e6:10.1f}  {scan * 1e6:15.0f}  {balance * 1e6:13.2f}  {scan_balance * 1e6:15.0f}")
+
+
+if __name__ == "__main__":
+    main()
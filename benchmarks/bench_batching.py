@@ -0,0 +1,73 @@
+"""
+Measures the commit throughput of the transaction batcher against the batch size.
+Every consensus round costs a simulated network round trip for the prepare and one for the commit,
+the verification, signing and chain updates are the real code paths.
+
+Usage:
+    python benchmarks/bench_batching.py [transactions] [round trip ms]
+"""
+import asyncio
+import sys
+import time
+
+from chain_fixtures import AUTHORITY, AUTHORITY_NODES, build_chain, generate_key, register_keys, sign
+from batcher import TransactionBatcher
+from models import Transaction
+from transchain import Transchain
+
+BATCH_SIZES = [1, 10, 100, 1000]
+
+
+def new_node(public_keys: dict, authority_pem: str) -> Transchain:
+    transchain = Transchain(AUTHORITY_NODES)
+    register_keys(transchain, {name: pem for name, pem in public_keys.items() if name != AUTHORITY})
+    transchain.authority_keyring.register(AUTHORITY, authority_pem)
+    return transchain
+
+
+async def run(transactions: list, public_keys: dict, authority_key, authority_pem: str, batch_size: int, round_trip: float) -> float:
+    leader = new_node(public_keys, authority_pem)
+    follower = new_node(public_keys, authority_pem)
+
+    async def commit_batch(batch: list) -> bool:
+        # Prepare and commit round trips
+        await asyncio.sleep(2 * round_trip)
+        for node in (leader, follower):
+            if not node.verify_auth_batch(batch):
+                return False
+            node.append_batch([Transaction(**transaction_data) for transaction_data in batch])
+        return True
+
+    batcher = TransactionBatcher(leader, commit_batch, max_size=batch_size, max_wait=round_trip)
+
+    async def submit(transaction_data: dict) -> bool:
+        tip = batcher.pending_tip()
+        if not leader.verify_transaction(transaction_data, tip):
+            return False
+        transaction_data["authority_signature"] = sign(authority_key, transaction_data["current_hash"])
+        return await batcher.submit(transaction_data)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(submit(dict(transaction_data)) for transaction_data in transactions))
+    elapsed = time.perf_counter() - start
+    assert all(results), "batch was rejected"
+    assert len(follower.transaction_chain.transactions) == len(transactions) + 1
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    round_trip = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+    source, public_keys = build_chain(count)
+    transactions = [transaction.model_dump() for transaction in source.transaction_chain.transactions[1:]]
+    authority_key, authority_pem = generate_key()
+
+    print(f"transactions: {count}, round trip: {round_trip * 1000:.1f} ms")
+    print("batch size  seconds    tx/s")
+    for batch_size in BATCH_SIZES:
+        elapsed = asyncio.run(run(transactions, public_keys, authority_key, authority_pem, batch_size, round_trip))
+        print(f"{batch_size:10d}  {elapsed:7.3f}  {count / elapsed:6.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the memory used by the pydantic TransactionChain and the CompactChain backend.
+
+Usage:
+    python benchmarks/bench_chain_memory.py [number of transactions]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from chain_fixtures import AUTHORITY
+from compact_chain import CompactChain
+from models import Transaction, TransactionChain
+from transchain import Transchain
+
+
+def generate_transactions(count: int, parties: int = 1000):
+    """
+    Generate a linked chain of transactions with random signatures of realistic size.
+    """
+    transchain = Transchain([])
+    names = [f"fastapi_app_{i}" for i in range(parties)]
+    start = datetime(2024, 1, 1)
+    previous_hash = transchain.transaction_chain.transactions[0].current_hash
+    yield transchain.transaction_chain.transactions[0]
+    for i in range(1, count):
+        transaction_data = {
+            "index": i,
+            "sender": names[i % parties],
+            "recipient": names[(i * 7 + 3) % parties],
+            "amount": float(i % 100),
+            "previous_hash": previous_hash,
+            "expiration": (start + timedelta(seconds=i, minutes=10)).isoformat(),
+        }
+        transaction_data["current_hash"] = transchain.calculate_hash(transaction_data)
+        transaction_data["sender_signature"] = os.urandom(256).hex()
+        transaction_data["recipient_signature"] = os.urandom(256).hex()
+        transaction_data["authority_signature"] = os.urandom(256).hex()
+        transaction_data["timestamp"] = (start + timedelta(seconds=i)).isoformat()
+        transaction_data["authority"] = AUTHORITY
+        previous_hash = transaction_data["current_hash"]
+        yield Transaction(**transaction_data)
+
+
+def measure(name: str, build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    chain = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:16s} {current / 2**20:10.1f} MiB {current / len(chain.transactions):10.0f} B/tx {elapsed:8.1f} s")
+    return chain
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"transactions: {count}")
+    compact = measure("CompactChain", lambda: CompactChain(generate_transactions(count)))
+    del compact
+    measure("TransactionChain", lambda: TransactionChain(transactions=list(generate_transactions(count))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Measures the throughput of chain verification against the number of worker processes.
+
+Usage:
+    python benchmarks/bench_chain_verifier.py [chain length]
+"""
+import os
+import sys
+import time
+
+from chain_fixtures import build_chain, register_keys
+from chain_verifier import ChainVerifier
+from models import TransactionChain
+
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source, public_keys = build_chain(length)
+    chain = TransactionChain(transactions=list(source.transaction_chain.transactions))
+    register_keys(source, public_keys)
+
+    print(f"chain length: {length}, cores: {os.cpu_count()}")
+    print("workers  seconds  tx/s")
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        source.chain_verifier = ChainVerifier(max_workers=workers)
+        start = time.perf_counter()
+        assert source.verify_transchain(chain)
+        elapsed = time.perf_counter() - start
+        source.chain_verifier.shutdown()
+        print(f"{workers:7d}  {elapsed:7.3f}  {length / elapsed:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
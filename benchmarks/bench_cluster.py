@@ -0,0 +1,221 @@
+"""
+Drives scripted workloads against a local cluster and reports throughput, commit latency
+percentiles and chain sync time as JSON, so runs can be compared across commits.
+
+Workloads, in order:
+    join      every client but the last one joins an authority
+    deposit   deposits from all clients, sent with the given concurrency
+    transfer  send and accept transfers between two clients, one at a time
+    sync      the last client joins and catches up with the whole chain
+
+The workloads run once per authority count, e.g. with --authorities 3,7,15 to see how
+consensus latency scales with the size of the authority set.
+
+Usage:
+    python benchmarks/bench_cluster.py [--authorities 3] [--clients 3] [--deposits 50] [--transfers 20]
+        [--concurrency 4] [--batch-size 1] [--wire-format binary] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import subprocess
+import time
+from collections import Counter
+
+import httpx
+
+from cluster import LocalCluster
+
+
+def percentile(samples: list, quantile: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+
+
+def summarize(latencies: list, errors: Counter, seconds: float) -> dict:
+    """
+    Returns the count, throughput and latency percentiles in milliseconds of a workload,
+    and how often every kind of failure occurred.
+    """
+    result = {"ok": len(latencies), "failed": sum(errors.values()), "seconds": round(seconds, 3),
+              "tx_per_s": round(len(latencies) / seconds, 2) if seconds > 0 else 0.0}
+    if errors:
+        result["errors"] = dict(errors)
+    if latencies:
+        result["latency_ms"] = {name: round(percentile(latencies, quantile) * 1000, 2)
+                                for name, quantile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))}
+    return result
+
+
+def failure(response) -> str:
+    """
+    Returns why a request failed, None if it succeeded.
+    """
+    if isinstance(response, Exception):
+        return type(response).__name__
+    if not response.is_success:
+        return f"HTTP {response.status_code}"
+    message = response.json().get("message")
+    if isinstance(message, dict):
+        message = message.get("detail") or message.get("message")
+    return None if message in ("Deposit validated successfully", "transaction accepted") else str(message)
+
+
+async def timed(request) -> tuple:
+    start = time.perf_counter()
+    try:
+        response = await request
+        return response, time.perf_counter() - start
+    except httpx.HTTPError as e:
+        return e, time.perf_counter() - start
+
+
+async def wait_for_height(client: httpx.AsyncClient, url: str, height: int, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if (await client.get(url + "/chain/status")).json()["height"] >= height:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+async def run_join(client: httpx.AsyncClient, cluster: LocalCluster, members: list) -> dict:
+    authority = cluster.url(cluster.authorities[0])
+    latencies, errors = [], Counter()
+    start = time.perf_counter()
+    for name in members:
+        response, seconds = await timed(client.post(authority + "/join", json={"name": name}))
+        if isinstance(response, httpx.Response) and response.is_success:
+            latencies.append(seconds)
+        else:
+            errors[failure(response)] += 1
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_deposits(client: httpx.AsyncClient, cluster: LocalCluster, members: list, count: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def deposit(number: int):
+        name = members[number % len(members)]
+        async with semaphore:
+            return await timed(client.post(cluster.url(name) + "/deposit_money", json={"name": name, "amount": 100}))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(deposit(number) for number in range(count)))
+    seconds = time.perf_counter() - start
+    latencies, errors = [], Counter()
+    for response, latency in results:
+        reason = failure(response)
+        if reason is None:
+            latencies.append(latency)
+        else:
+            errors[reason] += 1
+    return summarize(latencies, errors, seconds)
+
+
+async def run_transfers(client: httpx.AsyncClient, cluster: LocalCluster, sender: str, recipient: str, count: int) -> dict:
+    """
+    Sends and accepts transfers one at a time. The commit latency is the duration of the accept call,
+    which returns once the authorities committed the transaction.
+    The sender is funded with one deposit first, outside the measurement.
+    """
+    funding, _ = await timed(client.post(cluster.url(sender) + "/deposit_money", json={"name": sender, "amount": count}))
+    latencies, end_to_end, errors = [], [], Counter()
+    if failure(funding) is not None:
+        errors[f"funding: {failure(funding)}"] += 1
+    start = time.perf_counter()
+    for _ in range(count):
+        height = (await client.get(cluster.url(sender) + "/chain/status")).json()["height"]
+        transfer_start = time.perf_counter()
+        response, _ = await timed(client.post(cluster.url(sender) + "/send_transaction/", json={"container": recipient, "amount": 1}))
+        if not isinstance(response, httpx.Response) or not response.is_success:
+            errors[f"send: {failure(response)}"] += 1
+            continue
+        response, seconds = await timed(client.post(cluster.url(recipient) + "/accept_transaction/", json={"number": 0}))
+        reason = failure(response)
+        # The next transfer builds on the sender's chain, wait until the commit reached it
+        if reason is None and not await wait_for_height(client, cluster.url(sender), height + 1):
+            reason = "commit not received by the sender"
+        if reason is None:
+            latencies.append(seconds)
+            end_to_end.append(time.perf_counter() - transfer_start)
+        else:
+            errors[reason] += 1
+    result = summarize(latencies, errors, time.perf_counter() - start)
+    if end_to_end:
+        result["end_to_end_ms"] = {"p50": round(percentile(end_to_end, 0.5) * 1000, 2),
+                                   "p99": round(percentile(end_to_end, 0.99) * 1000, 2)}
+    return result
+
+
+async def run_sync(client: httpx.AsyncClient, cluster: LocalCluster, name: str) -> dict:
+    authority = cluster.url(cluster.authorities[0])
+    height = (await client.get(authority + "/chain/status")).json()["height"]
+    response, seconds = await timed(client.post(authority + "/join", json={"name": name}))
+    synced = (await client.get(cluster.url(name) + "/chain/status")).json()["height"]
+    return {"height": height, "synced_height": synced, "seconds": round(seconds, 3),
+            "ok": isinstance(response, httpx.Response) and response.is_success and synced == height}
+
+
+async def run_workloads(cluster: LocalCluster, args) -> dict:
+    members, late = cluster.clients[:-1], cluster.clients[-1]
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        results = {
+            "join": await run_join(client, cluster, members),
+            "deposit": await run_deposits(client, cluster, members, args.deposits, args.concurrency),
+            "transfer": await run_transfers(client, cluster, members[0], members[1], args.transfers),
+            "sync": await run_sync(client, cluster, late),
+        }
+        tips = {name: (await client.get(cluster.url(name) + "/chain/status")).json()["tip_hash"] for name in cluster.names}
+        results["consistent"] = len(set(tips.values())) == 1
+        results["tip_lock"] = (await client.get(cluster.url(cluster.authorities[0]) + "/tip_lock")).json()
+        # Deposits are proposed by the first authority, its prepare and commit calls show the consensus latency
+        results["consensus_latency"] = (await client.get(cluster.url(cluster.authorities[0]) + "/consensus_latency")).json()
+        results["quorum"] = (await client.get(cluster.url(cluster.authorities[0]) + "/topology")).json()["quorum"]
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--authorities", default="3", help="comma separated authority counts, one cluster run per count")
+    parser.add_argument("--clients", type=int, default=3, help="number of client nodes, the last one joins late")
+    parser.add_argument("--base-port", type=int, default=8100)
+    parser.add_argument("--deposits", type=int, default=50)
+    parser.add_argument("--transfers", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="deposits in flight at once")
+    parser.add_argument("--batch-size", type=int, default=1, help="BATCH_SIZE of the authorities")
+    parser.add_argument("--wire-format", choices=("binary", "json"), default="binary")
+    parser.add_argument("--output", help="file the JSON results are written to, stdout if omitted")
+    args = parser.parse_args()
+    if args.clients < 3:
+        parser.error("--clients has to be at least 3: a sender, a recipient and a late joiner")
+    authority_counts = [int(count) for count in args.authorities.split(",")]
+
+    env = {"BATCH_SIZE": str(args.batch_size), "PEER_WIRE_FORMAT": args.wire_format, "LOG_LEVEL": "WARNING"}
+    runs = []
+    for authorities in authority_counts:
+        with LocalCluster(authorities, args.clients, args.base_port, env) as cluster:
+            runs.append({"authorities": authorities, "results": asyncio.run(run_workloads(cluster, args))})
+
+    report = {
+        "revision": git_revision(),
+        "config": {key: getattr(args, key) for key in ("clients", "deposits", "transfers", "concurrency", "batch_size", "wire_format")},
+        "runs": runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
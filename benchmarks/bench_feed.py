@@ -0,0 +1,69 @@
+"""
+Measures the cost of appending to the subscription feed against the number of subscribers,
+and how long it takes until every subscriber has read an appended transaction.
+Subscribers run as tasks in the same event loop and read like the /subscribe endpoint.
+
+Usage:
+    python benchmarks/bench_feed.py [transactions]
+"""
+import asyncio
+import sys
+import time
+
+from chain_fixtures import build_chain
+from chain_feed import ChainFeed
+
+SUBSCRIBER_COUNTS = [0, 10, 100, 1000]
+
+
+async def subscriber(feed: ChainFeed, position: int, end: int, received: dict):
+    generation = feed.generation
+    while position < end:
+        changed = feed.changed()
+        read = feed.read(position, generation)
+        generation = read.generation
+        if read.entries:
+            for entry in read.entries:
+                entry.event
+            position = read.entries[-1].index + 1
+            received[position - 1] = received.get(position - 1, 0) + 1
+            continue
+        await changed.wait()
+
+
+async def run(transactions: list, subscribers: int) -> tuple:
+    feed = ChainFeed(capacity=len(transactions), height=1)
+    end = 1 + len(transactions)
+    received = {}
+    feed.changed()
+    tasks = [asyncio.create_task(subscriber(feed, 1, end, received)) for _ in range(subscribers)]
+    await asyncio.sleep(0)
+
+    append_seconds = 0.0
+    delivery = []
+    for transaction in transactions:
+        start = time.perf_counter()
+        feed.append(transaction)
+        append_seconds += time.perf_counter() - start
+        # Let the subscribers read before the next commit
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        delivery.append(time.perf_counter() - start)
+    await asyncio.gather(*tasks)
+    return append_seconds / len(transactions), sorted(delivery)[len(delivery) // 2]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    source, _ = build_chain(count, signed=False)
+    transactions = source.transaction_chain.transactions[1:]
+
+    print(f"transactions: {count}")
+    print("subscribers  append us  delivery p50 ms")
+    for subscribers in SUBSCRIBER_COUNTS:
+        append, delivery = asyncio.run(run(transactions, subscribers))
+        print(f"{subscribers:11d}  {append * 1e6:9.2f}  {delivery * 1000:15.3f}")
+
+
+if __name__ == "__main__":
+    main()
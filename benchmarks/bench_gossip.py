@@ -0,0 +1,155 @@
+"""
+Measures how committed transactions propagate from an authority to its followers through gossip.
+The followers run in one process and every message costs a simulated network delay, so hundreds
+of followers fit on one machine. The commit latency is the time the authority spends handing a
+commit to gossip, the propagation time lasts until every follower holds the commit.
+The sequential row forwards every commit to all followers one after another, as nodes did before.
+
+Usage:
+    python benchmarks/bench_gossip.py [commits] [one way delay ms] [fanout]
+"""
+import asyncio
+import random
+import sys
+import time
+from collections import namedtuple
+
+import chain_fixtures  # noqa: F401, puts app/ on the path
+from gossip import Commit, Gossip
+
+FOLLOWER_COUNTS = [10, 100, 500]
+COMMIT_INTERVAL = 0.02
+PULL_INTERVAL = 0.1
+
+Transaction = namedtuple("Transaction", ("index", "current_hash"))
+
+
+class Node:
+    def __init__(self, name: str, network: dict, delay: float, fanout: int):
+        """
+        Follower that applies commits in chain order and forwards new ones. It catches up with
+        the authority when it receives a commit ahead of its chain, and pulls from a random peer
+        every few delays.
+        """
+        self.name = name
+        self.network = network
+        self.delay = delay
+        self.height = 0
+        self.received_at = {}
+        self.messages = 0
+        self.catch_ups = 0
+        self.catching_up = False
+        self.gossip = Gossip(self.send, fanout=fanout, pull=self.pull, pull_interval=PULL_INTERVAL)
+
+    async def send(self, peer: str, commit):
+        self.messages += 1
+        await asyncio.sleep(self.delay)
+        await self.network[peer].receive(commit.transactions)
+
+    async def receive(self, transactions: list):
+        new = [transaction for transaction in transactions if transaction.index >= self.height]
+        if not new:
+            return
+        if new[0].index > self.height:
+            # Like schedule_catch_up, only one catch up runs at a time
+            if self.catching_up:
+                return
+            self.catching_up = True
+            self.catch_ups += 1
+            # Pull the missing commits from the authority, one round trip
+            await asyncio.sleep(2 * self.delay)
+            self.catching_up = False
+            new = self.network["authority"].chain[self.height:new[-1].index + 1]
+        self.apply(new)
+
+    async def pull(self, peer: str):
+        # Status and range requests, two round trips
+        await asyncio.sleep(4 * self.delay)
+        self.apply(self.network["authority"].chain[self.height:self.network[peer].height])
+
+    def apply(self, new: list):
+        if not new or new[0].index != self.height:
+            return
+        now = time.perf_counter()
+        for transaction in new:
+            self.received_at.setdefault(transaction.index, now)
+        self.height = new[-1].index + 1
+        self.gossip.publish(new)
+
+
+class Authority(Node):
+    def __init__(self, network: dict, delay: float, fanout: int):
+        super().__init__("authority", network, delay, fanout)
+        self.chain = []
+
+
+def join(network: dict, authority: Authority, follower: Node, fanout: int):
+    """
+    Registers a follower like the /join endpoint does: the authority adds it, the follower learns
+    a few peers and a few peers learn about it.
+    """
+    authority.gossip.add_peer(follower.name)
+    for peer in authority.gossip.sample(2 * fanout, exclude=follower.name):
+        follower.gossip.add_peer(peer)
+    for peer in authority.gossip.sample(fanout, exclude=follower.name):
+        network[peer].gossip.add_peer(follower.name)
+
+
+async def run(followers: int, commits: int, delay: float, fanout: int, sequential: bool) -> dict:
+    network = {}
+    authority = network["authority"] = Authority(network, delay, fanout)
+    nodes = []
+    for number in range(followers):
+        node = network[f"follower_{number}"] = Node(f"follower_{number}", network, delay, fanout)
+        nodes.append(node)
+        if not sequential:
+            join(network, authority, node, fanout)
+            node.gossip.start()
+
+    committed_at, commit_latencies = {}, []
+    for index in range(commits):
+        transaction = Transaction(index, f"{random.getrandbits(128):032x}")
+        authority.chain.append(transaction)
+        committed_at[index] = time.perf_counter()
+        if sequential:
+            for node in nodes:
+                await authority.send(node.name, Commit([transaction]))
+        else:
+            authority.gossip.publish([transaction])
+        commit_latencies.append(time.perf_counter() - committed_at[index])
+        await asyncio.sleep(COMMIT_INTERVAL)
+
+    deadline = time.perf_counter() + 30
+    while any(node.height < commits for node in nodes) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    propagation = sorted(max(node.received_at.get(index, deadline) for node in nodes) - committed_at[index] for index in range(commits))
+    for node in [authority] + nodes:
+        await node.gossip.close()
+    return {
+        "commit_ms": sum(commit_latencies) / commits * 1000,
+        "propagation_p50_ms": propagation[len(propagation) // 2] * 1000,
+        "propagation_max_ms": propagation[-1] * 1000,
+        "messages_per_commit": sum(node.messages for node in [authority] + nodes) / commits,
+        "catch_ups": sum(node.catch_ups for node in nodes),
+        "complete": all(node.height == commits for node in nodes),
+    }
+
+
+def main():
+    commits = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 2.0) / 1000
+    fanout = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    print(f"commits: {commits}, one way delay: {delay * 1000:.1f} ms, fanout: {fanout}")
+    print("mode        followers  commit ms  propagation p50 ms  max ms  messages/commit  catch ups  complete")
+    for followers in FOLLOWER_COUNTS:
+        for mode in ("sequential", "gossip"):
+            # The sequential forwarding takes followers * delay per commit, keep its runs short
+            count = min(commits, 5) if mode == "sequential" else commits
+            result = asyncio.run(run(followers, count, delay, fanout, mode == "sequential"))
+            print(f"{mode:10s}  {followers:9d}  {result['commit_ms']:9.3f}  {result['propagation_p50_ms']:18.1f}"
+                  f"  {result['propagation_max_ms']:6.1f}  {result['messages_per_commit']:15.1f}  {result['catch_ups']:9d}  {result['complete']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Compares the hash check of a received chain before and after the canonical encoding:
+the previous string-join hash over dumped dicts, hash_many over the transaction objects,
+and hash_many again once the digests are cached.
+
+Usage:
+    python benchmarks/bench_hashing.py [chain length]
+"""
+import hashlib
+import sys
+import time
+
+from chain_fixtures import build_chain
+from models import Transaction
+
+
+def string_join_hash(data: dict) -> str:
+    # The previous Transchain.calculate_hash
+    keywords = ["index", "sender", "recipient", "amount", "previous_hash", "expiration"]
+    return hashlib.sha256("".join(str(data.get(keyword, "")) for keyword in keywords).encode("utf-8")).hexdigest()
+
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    source, _ = build_chain(length, signed=False)
+    # Fresh objects without cached digests, as received from a peer
+    transactions = [Transaction(**transaction.model_dump()) for transaction in source.transaction_chain.transactions]
+
+    print(f"chain length: {len(transactions)}")
+    print("variant              seconds  us/tx")
+    start = time.perf_counter()
+    [string_join_hash(transaction.model_dump()) for transaction in transactions]
+    elapsed = time.perf_counter() - start
+    print(f"model_dump + join    {elapsed:7.3f}  {elapsed / len(transactions) * 1e6:5.2f}")
+    for name in ("hash_many", "hash_many (cached)"):
+        start = time.perf_counter()
+        hashes = source.hash_many(transactions)
+        elapsed = time.perf_counter() - start
+        print(f"{name:19s}  {elapsed:7.3f}  {elapsed / len(transactions) * 1e6:5.2f}")
+    assert hashes[1:] == [transaction.current_hash for transaction in transactions[1:]]
+
+
+if __name__ == "__main__":
+    main()
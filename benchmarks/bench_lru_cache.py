@@ -0,0 +1,78 @@
+"""
+Compares the hashed LRUCache with the previous list-based implementation.
+
+Usage:
+    python benchmarks/bench_lru_cache.py
+"""
+import hashlib
+import time
+
+import chain_fixtures  # noqa: F401  (puts app/ on the path)
+from lru_cache import LRUCache
+
+
+class ListLRUCache:
+    """
+    The previous implementation: whole transaction dicts in a list.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.cache = []
+
+    def add(self, dictionary):
+        if dictionary in self.cache:
+            self.cache.remove(dictionary)
+            self.cache.append(dictionary)
+        else:
+            if len(self.cache) >= self.max_size:
+                self.cache.pop(0)
+            self.cache.append(dictionary)
+
+    def exists(self, dictionary):
+        return dictionary in self.cache
+
+
+def make_transaction(i: int) -> dict:
+    current_hash = hashlib.sha256(str(i).encode()).hexdigest()
+    return {
+        "index": i,
+        "sender": f"fastapi_app_{i % 5}",
+        "recipient": f"fastapi_app_{(i + 1) % 5}",
+        "amount": 1.0,
+        "current_hash": current_hash,
+        "authority_signature": current_hash * 8,
+    }
+
+
+def run(cache, size: int, operations: int) -> float:
+    """
+    Fill the cache, then time the exists/add pair done by /add_to_chain/ for new transactions.
+
+    Returns:
+        float: Microseconds per operation.
+    """
+    if isinstance(cache, ListLRUCache):
+        # Filling the list version through add() is quadratic
+        cache.cache = [make_transaction(i) for i in range(size)]
+    else:
+        for i in range(size):
+            cache.add(make_transaction(i))
+    transactions = [make_transaction(size + i) for i in range(operations)]
+    start = time.perf_counter()
+    for transaction in transactions:
+        if not cache.exists(transaction):
+            cache.add(transaction)
+    return (time.perf_counter() - start) / operations * 1e6
+
+
+def main():
+    print("size       hashed us/op   list us/op")
+    for size in (100, 1_000, 10_000, 100_000, 1_000_000):
+        hashed = run(LRUCache(size), size, 10_000)
+        # The list version is O(size) per operation, keep the number of timed operations small
+        listed = run(ListLRUCache(size), size, max(10, 100_000 // size))
+        print(f"{size:<10d} {hashed:12.2f} {listed:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
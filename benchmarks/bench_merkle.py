@@ -0,0 +1,66 @@
+"""
+Measures the Merkle checkpoints: building the index over a chain, serving a checkpoint and an
+inclusion proof, and locating the first divergent window of two chains by comparing prefix roots
+instead of walking both chains.
+
+Usage:
+    python benchmarks/bench_merkle.py [chain length] [window size]
+"""
+import sys
+import time
+
+from chain_fixtures import build_chain
+from merkle import MerkleIndex, verify_proof
+
+
+def first_divergent_window(local: MerkleIndex, remote: MerkleIndex):
+    # Binary search over the number of leading windows with equal roots, one comparison per step
+    low, high = 0, min(local.window_count(), remote.window_count())
+    steps = 0
+    while low < high:
+        middle = (low + high + 1) // 2
+        steps += 1
+        if local.root(middle) == remote.root(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low, steps
+
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    window_size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    transchain, _ = build_chain(length, signed=False)
+    transactions = transchain.transaction_chain.transactions
+    print(f"chain length: {len(transactions)}, window size: {window_size}")
+
+    start = time.perf_counter()
+    merkle = MerkleIndex(window_size)
+    merkle.extend(transactions)
+    elapsed = time.perf_counter() - start
+    print(f"build index      {elapsed * 1000:9.1f} ms  {elapsed / len(transactions) * 1e6:5.2f} us/tx")
+
+    start = time.perf_counter()
+    checkpoint = merkle.checkpoint()
+    print(f"checkpoint       {(time.perf_counter() - start) * 1000:9.3f} ms  {checkpoint['windows']} windows")
+
+    index = len(transactions) // 3
+    start = time.perf_counter()
+    proof = merkle.proof(index)
+    elapsed = time.perf_counter() - start
+    assert verify_proof(transactions[index].current_hash, proof["path"], checkpoint["root"])
+    print(f"inclusion proof  {elapsed * 1000:9.3f} ms  {len(proof['path'])} hashes")
+
+    # A second chain that differs from the middle onward
+    diverged = MerkleIndex(window_size)
+    diverged.extend(transactions[:len(transactions) // 2])
+    diverged.extend(transactions[len(transactions) // 2 + 1:])
+    start = time.perf_counter()
+    windows, steps = first_divergent_window(merkle, diverged)
+    elapsed = time.perf_counter() - start
+    assert windows == len(transactions) // 2 // window_size
+    print(f"find divergence  {elapsed * 1000:9.3f} ms  {steps} root comparisons, first {windows} windows equal")
+
+
+if __name__ == "__main__":
+    main()
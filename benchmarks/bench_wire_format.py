@@ -0,0 +1,38 @@
+"""
+Compares payload size, encode and parse time of the JSON and the binary wire format
+for a chain synchronization.
+
+Usage:
+    python benchmarks/bench_wire_format.py [chain length]
+"""
+import sys
+import time
+
+from chain_fixtures import build_chain
+from wire_format import BINARY, JSON, dump_chain, load_chain
+
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # Placeholder signatures have the size of real RSA-2048 signatures
+    source, _ = build_chain(length, signed=False)
+    transactions = [transaction.model_dump() for transaction in source.transaction_chain.transactions]
+
+    print(f"chain length: {len(transactions)}")
+    print("format  size MB  bytes/tx  encode s  parse s")
+    for name, media_type in (("json", JSON), ("binary", BINARY)):
+        # Best of three runs, both variants allocate a lot and the timings are noisy
+        encoded = elapsed = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            body = dump_chain(transactions, media_type)
+            encoded = min(encoded, time.perf_counter() - start)
+            start = time.perf_counter()
+            parsed = load_chain(body, media_type)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        assert [transaction.model_dump() for transaction in parsed[:100]] == transactions[:100]
+        print(f"{name:6s}  {len(body) / 1e6:7.1f}  {len(body) / len(transactions):8.0f}  {encoded:8.2f}  {elapsed:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
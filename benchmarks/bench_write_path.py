@@ -0,0 +1,89 @@
+"""
+Measures the CPU time one transfer spends on (de)serialization along the write path,
+send -> receive -> accept -> verify -> prepare -> add_to_chain -> forward, with and without
+the serialized-once EncodedTransaction. Signing, verification and networking are left out,
+they are the same in both variants.
+
+Usage:
+    python benchmarks/bench_write_path.py [transactions] [authorities] [connected nodes]
+"""
+import json
+import sys
+import time
+
+from chain_fixtures import build_chain
+from encoded_transaction import EncodedTransaction
+from wire_format import JSON, encode_json
+from lru_cache import LRUCache
+from models import PrepareTransaction, Transaction
+
+
+def receive(body: bytes, model):
+    # What FastAPI does with a JSON body declared as a pydantic model
+    return model.model_validate(json.loads(body))
+
+
+def path_before(transaction_data: dict, authorities: int, connected: int, cache: LRUCache):
+    # send_transaction
+    body = json.dumps(Transaction(**transaction_data).model_dump()).encode()
+    # receive_transaction, accept_transaction
+    body = json.dumps(receive(body, Transaction).model_dump()).encode()
+    # verify_transaction
+    data = receive(body, Transaction).model_dump()
+    prepare = dict(data, container_name="fastapi_app_2")
+    prepare_bodies = [json.dumps(prepare).encode() for _ in range(authorities)]
+    commit_bodies = [json.dumps(data).encode() for _ in range(authorities)]
+    for prepare_body, commit_body in zip(prepare_bodies, commit_bodies):
+        # prepare_transaction
+        receive(prepare_body, PrepareTransaction).model_dump()
+        # add_to_chain
+        transaction = receive(commit_body, Transaction)
+        transaction_data = transaction.model_dump()
+        cache.exists(transaction_data)
+        cache.add(transaction_data)
+        for _ in range(connected):
+            json.dumps(transaction.model_dump()).encode()
+
+
+def path_after(transaction_data: dict, authorities: int, connected: int, cache: LRUCache):
+    # send_transaction
+    body = encode_json(transaction_data)
+    # receive_transaction, accept_transaction
+    body = encode_json(receive(body, Transaction).model_dump())
+    # verify_transaction
+    data = receive(body, Transaction).model_dump()
+    prepare = dict(data, container_name="fastapi_app_2")
+    prepare_body = encode_json(prepare)
+    commit_body = encode_json(data)
+    for _ in range(authorities):
+        # prepare_transaction
+        receive(prepare_body, PrepareTransaction).model_dump()
+        # add_to_chain
+        encoded = EncodedTransaction.from_body(commit_body)
+        cache.exists(encoded)
+        cache.add(encoded)
+        encoded.data
+        for _ in range(connected):
+            encoded.encode(JSON)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    authorities = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    connected = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    source, _ = build_chain(count, signed=False)
+    transactions = [transaction.model_dump() for transaction in source.transaction_chain.transactions[1:]]
+
+    print(f"transactions: {count}, authorities: {authorities}, connected nodes: {connected}")
+    print("variant  us/transaction")
+    for name, path in (("before", path_before), ("after", path_after)):
+        cache = LRUCache(100)
+        start = time.process_time()
+        for transaction_data in transactions:
+            path(transaction_data, authorities, connected, cache)
+        elapsed = time.process_time() - start
+        print(f"{name:7s}  {elapsed / count * 1e6:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
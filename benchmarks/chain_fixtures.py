@@ -0,0 +1,92 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from models import Transaction, TransactionChain
+from transchain import Transchain
+
+AUTHORITY = "fastapi_app_2"
+AUTHORITY_NODES = [AUTHORITY]
+
+
+def generate_key():
+    """
+    Generate an RSA private key and its PEM encoded public key.
+
+    Returns:
+        tuple: The private key object and the public key in PEM format.
+    """
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_key_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_key, public_key_pem
+
+
+def sign(private_key, data_hash: str) -> str:
+    return private_key.sign(data_hash.encode("utf-8"), padding.PKCS1v15(), hashes.SHA256()).hex()
+
+
+def build_chain(length: int, parties: int = 8, signed: bool = True):
+    """
+    Build a valid transaction chain between a few parties, signed by one authority.
+
+    Args:
+        length (int): Number of transactions after the genesis transaction.
+        parties (int): Number of distinct senders and recipients.
+        signed (bool): Create real RSA signatures, otherwise use placeholder signatures.
+
+    Returns:
+        tuple: The Transchain holding the chain and a dict of party name to PEM public key.
+    """
+    transchain = Transchain(AUTHORITY_NODES)
+    names = [f"node_{i}" for i in range(parties)]
+    keys = {name: generate_key() for name in names + [AUTHORITY]} if signed else {}
+    placeholder = "00" * 256
+
+    for i in range(length):
+        sender = names[i % parties]
+        # Every party deposits first so later transfers are covered
+        recipient = sender if i < parties else names[(i * 7 + 3) % parties]
+        previous = transchain.transaction_chain.transactions[-1]
+        transaction_data = {
+            "index": previous.index + 1,
+            "sender": sender,
+            "recipient": recipient,
+            "amount": 1000.0 if sender == recipient else 1.0,
+            "previous_hash": previous.current_hash,
+            "expiration": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "authority": AUTHORITY,
+        }
+        transaction_hash = transchain.calculate_hash(transaction_data)
+        transaction_data["current_hash"] = transaction_hash
+        if signed:
+            transaction_data["sender_signature"] = sign(keys[sender][0], transaction_hash)
+            transaction_data["recipient_signature"] = sign(keys[recipient][0], transaction_hash)
+            transaction_data["authority_signature"] = sign(keys[AUTHORITY][0], transaction_hash)
+        else:
+            transaction_data["sender_signature"] = placeholder
+            transaction_data["recipient_signature"] = placeholder
+            transaction_data["authority_signature"] = placeholder
+        transchain.append_transaction(Transaction(**transaction_data))
+
+    return transchain, {name: key[1] for name, key in keys.items()}
+
+
+def register_keys(transchain: Transchain, public_keys: dict):
+    """
+    Load the public keys of a generated chain into the registries of a Transchain,
+    so no HTTP requests are made during verification.
+    """
+    for name, public_key_pem in public_keys.items():
+        if name == AUTHORITY:
+            transchain.authority_keyring.register(name, public_key_pem)
+        else:
+            transchain.key_registry.register(name, public_key_pem)
+    transchain.authority_keyring.loaded = True
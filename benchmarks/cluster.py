@@ -0,0 +1,133 @@
+"""
+Runs a cluster of nodes as local uvicorn processes that talk to each other over loopback,
+so workloads can be measured without Docker.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+
+class LocalCluster:
+    def __init__(self, authorities: int = 3, clients: int = 3, base_port: int = 8100, env: dict = None, workdir: str = None):
+        """
+        Cluster of authorities named authority_0, authority_1, ... and clients named client_0, client_1, ...,
+        listening on consecutive ports. The nodes read the membership from a shared topology file.
+        Every node runs in its own working directory, since a node writes its key pair to it.
+
+        Args:
+            authorities (int): Number of authority nodes.
+            clients (int): Number of client nodes.
+            base_port (int): Port of the first node.
+            env (dict): Extra environment of every node, e.g. BATCH_SIZE or PEER_WIRE_FORMAT.
+            workdir (str): Directory for the working directories and logs, a temporary directory if omitted.
+        """
+        self.authorities = [f"authority_{i}" for i in range(authorities)]
+        self.clients = [f"client_{i}" for i in range(clients)]
+        self.names = self.authorities + self.clients
+        self.ports = {name: base_port + i for i, name in enumerate(self.names)}
+        self.env = dict(env or {})
+        self.workdir = workdir
+        self.owns_workdir = workdir is None
+        self.processes = {}
+
+    @property
+    def topology_path(self) -> str:
+        return os.path.join(self.workdir, "topology.json")
+
+    def write_topology(self, authorities: list = None, quorum="majority"):
+        """
+        Writes the topology file. Running nodes pick up a changed authority set on their next reload.
+
+        Args:
+            authorities (list): The authority names, all authorities of the cluster if omitted.
+            quorum (str | int): The quorum rule of the authorities.
+        """
+        topology = {
+            "authorities": self.authorities if authorities is None else authorities,
+            "addresses": {name: f"127.0.0.1:{port}" for name, port in self.ports.items()},
+            "quorum": quorum,
+        }
+        # Replace the file atomically, so a node never reads a half written topology
+        temporary = self.topology_path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(topology, file)
+        os.replace(temporary, self.topology_path)
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.ports[name]}"
+
+    def log_path(self, name: str) -> str:
+        return os.path.join(self.workdir, f"{name}.log")
+
+    def start(self, timeout: float = None):
+        """
+        Writes the topology file, starts all nodes and waits until every node answers.
+        Without a timeout, every node gets a few seconds to start.
+
+        Raises:
+            RuntimeError: If a node exits or does not answer within the timeout.
+        """
+        if self.workdir is None:
+            self.workdir = tempfile.mkdtemp(prefix="transchain-cluster-")
+        os.makedirs(self.workdir, exist_ok=True)
+        self.write_topology()
+        for name, port in self.ports.items():
+            node_dir = os.path.join(self.workdir, name)
+            os.makedirs(node_dir, exist_ok=True)
+            env = {**os.environ, **self.env, "CONTAINERNAME": name, "TOPOLOGY_FILE": self.topology_path}
+            with open(self.log_path(name), "wb") as log:
+                self.processes[name] = subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", APP_DIR,
+                     "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+                    cwd=node_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+                )
+        timeout = timeout or 10.0 + 3.0 * len(self.names)
+        deadline = time.monotonic() + timeout
+        with httpx.Client(timeout=1.0) as client:
+            for name in self.names:
+                while True:
+                    if self.processes[name].poll() is not None:
+                        self.stop()
+                        raise RuntimeError(f"{name} exited, see {self.log_path(name)}")
+                    try:
+                        if client.get(self.url(name) + "/").status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    if time.monotonic() > deadline:
+                        self.stop()
+                        raise RuntimeError(f"{name} did not start within {timeout} seconds")
+                    time.sleep(0.1)
+
+    def stop(self):
+        """
+        Stops all nodes. A temporary working directory is removed.
+        """
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = {}
+        if self.owns_workdir and self.workdir is not None:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
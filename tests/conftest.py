@@ -0,0 +1,48 @@
+import importlib
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from gossip import Gossip  # noqa: E402
+from models import Transaction  # noqa: E402
+
+AUTHORITY = "fastapi_app_2"
+
+
+@pytest.fixture(scope="session")
+def main(tmp_path_factory):
+    os.environ["CONTAINERNAME"] = AUTHORITY
+    os.environ["CHAIN_DATA_DIR"] = str(tmp_path_factory.mktemp("node"))
+    main = importlib.import_module("main")
+    # The node is the only authority whose key is needed, nothing is fetched from peers
+    main.transchain.authority_keyring.register(AUTHORITY, main.PUBLIC_KEY)
+    main.transchain.authority_keyring.loaded = True
+    main.gossip = Gossip(lambda peer, commit: None)
+    return main
+
+
+@pytest.fixture
+def client(main):
+    main.transchain.truncate_chain(1)
+    main.transaction_cache.cache.clear()
+    return TestClient(main.app)
+
+
+def commit(main, index: int, previous_hash: str, amount: float, signed: bool = True) -> Transaction:
+    transaction_data = {
+        "index": index,
+        "sender": "fastapi_app_0",
+        "recipient": "fastapi_app_0",
+        "amount": amount,
+        "previous_hash": previous_hash,
+        "expiration": "2024-01-01T00:10:00",
+        "timestamp": "2024-01-01T00:00:00",
+        "authority": AUTHORITY,
+    }
+    transaction_data["current_hash"] = main.transchain.calculate_hash(transaction_data)
+    transaction_data["authority_signature"] = main.signer.sign(transaction_data["current_hash"] if signed else "forged")
+    return Transaction(**transaction_data)
@@ -0,0 +1,155 @@
+import random
+import threading
+
+import pytest
+
+from chain_store import ChainStore
+from models import Transaction, TransactionChain
+from transchain import Transchain
+
+AUTHORITY = "fastapi_app_2"
+ACCOUNTS = [f"fastapi_app_{i}" for i in range(5)]
+
+
+def next_transaction(transchain: Transchain, sender: str, recipient: str, amount: float) -> Transaction:
+    index, previous_hash = transchain.chain_tip()
+    transaction_data = {
+        "index": index,
+        "sender": sender,
+        "recipient": recipient,
+        "amount": amount,
+        "previous_hash": previous_hash,
+        "expiration": "2024-01-01T00:10:00",
+        "timestamp": "2024-01-01T00:00:00",
+        "authority": AUTHORITY,
+    }
+    transaction_data["current_hash"] = transchain.calculate_hash(transaction_data)
+    return Transaction(**transaction_data)
+
+
+def append_random(transchain: Transchain, count: int, rng: random.Random):
+    """
+    Appends a mix of deposits and transfers, transfers never exceed the balance of the sender.
+    """
+    for _ in range(count):
+        sender = rng.choice(ACCOUNTS)
+        balance = transchain.calculate_balance(sender)
+        if balance < 1 or rng.random() < 0.3:
+            transaction = next_transaction(transchain, sender, sender, float(rng.randint(1, 100)))
+        else:
+            recipient = rng.choice([account for account in ACCOUNTS if account != sender])
+            transaction = next_transaction(transchain, sender, recipient, float(rng.randint(1, int(balance))))
+        transchain.append_transaction(transaction)
+
+
+def assert_balances_match(transchain: Transchain):
+    for account in ACCOUNTS + ["Genesis", "unknown"]:
+        assert transchain.calculate_balance(account) == transchain.recalculate_balance(account), account
+
+
+@pytest.fixture(params=["list", "compact", "store"])
+def make_transchain(request, tmp_path):
+    stores = []
+
+    def make():
+        if request.param == "store":
+            store = ChainStore(str(tmp_path / f"chain-{len(stores)}"), snapshot_interval=16)
+            stores.append(store)
+            return Transchain([AUTHORITY], store=store)
+        return Transchain([AUTHORITY], compact=request.param == "compact")
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_incremental_balances_match_recalculation(make_transchain):
+    rng = random.Random(1)
+    transchain = make_transchain()
+    append_random(transchain, 200, rng)
+    assert_balances_match(transchain)
+
+    transchain.truncate_chain(120)
+    assert len(transchain.transaction_chain.transactions) == 120
+    assert_balances_match(transchain)
+
+    append_random(transchain, 50, rng)
+    assert_balances_match(transchain)
+
+    # A longer chain that shares only the genesis transaction
+    other = make_transchain()
+    append_random(other, 300, random.Random(2))
+    transchain.replace_chain(TransactionChain(transactions=list(other.transaction_chain.transactions)))
+    assert len(transchain.transaction_chain.transactions) == 301
+    assert_balances_match(transchain)
+
+    append_random(transchain, 30, rng)
+    assert_balances_match(transchain)
+
+
+def test_balances_after_reopening_the_store(tmp_path):
+    rng = random.Random(3)
+    store = ChainStore(str(tmp_path), snapshot_interval=16)
+    transchain = Transchain([AUTHORITY], store=store)
+    append_random(transchain, 100, rng)
+    transchain.truncate_chain(90)
+    # Appended after the last snapshot, replayed from the log on restart
+    append_random(transchain, 7, rng)
+    expected = {account: transchain.calculate_balance(account) for account in ACCOUNTS}
+    store.close()
+
+    store = ChainStore(str(tmp_path), snapshot_interval=16)
+    transchain = Transchain([AUTHORITY], store=store)
+    assert {account: transchain.calculate_balance(account) for account in ACCOUNTS} == expected
+    assert_balances_match(transchain)
+    store.close()
+
+
+def test_replace_chain_keeps_the_shared_prefix(make_transchain):
+    transchain = make_transchain()
+    append_random(transchain, 80, random.Random(4))
+    other = make_transchain()
+    other.replace_chain(TransactionChain(transactions=list(transchain.transaction_chain.transactions)))
+    # Both chains fork after the first 81 transactions
+    append_random(transchain, 10, random.Random(5))
+    append_random(other, 40, random.Random(6))
+    for account in ACCOUNTS:
+        transchain.account_history(account)
+    generation = transchain.feed.generation
+
+    transchain.replace_chain(TransactionChain(transactions=list(other.transaction_chain.transactions)))
+    assert transchain.feed.read(91, generation).rewind == 81
+    assert_balances_match(transchain)
+    for account in ACCOUNTS:
+        assert transchain.account_history(account) == other.account_history(account)
+    assert transchain.merkle_window(0) == other.merkle_window(0)
+
+
+def test_concurrent_appends_and_truncations(make_transchain):
+    transchain = make_transchain()
+    append_random(transchain, 50, random.Random(7))
+    stop = threading.Event()
+
+    def truncate():
+        rng = random.Random(8)
+        while not stop.is_set():
+            transchain.truncate_chain(max(1, len(transchain.transaction_chain.transactions) - rng.randint(1, 5)))
+
+    truncator = threading.Thread(target=truncate)
+    truncator.start()
+    rng = random.Random(9)
+    try:
+        for _ in range(300):
+            tip = transchain.chain_tip()
+            sender = rng.choice(ACCOUNTS)
+            # Built on the tip it is appended to, a truncation in between rejects it
+            transaction = next_transaction(transchain, sender, sender, float(rng.randint(1, 100)))
+            if (transaction.index, transaction.previous_hash) == tip:
+                transchain.append_batch([transaction], tip)
+    finally:
+        stop.set()
+        truncator.join()
+    assert_balances_match(transchain)
+    assert transchain.feed.height == len(transchain.transaction_chain.transactions)
+    for account in ACCOUNTS:
+        assert transchain.balance_at(account, len(transchain.transaction_chain.transactions)) == transchain.recalculate_balance(account)
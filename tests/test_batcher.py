@@ -0,0 +1,76 @@
+import asyncio
+
+from batcher import TransactionBatcher
+
+
+class Chain:
+    def chain_tip(self):
+        return 1, "genesis"
+
+
+def transaction(index: int, sender: str = "fastapi_app_0", recipient: str = "fastapi_app_1", amount: float = 1.0) -> dict:
+    return {"index": index, "sender": sender, "recipient": recipient, "amount": amount, "current_hash": f"hash_{index}"}
+
+
+class Committer:
+    def __init__(self, results=()):
+        self.batches = []
+        self.results = list(results)
+        self.release = None
+
+    async def __call__(self, batch: list) -> bool:
+        self.batches.append([transaction["index"] for transaction in batch])
+        if self.release is not None:
+            await self.release.wait()
+        return self.results.pop(0) if self.results else True
+
+
+def test_full_batch_is_committed_without_waiting():
+    async def scenario():
+        committer = Committer()
+        batcher = TransactionBatcher(Chain(), committer, max_size=3, max_wait=10)
+        assert await asyncio.wait_for(asyncio.gather(*(batcher.submit(transaction(index)) for index in (1, 2, 3))), 1) == [True] * 3
+        assert committer.batches == [[1, 2, 3]]
+        assert batcher.pending_tip() == (1, "genesis")
+
+    asyncio.run(scenario())
+
+
+def test_partial_batch_is_committed_after_the_window():
+    async def scenario():
+        committer = Committer()
+        batcher = TransactionBatcher(Chain(), committer, max_size=10, max_wait=0.02)
+        submitted = asyncio.create_task(batcher.submit(transaction(1, amount=5)))
+        await asyncio.sleep(0)
+        assert batcher.pending_tip() == (2, "hash_1")
+        assert batcher.pending_balance_delta("fastapi_app_0") == -5
+        assert batcher.pending_balance_delta("fastapi_app_1") == 5
+        assert committer.batches == []
+        assert await asyncio.wait_for(submitted, 1)
+        assert committer.batches == [[1]]
+        assert batcher.pending_balance_delta("fastapi_app_0") == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_batch_drops_the_transactions_queued_behind_it():
+    async def scenario():
+        committer = Committer(results=[False])
+        committer.release = asyncio.Event()
+        batcher = TransactionBatcher(Chain(), committer, max_size=2, max_wait=10)
+        first = [batcher.submit(transaction(index)) for index in (1, 2)]
+        waiting = asyncio.gather(*first)
+        await asyncio.sleep(0.01)
+        # Built on the batch in flight
+        assert batcher.pending_tip() == (3, "hash_2")
+        behind = asyncio.create_task(batcher.submit(transaction(3)))
+        await asyncio.sleep(0)
+        assert batcher.pending_tip() == (4, "hash_3")
+        committer.release.set()
+        assert await asyncio.wait_for(waiting, 1) == [False, False]
+        assert await asyncio.wait_for(behind, 1) is False
+        assert committer.batches == [[1, 2]]
+        assert batcher.pending_tip() == (1, "genesis")
+        assert batcher.stats()["failed_batches"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+import os
+
+from chain_store import ChainStore, INDEX_ENTRY
+from models import Transaction
+
+# Small segments so a few records span several segment files
+SEGMENT_SIZE = 1024
+
+
+def make_transaction(index: int) -> Transaction:
+    return Transaction(index=index, sender=f"node_{index % 3}", recipient=f"node_{(index + 1) % 3}",
+                       amount=index, timestamp="2024-01-01T00:00:00", current_hash=f"{index:064x}")
+
+
+def fill(directory, count: int) -> ChainStore:
+    store = ChainStore(str(directory), segment_size=SEGMENT_SIZE)
+    for index in range(count):
+        store.append(make_transaction(index))
+    return store
+
+
+def cut_last_record(store: ChainStore, keep_bytes: int = 10):
+    """
+    Cuts the last record of the log in the middle, like a crash during its write.
+    """
+    segment, offset = store._entry(store.count - 1)
+    path = store._segment_path(segment)
+    store.close()
+    os.truncate(path, offset + keep_bytes)
+    return segment
+
+
+def assert_readable(store: ChainStore, count: int):
+    assert len(store) == count
+    assert [store.read(index).index for index in range(count)] == list(range(count))
+
+
+def test_torn_last_record_is_cut_off(tmp_path):
+    store = fill(tmp_path, 40)
+    assert store.tail_segment > 0
+    cut_last_record(store)
+
+    store = ChainStore(str(tmp_path), segment_size=SEGMENT_SIZE)
+    assert_readable(store, 39)
+
+    # Appending after recovery reuses the space of the torn record
+    for index in range(39, 60):
+        store.append(make_transaction(index))
+    assert_readable(store, 60)
+    store.close()
+
+    store = ChainStore(str(tmp_path), segment_size=SEGMENT_SIZE)
+    assert_readable(store, 60)
+    store.close()
+
+
+def test_torn_record_in_segment_after_the_index(tmp_path):
+    store = fill(tmp_path, 40)
+    last_segment = store.tail_segment
+    # The index lost every entry of the last segment, the log still holds the records
+    indexed = next(index for index in range(store.count) if store._entry(index)[0] == last_segment)
+    cut_last_record(store)
+    os.truncate(os.path.join(str(tmp_path), "index.bin"), indexed * INDEX_ENTRY.size)
+
+    store = ChainStore(str(tmp_path), segment_size=SEGMENT_SIZE)
+    assert_readable(store, 39)
+    assert store.tail_segment == last_segment
+
+    for index in range(39, 60):
+        store.append(make_transaction(index))
+    assert_readable(store, 60)
+    store.close()
+
+    store = ChainStore(str(tmp_path), segment_size=SEGMENT_SIZE)
+    assert_readable(store, 60)
+    store.close()
+
+
+def test_truncated_index_entry_is_dropped(tmp_path):
+    store = fill(tmp_path, 20)
+    store.close()
+    index_path = os.path.join(str(tmp_path), "index.bin")
+    os.truncate(index_path, os.path.getsize(index_path) - 3)
+
+    # The records are still in the log, so the lost entry is indexed again
+    store = ChainStore(str(tmp_path), segment_size=SEGMENT_SIZE)
+    assert_readable(store, 20)
+    store.close()
@@ -0,0 +1,32 @@
+import threading
+
+from chain_verifier import START_METHOD, ChainVerifier, verify_signature_chunk
+from rsa_utils import Signer, generate_rsa_keys, load_public_key
+
+
+def test_signatures_are_verified_on_the_process_pool(tmp_path):
+    private, public = str(tmp_path / "private_key.pem"), str(tmp_path / "public_key.pem")
+    generate_rsa_keys(private, public)
+    signer, pem = Signer(private), load_public_key(public)
+    work = []
+    for index in range(1, 41):
+        data_hash = f"{index:064x}"
+        signature = signer.sign(data_hash)
+        # Every tenth transaction carries the signature of another transaction
+        authority_signature = signer.sign("other") if index % 10 == 0 else signature
+        work.append((index, data_hash, pem, signature, pem, signature, [pem], authority_signature))
+
+    verifier = ChainVerifier(max_workers=2, chunk_size=8, parallel_threshold=1)
+    verifier.start()
+    assert verifier.executor._mp_context.get_start_method() == START_METHOD != "fork"
+    results = []
+    # Chains are verified in worker threads of the node
+    thread = threading.Thread(target=lambda: results.append(verifier.verify_signatures(work)))
+    thread.start()
+    thread.join()
+    assert results == [[(10, "authority"), (20, "authority"), (30, "authority"), (40, "authority")]]
+    assert results[0] == verify_signature_chunk(work)
+
+    verifier.shutdown()
+    assert verifier.executor is None
+    verifier.shutdown()
@@ -0,0 +1,40 @@
+from conftest import commit
+from models import Transaction
+from wire_format import JSON, dump_chain, encode_json
+
+
+def post_transaction(client, transaction: Transaction) -> str:
+    return client.post("/add_to_chain/", content=encode_json(transaction.model_dump()), headers={"Content-Type": JSON}).json()["message"]
+
+
+def post_batch(client, transactions: list) -> str:
+    return client.post("/add_batch_to_chain/", content=dump_chain(transactions, JSON), headers={"Content-Type": JSON}).json()["message"]
+
+
+def test_commit_is_processed_once(main, client):
+    transaction = commit(main, *main.transchain.chain_tip(), 10)
+    assert post_transaction(client, transaction) == "transaction added"
+    assert post_transaction(client, transaction) == "transaction was already processed"
+    assert post_batch(client, [transaction]) == "transaction was already processed"
+
+
+def test_rejected_commit_stays_rejected_on_retry(main, client):
+    transaction = commit(main, *main.transchain.chain_tip(), 10, signed=False)
+    assert post_transaction(client, transaction) == "transaction not added"
+    assert post_transaction(client, transaction) == "transaction not added"
+    assert post_batch(client, [transaction]) == "transaction not added"
+    assert post_batch(client, [transaction]) == "transaction not added"
+    assert len(main.transchain.transaction_chain.transactions) == 1
+
+
+def test_batch_forking_the_chain_is_not_processed(main, client):
+    index, previous_hash = main.transchain.chain_tip()
+    held = commit(main, index, previous_hash, 10)
+    assert post_transaction(client, held) == "transaction added"
+
+    fork = commit(main, index, previous_hash, 20)
+    assert post_batch(client, [fork]) == "transaction not added"
+    assert post_transaction(client, fork) == "transaction not added"
+    # The fork continues with a new transaction, the part the chain holds differs
+    assert post_batch(client, [fork, commit(main, index + 1, fork.current_hash, 5)]) == "transaction not added"
+    assert main.transchain.transaction_chain.transactions[index].current_hash == held.current_hash
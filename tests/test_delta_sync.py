@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from delta_sync import find_common_height
+from models import Transaction, TransactionChain
+from rsa_utils import Signer, generate_rsa_keys, load_public_key
+from transchain import Transchain
+
+AUTHORITY = "fastapi_app_2"
+PARTIES = ["fastapi_app_0", "fastapi_app_1"]
+
+
+@pytest.fixture(scope="module")
+def keys(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("keys")
+    private, public = str(directory / "private_key.pem"), str(directory / "public_key.pem")
+    generate_rsa_keys(private, public)
+    return Signer(private), load_public_key(public)
+
+
+@pytest.fixture
+def make_transchain(keys):
+    def make() -> Transchain:
+        # Every node signs with the same key, it is known without asking any peer
+        transchain = Transchain([AUTHORITY])
+        for node in PARTIES:
+            transchain.key_registry.register(node, keys[1])
+        transchain.authority_keyring.register(AUTHORITY, keys[1])
+        transchain.authority_keyring.loaded = True
+        return transchain
+
+    return make
+
+
+def extend(transchain: Transchain, signer: Signer, count: int, amount: float):
+    """
+    Appends signed deposits, the amount tells the chains built from the same prefix apart.
+    """
+    for _ in range(count):
+        index, previous_hash = transchain.chain_tip()
+        transaction_data = {
+            "index": index,
+            "sender": PARTIES[index % 2],
+            "recipient": PARTIES[index % 2],
+            "amount": amount,
+            "previous_hash": previous_hash,
+            "expiration": "2024-01-01T00:10:00",
+            "timestamp": "2024-01-01T00:00:00",
+            "authority": AUTHORITY,
+        }
+        transaction_data["current_hash"] = transchain.calculate_hash(transaction_data)
+        signature = signer.sign(transaction_data["current_hash"])
+        transaction_data.update(sender_signature=signature, recipient_signature=signature, authority_signature=signature)
+        transchain.append_transaction(Transaction(**transaction_data))
+
+
+def hashes(transchain: Transchain) -> list:
+    return [transaction.current_hash for transaction in transchain.transaction_chain.transactions]
+
+
+@pytest.mark.parametrize("common, local_height, remote_height", [(37, 100, 120), (0, 10, 30), (50, 50, 80), (80, 80, 80), (1, 1, 5)])
+def test_common_height_is_found_by_binary_search(common, local_height, remote_height):
+    local = [f"shared_{i}" if i < common else f"local_{i}" for i in range(local_height)]
+    remote = [f"shared_{i}" if i < common else f"remote_{i}" for i in range(remote_height)]
+    requests = []
+
+    async def remote_hash_at(index):
+        requests.append(index)
+        return remote[index]
+
+    assert asyncio.run(find_common_height(local.__getitem__, remote_hash_at, local_height, remote_height)) == common
+    assert len(requests) <= max(1, min(local_height, remote_height)).bit_length()
+
+
+def test_suffix_after_a_fork_replaces_the_local_suffix(make_transchain, keys):
+    local, remote = make_transchain(), make_transchain()
+    extend(local, keys[0], 6, 1)
+    remote.replace_chain(TransactionChain(transactions=list(local.transaction_chain.transactions)))
+    extend(local, keys[0], 4, 2)
+    extend(remote, keys[0], 9, 3)
+    generation = local.feed.generation
+
+    assert local.synchronize_suffix(7, remote.transaction_chain.transactions[7:]) == "Synchronized"
+    assert hashes(local) == hashes(remote)
+    assert local.feed.read(11, generation).rewind == 7
+    for party in PARTIES:
+        assert local.calculate_balance(party) == local.recalculate_balance(party) == remote.calculate_balance(party)
+
+
+def test_suffix_the_chain_already_holds_is_not_rolled_back(make_transchain, keys):
+    local, remote = make_transchain(), make_transchain()
+    extend(remote, keys[0], 12, 1)
+    # Commits that arrived while the suffix was downloaded
+    local.replace_chain(TransactionChain(transactions=remote.transaction_chain.transactions[:9]))
+    generation = local.feed.generation
+
+    assert local.synchronize_suffix(5, remote.transaction_chain.transactions[5:]) == "Synchronized"
+    assert hashes(local) == hashes(remote)
+    assert local.feed.generation == generation
+    assert local.synchronize_suffix(5, remote.transaction_chain.transactions[5:]) == "nothing to synchronize"
+
+
+def test_invalid_suffix_is_rejected(make_transchain, keys):
+    local, remote = make_transchain(), make_transchain()
+    extend(local, keys[0], 3, 1)
+    remote.replace_chain(TransactionChain(transactions=list(local.transaction_chain.transactions)))
+    extend(remote, keys[0], 5, 1)
+    suffix = [transaction.model_copy() for transaction in remote.transaction_chain.transactions[4:]]
+    suffix[2].sender_signature = keys[0].sign("something else")
+
+    assert local.synchronize_suffix(4, suffix) == "Transchain not valid"
+    assert len(local.transaction_chain.transactions) == 4
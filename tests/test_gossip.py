@@ -0,0 +1,119 @@
+import asyncio
+from collections import namedtuple
+
+from gossip import Commit, Gossip
+
+Transaction = namedtuple("Transaction", ("index", "current_hash"))
+
+
+def commit(index: int) -> list:
+    return [Transaction(index, f"hash_{index}")]
+
+
+class Sender:
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, peer: str, commit: Commit):
+        await self.release.wait()
+        self.sent.append((peer, [transaction.index for transaction in commit.transactions], commit.body))
+
+
+def test_commits_are_published_once_to_fanout_peers():
+    async def scenario():
+        sender = Sender()
+        gossip = Gossip(sender, fanout=2)
+        for name in ("fastapi_app_0", "fastapi_app_1", "fastapi_app_3", "fastapi_app_4"):
+            gossip.add_peer(name)
+        assert not gossip.add_peer("fastapi_app_0")
+        assert gossip.publish(commit(1)) == 2
+        assert gossip.publish(commit(1)) == 0
+        assert gossip.publish([]) == 0
+        await asyncio.sleep(0.01)
+        assert sorted(index for _, index, _ in sender.sent) == [[1], [1]]
+        assert len({peer for peer, _, _ in sender.sent}) == 2
+        assert gossip.stats()["published"] == 1 and gossip.stats()["duplicates"] == 1
+        await gossip.close()
+
+    asyncio.run(scenario())
+
+
+def test_commit_body_is_encoded_once_for_all_peers():
+    async def scenario():
+        encoded = []
+
+        def encode(transactions):
+            encoded.append(len(transactions))
+            return b"body"
+
+        sender = Sender()
+        gossip = Gossip(sender, fanout=3, encode=encode)
+        for name in ("fastapi_app_0", "fastapi_app_1", "fastapi_app_3"):
+            gossip.add_peer(name)
+        # Commits queued behind each other are merged into a new commit per peer
+        await asyncio.sleep(0)
+        gossip.publish(commit(1))
+        await asyncio.sleep(0)
+        gossip.publish(commit(2), body=b"received")
+        await asyncio.sleep(0.01)
+        assert encoded == [1]
+        assert sorted(body for _, _, body in sender.sent) == [b"body"] * 3 + [b"received"] * 3
+        await gossip.close()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_drops_the_oldest_commit():
+    async def scenario():
+        sender = Sender()
+        sender.release.clear()
+        gossip = Gossip(sender, fanout=1, queue_size=2, max_batch=10)
+        gossip.add_peer("fastapi_app_0")
+        gossip.publish(commit(1))
+        # The worker holds the first commit while the send is blocked
+        await asyncio.sleep(0)
+        for index in (2, 3, 4):
+            gossip.publish(commit(index))
+        assert gossip.dropped() == 1
+        # Removing the peer does not lower the count
+        gossip.remove_peer("fastapi_app_0")
+        assert gossip.dropped() == 1
+        gossip.add_peer("fastapi_app_1")
+        sender.release.set()
+        gossip.publish(commit(5))
+        await asyncio.sleep(0.01)
+        assert sender.sent == [("fastapi_app_1", [5], None)]
+        await gossip.close()
+
+    asyncio.run(scenario())
+
+
+def test_queued_commits_are_merged_and_failing_peers_removed():
+    async def scenario():
+        sender = Sender()
+        sender.release.clear()
+        gossip = Gossip(sender, fanout=1, max_batch=3)
+        gossip.add_peer("fastapi_app_0")
+        await asyncio.sleep(0)
+        gossip.publish(commit(1))
+        # The worker holds the first commit, the others are merged up to max_batch transactions
+        await asyncio.sleep(0)
+        for index in range(2, 6):
+            gossip.publish(commit(index))
+        sender.release.set()
+        await asyncio.sleep(0.01)
+        assert [indexes for _, indexes, _ in sender.sent] == [[1], [2, 3, 4], [5]]
+
+        async def fail(peer, commit):
+            raise ConnectionError(peer)
+
+        gossip.send = fail
+        for index in range(6, 9):
+            gossip.publish(commit(index))
+            await asyncio.sleep(0.01)
+        assert gossip.peer_names == [] and gossip.stats()["removed"] == 1
+        await gossip.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+import pytest
+
+from key_registry import KeyRegistry
+from rsa_utils import generate_rsa_keys, load_public_key
+
+
+@pytest.fixture
+def public_key_pem(tmp_path):
+    private, public = str(tmp_path / "private_key.pem"), str(tmp_path / "public_key.pem")
+    generate_rsa_keys(private, public)
+    return load_public_key(public)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = KeyRegistry(ttl_seconds=60)
+    fetched = []
+
+    def fetch_public_key(node):
+        fetched.append(node)
+        raise ConnectionError(f"{node} is unreachable")
+
+    monkeypatch.setattr(registry, "fetch_public_key", fetch_public_key)
+    registry.fetched = fetched
+    return registry
+
+
+def test_missing_key_fails_fast_without_fetching(registry):
+    assert registry.get_key("fastapi_app_0", fetch=False) is None
+    assert registry.fetched == []
+    assert registry.get_key("fastapi_app_0") is None
+    assert registry.fetched == ["fastapi_app_0"]
+
+
+def test_expired_key_is_used_without_fetching(registry, public_key_pem):
+    registry.register("fastapi_app_0", public_key_pem)
+    registry.entries["fastapi_app_0"]["fetched_at"] -= 120
+    assert registry.get_key("fastapi_app_0", fetch=False) is not None
+    assert registry.fetched == []
+    # A failed refresh keeps the stale key
+    assert registry.get_key("fastapi_app_0") is not None
+    assert registry.fetched == ["fastapi_app_0"]
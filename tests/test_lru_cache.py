@@ -0,0 +1,44 @@
+import lru_cache
+from encoded_transaction import EncodedTransaction
+from lru_cache import LRUCache
+
+
+def entry(number: int, signature: str = "signature") -> dict:
+    return {"index": number, "current_hash": f"{number:064x}", "authority_signature": signature}
+
+
+def test_least_recently_added_entry_is_evicted():
+    cache = LRUCache(max_size=2)
+    cache.add(entry(1))
+    cache.add(entry(2))
+    # Adding again makes it the most recently used entry
+    cache.add(entry(1))
+    cache.add(entry(3))
+    assert cache.exists(entry(1)) and cache.exists(entry(3))
+    assert not cache.exists(entry(2))
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hit_rate"] == 2 / 3
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(lru_cache.time, "monotonic", lambda: now[0])
+    cache = LRUCache(max_size=10, ttl=5)
+    cache.add(entry(1))
+    now[0] += 4
+    assert cache.exists(entry(1))
+    now[0] += 2
+    assert not cache.exists(entry(1))
+    assert len(cache) == 0
+
+
+def test_key_covers_the_authority_signature():
+    cache = LRUCache(max_size=10)
+    cache.add(entry(1, "first authority"))
+    assert not cache.exists(entry(1, "second authority"))
+    assert not cache.exists({"index": 1, "current_hash": f"{1:064x}"})
+    # A transaction carrying its encoding maps to the same key as its dict
+    encoded = EncodedTransaction(data=dict(entry(1, "first authority"), sender="fastapi_app_0"))
+    assert LRUCache.key_for(encoded) == LRUCache.key_for(entry(1, "first authority"))
+    assert cache.exists(encoded)
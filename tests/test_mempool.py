@@ -0,0 +1,76 @@
+import threading
+from datetime import datetime, timedelta
+
+from mempool import Mempool, expiration_timestamp
+from models import Transaction
+
+START = datetime(2024, 1, 1)
+
+
+def request(number: int, ttl: float = 600, expiration: str = None) -> Transaction:
+    return Transaction(index=number, sender="fastapi_app_0", recipient="fastapi_app_1", amount=1.0, timestamp="",
+                       current_hash=f"{number:064x}", expiration=expiration or (START + timedelta(seconds=ttl)).isoformat())
+
+
+class Clock:
+    def __init__(self, pool: Mempool):
+        self.now = expiration_timestamp(START.isoformat())
+        pool._now = lambda: self.now
+
+
+def test_requests_are_evicted_after_their_ttl():
+    pool = Mempool()
+    clock = Clock(pool)
+    assert pool.add(request(1, ttl=10)) == "added"
+    assert pool.add(request(2, ttl=20)) == "added"
+    assert pool.add(request(3, expiration="never")) == "added"
+
+    clock.now += 15
+    assert pool.get(f"{1:064x}") is None
+    assert [transaction.index for transaction in pool.page()] == [2, 3]
+    clock.now += 10
+    assert pool.at(0).index == 3
+    assert pool.stats()["evicted"] == 2
+    assert pool.add(request(4, ttl=20)) == "expired"
+
+
+def test_duplicate_full_and_remove():
+    pool = Mempool(max_size=2)
+    Clock(pool)
+    assert pool.add(request(1)) == "added"
+    assert pool.add(request(1)) == "duplicate"
+    assert pool.add(request(2)) == "added"
+    assert pool.add(request(3)) == "full"
+    assert pool.remove(f"{1:064x}").index == 1
+    assert pool.remove(f"{1:064x}") is None
+    assert pool.add(request(3)) == "added"
+    assert [transaction.index for transaction in pool.page(offset=1, limit=5)] == [3]
+    assert pool.at(2) is None and pool.at(-1) is None
+    assert pool.stats()["rejected"] == 2
+
+
+def test_concurrent_adds_and_evictions():
+    pool = Mempool(max_size=100000)
+    clock = Clock(pool)
+    stop = threading.Event()
+
+    def evict():
+        while not stop.is_set():
+            pool.evict_expired()
+
+    evictors = [threading.Thread(target=evict) for _ in range(4)]
+    for thread in evictors:
+        thread.start()
+    try:
+        for number in range(5000):
+            pool.add(request(number, ttl=number % 50))
+            if number % 100 == 0:
+                clock.now += 1
+    finally:
+        stop.set()
+        for thread in evictors:
+            thread.join()
+    clock.now += 100
+    pool.evict_expired()
+    assert len(pool) == 0
+    assert pool.stats()["evicted"] + pool.stats()["rejected"] == 5000
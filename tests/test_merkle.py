@@ -0,0 +1,61 @@
+from collections import namedtuple
+
+import pytest
+
+from merkle import MerkleIndex, leaf_hash, merkle_root, node_hash, verify_proof
+
+Transaction = namedtuple("Transaction", ("current_hash",))
+
+
+def chain(count: int, prefix: str = "tx") -> list:
+    return [Transaction(f"{prefix}_{index}") for index in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 7, 8, 9, 25])
+def test_every_transaction_has_a_valid_proof(count):
+    index = MerkleIndex(window_size=4)
+    index.extend(chain(count))
+    root = index.checkpoint()["root"]
+    for position, transaction in enumerate(chain(count)):
+        proof = index.proof(position)
+        assert proof["root"] == root
+        assert verify_proof(transaction.current_hash, proof["path"], root)
+
+
+def test_tampered_proofs_are_rejected():
+    index = MerkleIndex(window_size=4)
+    index.extend(chain(11))
+    proof = index.proof(5)
+    root = proof["root"]
+    assert not verify_proof("tx_6", proof["path"], root)
+    assert not verify_proof("tx_5", proof["path"][:-1], root)
+    assert not verify_proof("tx_5", [("right" if side == "left" else "left", sibling) for side, sibling in proof["path"]], root)
+    side, sibling = proof["path"][0]
+    assert not verify_proof("tx_5", [(side, "00" * 32)] + proof["path"][1:], root)
+    # An inner node cannot be passed off as a leaf
+    inner = node_hash(leaf_hash("tx_4"), leaf_hash("tx_5")).hex()
+    assert not verify_proof(inner, proof["path"][1:], root)
+    with pytest.raises(IndexError):
+        index.proof(11)
+
+
+def test_roots_over_leading_windows_locate_a_divergence():
+    local, remote = MerkleIndex(window_size=4), MerkleIndex(window_size=4)
+    local.extend(chain(10))
+    remote.extend(chain(6) + chain(6, "fork"))
+    assert local.root(1) == remote.root(1)
+    assert local.root(2) != remote.root(2)
+    assert local.checkpoint(1)["height"] == 4
+
+
+def test_truncate_and_extend_matches_a_fresh_index():
+    index = MerkleIndex(window_size=4)
+    index.extend(chain(13))
+    index.truncate(6)
+    index.extend(chain(3, "new"))
+    fresh = MerkleIndex(window_size=4)
+    fresh.extend(chain(6) + chain(3, "new"))
+    assert index.checkpoint() == fresh.checkpoint()
+    assert index.window_root(2) == merkle_root([leaf_hash("new_2")])
+    with pytest.raises(IndexError):
+        index.window_root(3)
@@ -0,0 +1,52 @@
+import asyncio
+
+from tip_lock import TipLock
+
+
+def test_expired_lease_is_granted_to_the_next_waiter():
+    async def scenario():
+        lock = TipLock(lease_duration=0.05)
+        first = await lock.acquire("fastapi_app_2")
+        # The holder never releases, the waiter gets the tip once the lease expires
+        second = await lock.acquire("fastapi_app_3", timeout=1)
+        assert second.holder == "fastapi_app_3"
+        assert lock.stats()["expired"] == 1
+        # The expired lease cannot release the lease of its successor
+        assert not lock.release(first.token)
+        assert lock.release(second.token)
+        assert lock.holder is None
+
+    asyncio.run(scenario())
+
+
+def test_waiters_are_served_in_order_and_may_give_up():
+    async def scenario():
+        lock = TipLock(lease_duration=5)
+        lease = await lock.acquire("fastapi_app_2")
+        assert await lock.acquire("fastapi_app_3", timeout=0.01) is None
+        waiters = [asyncio.create_task(lock.acquire(name, timeout=1)) for name in ("fastapi_app_3", "fastapi_app_4")]
+        await asyncio.sleep(0)
+        # Queued proposers go first, try_acquire does not jump the line
+        assert lock.try_acquire("fastapi_app_0") is None
+        lock.release(lease.token)
+        second = await waiters[0]
+        assert second.holder == "fastapi_app_3" and not waiters[1].done()
+        lock.release_holder("fastapi_app_3")
+        assert (await waiters[1]).holder == "fastapi_app_4"
+        assert lock.stats()["rejected"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_holder_is_granted_its_own_lease_again():
+    async def scenario():
+        lock = TipLock(lease_duration=5)
+        lease = lock.try_acquire("fastapi_app_2")
+        assert lock.try_acquire("fastapi_app_2") is lease
+        assert lock.try_acquire("fastapi_app_3") is None
+        # Only the named holder is released
+        assert not lock.release_holder("fastapi_app_3")
+        assert lock.release_holder("fastapi_app_2")
+        assert lock.try_acquire("fastapi_app_3").holder == "fastapi_app_3"
+
+    asyncio.run(scenario())
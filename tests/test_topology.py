@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from topology import Topology, parse_peer_addresses, quorum_size
+
+
+@pytest.mark.parametrize("authorities, rule, size", [
+    (3, "majority", 2), (4, "majority", 3), (1, "majority", 1),
+    (3, "all-but-one", 2), (1, "all-but-one", 1),
+    (5, "all", 5),
+    (3, "2", 2), (3, 7, 3), (3, "0", 1),
+])
+def test_quorum_size(authorities, rule, size):
+    assert quorum_size(authorities, rule) == size
+
+
+@pytest.mark.parametrize("rule", ["most", None, "1.5"])
+def test_unknown_quorum_rule_is_rejected(rule):
+    with pytest.raises(ValueError):
+        quorum_size(3, rule)
+    with pytest.raises(ValueError):
+        Topology(["fastapi_app_2"], quorum=rule)
+
+
+def test_topology_from_env():
+    topology = Topology.from_env({
+        "AUTHORITY_NODES": "fastapi_app_2, fastapi_app_3,,fastapi_app_2",
+        "PEER_ADDRESSES": "fastapi_app_2=127.0.0.1:8102,invalid",
+        "PEER_PORT": "9000",
+        "QUORUM": "all",
+    })
+    assert topology.authorities == ["fastapi_app_2", "fastapi_app_3"]
+    assert topology.quorum == 2
+    assert topology.url("fastapi_app_2") == "http://127.0.0.1:8102"
+    assert topology.url("fastapi_app_3") == "http://fastapi_app_3:9000"
+    assert parse_peer_addresses("a = h:1 , b=h:2") == {"a": "h:1", "b": "h:2"}
+
+
+def write(path, mtime: int, **data):
+    path.write_text(json.dumps(data))
+    # Set explicitly, two writes within the resolution of the clock would look unmodified
+    os.utime(path, (mtime, mtime))
+
+
+def test_reload_picks_up_changes_and_keeps_a_bad_file_out(tmp_path):
+    path = tmp_path / "topology.json"
+    write(path, 1, authorities=["fastapi_app_2", "fastapi_app_3", "fastapi_app_4"])
+    topology = Topology.from_env({"TOPOLOGY_FILE": str(path)})
+    assert topology.quorum == 2 and topology.version == 1
+    assert not topology.reload()
+
+    write(path, 2, authorities=["fastapi_app_2", "fastapi_app_3"], quorum="all", addresses={"fastapi_app_3": "10.0.0.3:8000"})
+    assert topology.reload()
+    assert topology.authorities == ["fastapi_app_2", "fastapi_app_3"]
+    assert topology.quorum == 2 and topology.version == 2
+    assert topology.url("fastapi_app_3") == "http://10.0.0.3:8000"
+
+    write(path, 3, authorities=[])
+    assert not topology.reload()
+    write(path, 4, authorities=["fastapi_app_2"], quorum="most")
+    assert not topology.reload()
+    path.unlink()
+    assert not topology.reload()
+    assert topology.authorities == ["fastapi_app_2", "fastapi_app_3"] and topology.version == 2
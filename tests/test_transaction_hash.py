@@ -0,0 +1,19 @@
+from models import Transaction
+from transchain import Transchain
+
+
+def test_copy_with_changed_hashed_field_is_hashed_again():
+    transchain = Transchain(["fastapi_app_2"])
+    transaction = Transaction(index=1, sender="fastapi_app_0", recipient="fastapi_app_1", amount=10.0,
+                              previous_hash="00", expiration="2024-01-01T00:10:00", timestamp="")
+    digest = transchain.calculate_hash(transaction)
+    assert transchain.calculate_hash(transaction) == digest
+
+    changed = transaction.model_copy(update={"amount": 5.0})
+    assert transchain.calculate_hash(changed) == transchain.calculate_hash(changed.model_dump()) != digest
+    # Fields outside the hash keep the digest, the original is unaffected
+    assert transchain.calculate_hash(transaction.model_copy(update={"timestamp": "later"})) == digest
+    assert transchain.calculate_hash(transaction) == digest
+
+    transaction.amount = 5.0
+    assert transchain.calculate_hash(transaction) == transchain.calculate_hash(changed)
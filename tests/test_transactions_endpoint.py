@@ -0,0 +1,39 @@
+import json
+
+from conftest import commit
+
+
+def extend(main, count: int):
+    for amount in range(count):
+        main.transchain.append_transaction(commit(main, *main.transchain.chain_tip(), amount + 1))
+
+
+def test_pages_of_the_chain(main, client):
+    extend(main, 5)
+    page = client.get("/transactions", params={"from_index": 2, "limit": 2}).json()["transactions"]
+    assert [transaction["index"] for transaction in page] == [2, 3]
+    rest = client.get("/transactions", params={"from_index": 4, "limit": 10}).json()["transactions"]
+    assert [transaction["index"] for transaction in rest] == [4, 5]
+    assert client.get("/transactions", params={"from_index": 9}).json()["transactions"] == []
+    assert len(client.get("/transactions").json()["transactions"]) == 6
+
+
+def test_ndjson_streams_one_transaction_per_line(main, client):
+    extend(main, 3)
+    response = client.get("/transactions", params={"from_index": 1, "format": "ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [transaction["index"] for transaction in lines] == [1, 2, 3]
+    assert lines == client.get("/transactions", params={"from_index": 1}).json()["transactions"]
+
+
+def test_unchanged_chain_is_answered_with_not_modified(main, client):
+    extend(main, 2)
+    etag = client.get("/transactions", params={"from_index": 1}).headers["etag"]
+    assert client.get("/transactions", params={"from_index": 1}, headers={"If-None-Match": etag}).status_code == 304
+    # Another page or format of the same chain has its own tag
+    assert client.get("/transactions", params={"from_index": 2}, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/transactions", params={"from_index": 1, "format": "ndjson"}, headers={"If-None-Match": etag}).status_code == 200
+    extend(main, 1)
+    response = client.get("/transactions", params={"from_index": 1}, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["etag"] != etag
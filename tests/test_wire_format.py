@@ -0,0 +1,96 @@
+import struct
+
+import pytest
+
+from wire_format import (BINARY, CHAIN_HEADER, COLUMN_HEADER, DICTIONARY_COLUMN, HEX_COLUMN, JSON, decode_chain, decode_prepare,
+                         decode_transaction, dump_chain, encode_chain, encode_prepare, encode_transaction, load_chain, load_transaction)
+
+
+def transaction(index: int, sender: str = "fastapi_app_0", **fields) -> dict:
+    data = {
+        "index": index,
+        "amount": 10.5,
+        "sender": sender,
+        "recipient": "fastapi_app_1",
+        "expiration": "2024-01-01T00:10:00",
+        "timestamp": "2024-01-01T00:00:00",
+        "authority": "fastapi_app_2",
+        "previous_hash": f"{index - 1:064x}",
+        "current_hash": f"{index:064x}",
+        "sender_signature": "ab" * 256,
+        "recipient_signature": "cd" * 256,
+        "authority_signature": None,
+    }
+    data.update(fields)
+    return data
+
+
+def test_transaction_round_trip():
+    # Hashes that are not lowercase hex are sent as text
+    data = transaction(3, previous_hash="ABCD", current_hash="abc")
+    assert decode_transaction(encode_transaction(data)) == data
+
+
+def test_field_longer_than_65535_bytes_round_trips():
+    data = transaction(1, sender="x" * 70000, sender_signature="ef" * 40000)
+    assert decode_transaction(encode_transaction(data)) == data
+    assert decode_chain(encode_chain([data, transaction(2)])) == [data, transaction(2)]
+
+
+def test_prepare_round_trip():
+    data = dict(transaction(1), container_name="fastapi_app_2")
+    assert decode_prepare(encode_prepare(data)) == data
+
+
+def test_chain_round_trip_with_every_column_type():
+    # Repeated names become a dictionary column, distinct ones a string column
+    chain = [transaction(index, sender=f"node_{index}" if index % 2 else "fastapi_app_0") for index in range(1, 41)]
+    chain[5]["current_hash"] = None
+    chain[7]["expiration"] = None
+    assert decode_chain(encode_chain(chain)) == chain
+    assert [t.model_dump() for t in load_chain(dump_chain(chain, BINARY), BINARY)] == [t.model_dump() for t in load_chain(dump_chain(chain, JSON), JSON)]
+
+
+def dictionary_column_offset(body: bytes, count: int) -> int:
+    # The sender column follows the header, the indexes and the amounts
+    offset = CHAIN_HEADER.size + count * 16
+    assert COLUMN_HEADER.unpack_from(body, offset)[0] == DICTIONARY_COLUMN
+    return offset
+
+
+def test_out_of_range_dictionary_id_is_rejected():
+    chain = [transaction(index) for index in range(1, 9)]
+    body = bytearray(encode_chain(chain))
+    offset = dictionary_column_offset(body, len(chain))
+    # One table entry: its length, the blob length and the blob, then the ids
+    ids = offset + COLUMN_HEADER.size + 4 + 8 + len("fastapi_app_0")
+    struct.pack_into("<I", body, ids, 7)
+    with pytest.raises(ValueError):
+        load_chain(bytes(body), BINARY)
+
+
+def test_truncated_bodies_are_rejected():
+    chain = [transaction(index) for index in range(1, 9)]
+    chain[2]["authority_signature"] = "01" * 256
+    body = encode_chain(chain)
+    # Cut inside the missing positions of the authority signature column and anywhere else
+    for end in [len(body) - 256 * 8 - 3, len(body) // 2, CHAIN_HEADER.size + 3, 5]:
+        with pytest.raises(ValueError):
+            load_chain(body[:end], BINARY)
+    record = encode_transaction(transaction(1))
+    for end in [len(record) - 1, 30]:
+        with pytest.raises(ValueError):
+            load_transaction(record[:end], BINARY)
+
+
+def test_out_of_range_missing_position_is_rejected():
+    chain = [transaction(index) for index in range(1, 9)]
+    chain[0]["authority_signature"] = "01" * 256
+    body = bytearray(encode_chain(chain))
+    # The authority signature column is the last one, its missing positions follow its header
+    width = 256
+    column = len(body) - len(chain) * width - 7 * 4 - COLUMN_HEADER.size
+    assert COLUMN_HEADER.unpack_from(body, column) == (HEX_COLUMN, width, 7)
+    struct.pack_into("<I", body, column + COLUMN_HEADER.size, 1000)
+    with pytest.raises(ValueError):
+        load_chain(bytes(body), BINARY)